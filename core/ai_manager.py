@@ -8,8 +8,8 @@ import json
 import requests
 import time
 from typing import Dict, List, Optional, Tuple
-from pathlib import Path
 from utils.helpers import app_base_path
+from core.ignore import get_ignore_engine
 
 
 class AIManager:
@@ -34,31 +34,6 @@ class AIManager:
         }
     }
     
-    # Directorios a ignorar (entornos virtuales, dependencias, etc)
-    IGNORED_DIRS = {
-        'node_modules', 'venv', '.venv', 'env', '.env',
-        '__pycache__', '.git', '.svn', '.hg',
-        'dist', 'build', '.next', '.nuxt', 'out',
-        'target', 'bin', 'obj',
-        '.idea', '.vscode', '.vs',
-        'coverage', '.pytest_cache', '.mypy_cache',
-        'site-packages', 'Lib', 'lib', 'Scripts',
-        '.egg-info', 'eggs', 'bower_components',
-        '.gradle', '.m2', '.ivy2',
-        'vendor', 'packages', 'deps',
-    }
-    
-    # Extensiones a ignorar
-    IGNORED_EXTENSIONS = {
-        '.pyc', '.pyo', '.so', '.dll', '.exe', '.o', '.a',
-        '.min.js', '.min.css', '.map',
-        '.lock', '.log',
-        '.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg',
-        '.mp3', '.mp4', '.avi', '.mov',
-        '.zip', '.tar', '.gz', '.rar', '.7z',
-        '.pdf', '.doc', '.docx',
-    }
-    
     # Límites de tamaño
     MAX_FILE_SIZE = 1024 * 1024  # 1MB por archivo
     MAX_LINES_PER_FILE = 500
@@ -177,6 +152,7 @@ class AIManager:
         Filtra archivos grandes, binarios, y directorios ignorados
         """
         context_parts = []
+        context_chars = 0
         stats = {
             "total_files": len(files),
             "included_files": 0,
@@ -187,7 +163,7 @@ class AIManager:
         
         for filepath in files:
             # Verificar si debe ignorarse
-            if self._should_ignore_file(filepath):
+            if self._should_ignore_file(filepath, file_manager):
                 stats["skipped_files"] += 1
                 continue
             
@@ -217,9 +193,18 @@ class AIManager:
                     content.append(f"\n... (archivo truncado, {len(content)} líneas más)")
                 
                 relative_path = file_manager.get_relative_path(filepath)
+                header = f"=== Archivo: {relative_path} ==="
+                body = "".join(content)
+                
+                # Respetar el límite de contexto (misma estimación: chars // 4)
+                block_chars = len(header) + len(body) + 3
+                if (context_chars + block_chars) // 4 > self.MAX_TOTAL_TOKENS:
+                    stats["skipped_files"] += 1
+                    continue
+                context_chars += block_chars
                 
-                context_parts.append(f"=== Archivo: {relative_path} ===")
-                context_parts.append("".join(content))
+                context_parts.append(header)
+                context_parts.append(body)
                 context_parts.append("")
                 
                 stats["included_files"] += 1
@@ -234,20 +219,10 @@ class AIManager:
         
         return context, stats
     
-    def _should_ignore_file(self, filepath: str) -> bool:
-        """Verifica si un archivo debe ser ignorado"""
-        path = Path(filepath)
-        
-        # Verificar directorios ignorados
-        for part in path.parts:
-            if part in self.IGNORED_DIRS:
-                return True
-        
-        # Verificar extensión
-        if path.suffix in self.IGNORED_EXTENSIONS:
-            return True
-        
-        return False
+    def _should_ignore_file(self, filepath: str, file_manager=None) -> bool:
+        """Verifica si un archivo debe ser ignorado (perfil "context" del motor de ignore)"""
+        root = getattr(file_manager, "root_path", None) or os.path.dirname(filepath)
+        return get_ignore_engine(root, "context").is_ignored(filepath, is_dir=False)
     
     def send_request(self, prompt: str, context: str = "", 
                     system_prompt: str = "", temperature: float = 0.7) -> Dict:
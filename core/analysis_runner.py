@@ -0,0 +1,164 @@
+import ast
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+from dataclasses import dataclass, field
+
+from core.content_search import SEARCH_WORKERS, get_search_pool, read_file
+from core.file_classifier import SNIFF_SIZE, classify_by_name
+from core.todo_scanner import DEFAULT_TAGS, MAX_FILE_SIZE, TodoScanner
+
+
+CHUNK_FILES = 128          # Archivos por tarea del pool
+PROGRESS_FPS = 15          # Avisos de progreso por segundo como máximo
+
+
+@dataclass
+class FileAnalysis:
+    """Resultado compacto de un archivo (solo se envían los que tienen algo)"""
+    path: str
+    todos: list = field(default_factory=list)          # [(tipo, línea, texto)]
+    syntax_errors: list = field(default_factory=list)  # [(línea, mensaje, texto)]
+
+
+# ── Trabajo por tanda (se ejecuta en los procesos del pool) ─────────────
+
+_scanners = {}
+
+
+def _scanner(tags):
+    scanner = _scanners.get(tags)
+    if scanner is None:
+        scanner = _scanners[tags] = TodoScanner(tags)
+    return scanner
+
+
+def analyze_file(path, scanner, check_syntax=True):
+    """TODOs y error de sintaxis (solo .py) de un archivo; None si no hay nada"""
+    verdict = classify_by_name(path)
+    if verdict is False:
+        return None
+    buf = read_file(path, MAX_FILE_SIZE)
+    if not buf or (verdict is None and b"\0" in buf[:SNIFF_SIZE]):
+        return None
+
+    todos = [(item["type"], item["line"], item["text"]) for item in scanner.scan_buffer(buf)]
+    errors = []
+    if check_syntax and path.endswith(".py"):
+        try:
+            ast.parse(buf.decode("utf-8", "ignore"), path)
+        except SyntaxError as e:
+            errors.append((e.lineno or 1, str(e.msg), e.text.strip() if e.text else ""))
+        except (ValueError, RecursionError, MemoryError) as e:
+            errors.append((1, str(e), ""))
+    if todos or errors:
+        return FileAnalysis(path, todos, errors)
+    return None
+
+
+def analyze_files(paths, tags=DEFAULT_TAGS, check_syntax=True):
+    """Analiza una tanda: (archivos procesados, [FileAnalysis])"""
+    scanner = _scanner(tuple(tags))
+    results = []
+    for path in paths:
+        result = analyze_file(path, scanner, check_syntax)
+        if result is not None:
+            results.append(result)
+    return len(paths), results
+
+
+# ── Ejecutor ────────────────────────────────────────────────────────────
+
+class AnalysisRunner:
+    """Análisis de TODOs y sintaxis repartido en el pool de procesos.
+
+    Un hilo coordinador envía tandas de CHUNK_FILES archivos al pool
+    compartido (o las procesa él mismo si hay un solo núcleo o una sola
+    tanda). `on_progress(hechos, total)` se agrupa a PROGRESS_FPS avisos por
+    segundo y `on_done([FileAnalysis], cancelado)` llega al terminar; ambos
+    desde el hilo coordinador.
+    """
+
+    def __init__(self, files, on_progress=None, on_done=None, tags=DEFAULT_TAGS,
+                 check_syntax=True, use_processes=None):
+        self.files = list(files)
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.tags = tuple(tags)
+        self.check_syntax = check_syntax
+        self.use_processes = use_processes
+        self._cancelled = threading.Event()
+        self._thread = None
+        self._done = 0
+        self._last_progress = 0.0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        """Ejecuta el análisis en el hilo actual y retorna los resultados"""
+        return self._run()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _run(self):
+        results = []
+        try:
+            chunks = [self.files[i:i + CHUNK_FILES] for i in range(0, len(self.files), CHUNK_FILES)]
+            parallel = self.use_processes
+            if parallel is None:
+                parallel = len(chunks) > 1 and SEARCH_WORKERS > 1
+            if parallel:
+                self._run_pool(chunks, results)
+            else:
+                for chunk in chunks:
+                    if self._cancelled.is_set():
+                        break
+                    self._collect(analyze_files(chunk, self.tags, self.check_syntax), results)
+        except Exception as e:
+            print(f"Error in analysis runner: {e}")
+        self._report_progress(force=True)
+        if self.on_done is not None:
+            self.on_done(results, self.cancelled)
+        return results
+
+    def _run_pool(self, chunks, results):
+        pool = get_search_pool()
+        pending = iter(chunks)
+        in_flight = set()
+        exhausted = False
+        while not self._cancelled.is_set():
+            while not exhausted and len(in_flight) < 2 * SEARCH_WORKERS:
+                chunk = next(pending, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                in_flight.add(pool.submit(analyze_files, chunk, self.tags, self.check_syntax))
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, timeout=1 / PROGRESS_FPS, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._collect(future.result(), results)
+        for future in in_flight:
+            future.cancel()
+
+    def _collect(self, outcome, results):
+        count, found = outcome
+        results.extend(found)
+        self._done += count
+        self._report_progress()
+
+    def _report_progress(self, force=False):
+        if self.on_progress is None:
+            return
+        now = time.monotonic()
+        if force or now - self._last_progress >= 1 / PROGRESS_FPS:
+            self._last_progress = now
+            self.on_progress(self._done, len(self.files))
@@ -0,0 +1,394 @@
+"""
+Interfaz de línea de comandos de Code Tools ++ (sin interfaz gráfica).
+
+Permite exportar, calcular estadísticas, analizar y limpiar un proyecto
+desde CI o tareas programadas. No importa tkinter, PIL ni matplotlib:
+solo los gestores de core/.
+
+    python -m core export . --format llm -o contexto.md
+    python -m core stats src --json
+    python -m core analyze . --todos --duplicates
+    python -m core analyze . --similar --threshold 0.7
+    python -m core clean . --comments --mirror ../limpio
+    python -m core grep "def \\w+_cache" core -C 1
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+from core.export_sinks import StreamSink, open_file_sink
+from core.ignore import PROFILES, get_ignore_engine
+
+
+EXPORT_FORMATS = ("llm", "llm-budget", "content", "paths", "tree")
+
+
+# ── Selección de archivos ───────────────────────────────────────────────
+
+def collect_files(paths, profile="selection"):
+    """Archivos de las rutas indicadas (carpetas recorridas respetando ignores)"""
+    from core.project_index import ProjectIndex
+
+    files = []
+    for path in paths:
+        path = os.path.abspath(path)
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        if not os.path.isdir(path):
+            print(f"Error: path not found: {path}", file=sys.stderr)
+            continue
+        engine = get_ignore_engine(path, profile)
+        index = ProjectIndex(path, should_descend=engine.should_descend)
+        for entry in index.iter_files(path):
+            if not engine.is_ignored(entry.path, is_dir=False):
+                files.append(entry.path)
+    return list(dict.fromkeys(files))
+
+
+def _project_root(paths):
+    """Raíz común de las rutas (base de las rutas relativas)"""
+    roots = [os.path.abspath(p) for p in paths]
+    root = os.path.commonpath(roots) if roots else os.getcwd()
+    return root if os.path.isdir(root) else os.path.dirname(root)
+
+
+def _open_output(output):
+    if not output or output == "-":
+        return StreamSink(sys.stdout)
+    return open_file_sink(output)
+
+
+def _write_json(data, output):
+    with _open_output(output) as sink:
+        sink.write(json.dumps(data, indent=2, ensure_ascii=False, default=str))
+        sink.write("\n")
+
+
+def _write_lines(lines, output):
+    with _open_output(output) as sink:
+        for line in lines:
+            sink.write(line)
+            sink.write("\n")
+
+
+def _relative(path, root):
+    try:
+        return os.path.relpath(path, root)
+    except ValueError:
+        return path
+
+
+# ── Comandos ────────────────────────────────────────────────────────────
+
+def cmd_export(args):
+    from core.export_manager import ExportManager
+    from core.file_manager import FileManager
+
+    files = collect_files(args.paths, args.profile)
+    file_manager = FileManager()
+    file_manager.set_root(_project_root(args.paths))
+    exporter = ExportManager(file_manager)
+
+    if args.format == "llm":
+        chunks = exporter.iter_llm_export(files)
+    elif args.format == "llm-budget":
+        chunks = exporter.iter_packed_llm_export(files, args.budget)
+    elif args.format == "tree":
+        chunks = exporter.iter_tree_export(files)
+    elif args.format == "paths":
+        chunks = exporter.iter_paths_export(files, not args.absolute)
+    else:
+        chunks = exporter.iter_content_export(files, not args.absolute, not args.no_content)
+
+    exporter.write_to_sink(chunks, _open_output(args.output))
+    if exporter.last_pack is not None and args.format == "llm-budget":
+        pack = exporter.last_pack
+        print(f"~{pack.used_tokens:,}/{pack.budget:,} tokens", file=sys.stderr)
+    return 0
+
+
+def cmd_stats(args):
+    from core.project_stats import ProjectStats
+
+    files = collect_files(args.paths, args.profile)
+    project_stats = ProjectStats()
+    stats = project_stats.calculate_stats(files)
+    project_stats.metadata_cache.flush()
+
+    if args.json:
+        data = {
+            "total_files": stats["total_files"],
+            "total_lines": stats["total_lines"],
+            "total_size": stats["total_size"],
+            "by_extension": dict(stats["by_extension"]),
+            "by_language": project_stats.get_language_distribution(stats),
+        }
+        if args.top:
+            root = _project_root(args.paths)
+            data["top_files_by_lines"] = [
+                {"path": _relative(f["path"], root), "lines": f["lines"]}
+                for f in project_stats.get_top_files_by_lines(files, args.top)
+            ]
+        _write_json(data, args.output)
+    else:
+        _write_lines(project_stats.get_formatted_stats(stats).split("\n"), args.output)
+    return 0
+
+
+def cmd_analyze(args):
+    from core.code_analyzer import CodeAnalyzer
+
+    files = collect_files(args.paths, args.profile)
+    root = _project_root(args.paths)
+    analyzer = CodeAnalyzer(todo_tags=args.tags.split(",") if args.tags else None)
+    analyzer.set_clone_max_bucket(args.max_bucket)
+    run_all = not (args.todos or args.complexity or args.duplicates or args.similar)
+    result = {}
+
+    if args.todos or run_all:
+        todos = analyzer.find_todos_in_files(files)
+        result["todos"] = {_relative(fp, root): findings for fp, findings in todos.items()}
+    if args.complexity or run_all:
+        metrics = analyzer.analyze_project_complexity(files)
+        metrics["by_extension"] = dict(metrics["by_extension"])
+        for item in metrics["largest_files"]:
+            item["path"] = _relative(item["path"], root)
+        result["complexity"] = metrics
+    if args.duplicates:
+        result["duplicates"] = [
+            {**dup, "file1": _relative(dup["file1"], root), "file2": _relative(dup["file2"], root)}
+            for dup in analyzer.detect_duplicate_code(files, args.min_lines)
+        ]
+        if analyzer.duplicates_capped:
+            print(f"Note: {analyzer.duplicates_capped} very common blocks were only compared "
+                  f"with their neighbours (--max-bucket); results may be incomplete.", file=sys.stderr)
+    if args.similar:
+        result["similar"] = [
+            {
+                "files": [_relative(fp, root) for fp in group["files"]],
+                "similarity": round(group["similarity"], 3),
+                "pairs": [[_relative(a, root), _relative(b, root), round(sim, 3)]
+                          for a, b, sim in group["pairs"]],
+            }
+            for group in analyzer.detect_near_duplicates(files, args.threshold)
+        ]
+        if analyzer.near_duplicates_capped:
+            print(f"Note: {analyzer.near_duplicates_capped} large similarity buckets were only compared "
+                  f"with their neighbours (--max-bucket); results may be incomplete.", file=sys.stderr)
+
+    if args.json:
+        _write_json(result, args.output)
+    else:
+        _write_lines(_analysis_markdown(result), args.output)
+    return 0
+
+
+def _analysis_markdown(result):
+    lines = ["# Code analysis", ""]
+    todos = result.get("todos")
+    if todos is not None:
+        total = sum(len(f) for f in todos.values())
+        lines += [f"## Annotations ({total})", ""]
+        for path, findings in todos.items():
+            for f in findings:
+                lines.append(f"- `{path}:{f['line']}` **{f['type']}** {f['text']}")
+        lines.append("")
+    metrics = result.get("complexity")
+    if metrics is not None:
+        lines += [
+            "## Complexity",
+            "",
+            f"- Files: {metrics['total_files']}",
+            f"- Lines: {metrics['total_lines']:,}",
+            f"- Code lines: {metrics['total_code_lines']:,}",
+            f"- Comment lines: {metrics['total_comment_lines']:,}",
+            "",
+            "### Largest files",
+            "",
+        ]
+        lines += [f"- `{item['path']}`: {item['lines']:,} lines" for item in metrics["largest_files"]]
+        lines.append("")
+    duplicates = result.get("duplicates")
+    if duplicates is not None:
+        lines += [f"## Duplicated blocks ({len(duplicates)} file pairs)", ""]
+        for dup in duplicates:
+            lines.append(f"- `{dup['file1']}` ↔ `{dup['file2']}`: {len(dup['blocks'])} blocks")
+        lines.append("")
+    similar = result.get("similar")
+    if similar is not None:
+        lines += [f"## Similar files ({len(similar)} groups)", ""]
+        for group in similar:
+            names = ", ".join(f"`{path}`" for path in group["files"])
+            lines.append(f"- {len(group['files'])} files, up to {group['similarity']:.0%} similar: {names}")
+        lines.append("")
+    return lines
+
+
+def cmd_grep(args):
+    from core.content_search import ContentQuery, ContentSearch
+
+    query = ContentQuery(
+        args.pattern,
+        regex=not args.fixed_strings,
+        case_sensitive=not args.ignore_case,
+        whole_word=args.word_regexp,
+        context=args.context,
+    )
+    try:
+        query.compile()
+    except re.error as e:
+        print(f"Error: invalid pattern: {e}", file=sys.stderr)
+        return 2
+
+    files = collect_files(args.paths, args.profile)
+    root = _project_root(args.paths)
+    if args.index:
+        narrowed = _trigram_index(root, args).narrow(files, args.pattern, regex=not args.fixed_strings)
+        if narrowed is not None:
+            # Los archivos pasados explícitamente se buscan siempre
+            keep = set(narrowed) | {os.path.abspath(p) for p in args.paths if os.path.isfile(p)}
+            files = [path for path in files if path in keep]
+    order = {path: i for i, path in enumerate(files)}
+    matches = []
+    ContentSearch(files, query, matches.extend).run()
+    matches.sort(key=lambda m: (order.get(m.path, 0), m.line))
+
+    def lines():
+        for m in matches:
+            rel = _relative(m.path, root)
+            for line, text in m.before:
+                yield f"{rel}-{line}-{text}"
+            yield f"{rel}:{m.line}:{m.text}"
+            for line, text in m.after:
+                yield f"{rel}-{line}-{text}"
+
+    _write_lines(lines(), args.output)
+    return 0 if matches else 1
+
+
+def _trigram_index(root, args):
+    """Índice de trigramas guardado en data/ (se crea o actualiza antes)"""
+    from core.project_index import ProjectIndex
+    from core.trigram_index import TrigramIndex
+
+    engine = get_ignore_engine(root, args.profile)
+    project = ProjectIndex(root, should_descend=engine.should_descend)
+    trigrams = TrigramIndex.load(root, ignore=engine)
+    if trigrams is None:
+        trigrams = TrigramIndex.from_project_index(project, ignore=engine)
+    else:
+        trigrams.sync(project)
+        trigrams.refresh()
+    if trigrams.version != trigrams.saved_version:
+        trigrams.save()
+    return trigrams
+
+
+def cmd_clean(args):
+    from core.limpmax_processor import LimpMaxConfig, LimpMaxProcessor
+
+    cfg = LimpMaxConfig(
+        project_root=args.root,
+        scope_mode="single" if args.file else "all",
+        single_file=args.file,
+        remove_prints=args.prints,
+        remove_comments=args.comments,
+        output_mode="mirror" if args.mirror else "overwrite",
+        output_dir=args.mirror,
+    )
+
+    def progress(payload):
+        if args.verbose:
+            print(f"{payload['done']}/{payload['total']}", file=sys.stderr)
+
+    try:
+        summary = LimpMaxProcessor().run(cfg, progress)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    _write_json(summary, args.output)
+    return 1 if summary["errors"] else 0
+
+
+# ── Argumentos ──────────────────────────────────────────────────────────
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m core",
+        description="Code Tools ++ sin interfaz: exportar, estadísticas, análisis y limpieza",
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_common(p):
+        p.add_argument("paths", nargs="*", default=["."], help="Carpetas o archivos (por defecto .)")
+        p.add_argument("-o", "--output", help="Archivo de salida (.gz comprimido); por defecto stdout")
+        p.add_argument("--profile", default="selection", choices=sorted(PROFILES),
+                       help="Perfil de ignore al recorrer carpetas")
+
+    p = sub.add_parser("export", help="Exportar archivos en Markdown/texto")
+    add_common(p)
+    p.add_argument("-f", "--format", default="llm", choices=EXPORT_FORMATS)
+    p.add_argument("--budget", type=int, default=100000, help="Tokens para --format llm-budget")
+    p.add_argument("--absolute", action="store_true", help="Rutas absolutas")
+    p.add_argument("--no-content", action="store_true", help="Solo encabezados (formato content)")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("stats", help="Estadísticas de líneas y tamaños")
+    add_common(p)
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--top", type=int, default=0, help="Incluir los N archivos con más líneas (JSON)")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("analyze", help="TODOs, complejidad y código duplicado")
+    add_common(p)
+    p.add_argument("--json", action="store_true")
+    p.add_argument("--todos", action="store_true")
+    p.add_argument("--complexity", action="store_true")
+    p.add_argument("--duplicates", action="store_true")
+    p.add_argument("--min-lines", type=int, default=5)
+    p.add_argument("--max-bucket", type=int, default=0,
+                   help="Apariciones de un bloque (o archivos de un cubo de --similar) a partir "
+                        "de las cuales solo se comparan vecinas (0 = exacto)")
+    p.add_argument("--similar", action="store_true",
+                   help="Agrupar archivos casi duplicados (MinHash/LSH)")
+    p.add_argument("--threshold", type=float, default=0.8,
+                   help="Similitud mínima para --similar (0-1)")
+    p.add_argument("--tags", help="Etiquetas extra además de TODO/FIXME/BUG (p.ej. HACK,XXX,NOTE)")
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("grep", help="Buscar texto o regex en el contenido de los archivos")
+    p.add_argument("pattern", help="Expresión regular (o texto con -F)")
+    add_common(p)
+    p.add_argument("-F", "--fixed-strings", action="store_true", help="Buscar texto literal")
+    p.add_argument("-i", "--ignore-case", action="store_true")
+    p.add_argument("-w", "--word-regexp", action="store_true", help="Solo palabras completas")
+    p.add_argument("-C", "--context", type=int, default=0, help="Líneas de contexto")
+    p.add_argument("--index", action="store_true",
+                   help="Acotar con el índice de trigramas persistente (data/trigram_index)")
+    p.set_defaults(func=cmd_grep)
+
+    p = sub.add_parser("clean", help="LimpMax: quitar comentarios y/o prints")
+    p.add_argument("root", help="Carpeta del proyecto")
+    p.add_argument("--file", help="Procesar solo este archivo")
+    p.add_argument("--comments", action="store_true")
+    p.add_argument("--prints", action="store_true")
+    p.add_argument("--mirror", help="Escribir en esta carpeta en lugar de sobrescribir")
+    p.add_argument("-o", "--output", help="Resumen JSON (por defecto stdout)")
+    p.add_argument("-v", "--verbose", action="store_true")
+    p.set_defaults(func=cmd_clean)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # p.ej. `python -m core export . | head`
+        sys.stderr.close()
+        return 0
@@ -0,0 +1,139 @@
+from collections import defaultdict, deque
+from itertools import chain, compress, repeat
+from operator import eq
+
+
+WINNOW_WINDOW = 4      # k-gramas por ventana de winnowing
+MAX_BUCKET = 16        # Límite sugerido de apariciones por huella para comparar todos los pares
+
+
+class CloneMap(dict):
+    """{(i, j): [(inicio_i, inicio_j, largo)]} más cuántas huellas superaron el límite.
+
+    Si `capped` > 0 el resultado puede estar incompleto: en esas huellas
+    solo se compararon apariciones vecinas.
+    """
+    capped = 0
+
+
+def _kgram_hashes(ids, k):
+    """Hash de cada ventana de k líneas consecutivas"""
+    if k == 1:
+        return list(map(hash, ids))
+    return list(map(hash, zip(*[ids[j:] for j in range(k)])))
+
+
+def winnow(hashes, w):
+    """Posiciones elegidas por winnowing: las que son mínimo de alguna ventana de w hashes.
+
+    Dos secuencias que comparten w k-gramas consecutivos comparten al
+    menos una huella elegida dentro de ese tramo. Todo el cálculo va en
+    map/compress (sin bucle Python por línea).
+    """
+    if len(hashes) < w:
+        return []
+    if w == 1:
+        return range(len(hashes))
+    minima = list(map(min, zip(*[hashes[j:] for j in range(w)])))
+    windows = len(minima)
+    return set(chain.from_iterable(
+        compress(range(offset, offset + windows), map(eq, hashes[offset:], minima))
+        for offset in range(w)
+    ))
+
+
+def find_clones(sequences, min_lines, window=WINNOW_WINDOW, max_bucket=None):
+    """Bloques idénticos de al menos `min_lines` líneas entre secuencias distintas.
+
+    `sequences` son listas de líneas ya normalizadas (hashables); None marca
+    una línea que corta cualquier bloque. En una sola pasada se eligen
+    huellas de k-gramas por winnowing (k = min_lines - w + 1, así ningún
+    bloque de min_lines queda sin huella común) en un índice global
+    huella -> ubicaciones; cada coincidencia se extiende en ambos sentidos
+    comparando las líneas hasta el bloque máximo. Retorna
+    {(i, j): [(inicio_i, inicio_j, largo)]} con i < j, posiciones 0-based
+    dentro de cada secuencia.
+
+    Sin `max_bucket` se comparan todos los pares de apariciones de cada huella
+    (mismo resultado que comparar bloque a bloque). Con él, las huellas con
+    más apariciones (cabeceras de licencia, boilerplate) solo emparejan cada
+    aparición con la siguiente en orden (archivo, línea): cada copia se
+    reporta al menos junto a su vecina y CloneMap.capped lo indica.
+    """
+    min_lines = max(1, min_lines)
+    w = max(1, min(window, (min_lines + 1) // 2))  # k >= w: k-gramas poco comunes
+    k = min_lines - w + 1
+
+    index = defaultdict(list)
+    for file_no, seq in enumerate(sequences):
+        for run_start, run in _runs(seq, min_lines):
+            hashes = _kgram_hashes(list(map(hash, run)), k)
+            chosen = winnow(hashes, w)
+            # Equivale a `index[hashes[p]].append((file_no, run_start + p))` para cada p
+            deque(map(list.append,
+                      map(index.__getitem__, map(hashes.__getitem__, chosen)),
+                      zip(repeat(file_no), map(run_start.__add__, chosen))), maxlen=0)
+
+    clones = CloneMap()
+    covered = {}  # (i, j, diagonal) -> [(inicio_i, fin_i)] ya reportados
+    for locations in index.values():
+        if len(locations) < 2:
+            continue
+        if max_bucket and len(locations) > max_bucket:
+            clones.capped += 1
+            locations.sort()
+            pairs = zip(locations, locations[1:])
+        else:
+            pairs = ((a, b) for n, a in enumerate(locations) for b in locations[n + 1:])
+        for (fa, pa), (fb, pb) in pairs:
+            if fa == fb:
+                continue
+            if fa > fb:
+                fa, pa, fb, pb = fb, pb, fa, pa
+            key = (fa, fb, pa - pb)
+            spans = covered.get(key)
+            if spans and any(start <= pa < end for start, end in spans):
+                continue
+            block = _extend(sequences[fa], sequences[fb], pa, pb)
+            if block is None:
+                continue  # Colisión de hash
+            start_a, start_b, length = block
+            covered.setdefault(key, []).append((start_a, start_a + length))
+            if length >= min_lines:
+                clones.setdefault((fa, fb), []).append(block)
+
+    for blocks in clones.values():
+        blocks.sort()
+    return clones
+
+
+def _runs(seq, min_length):
+    """Tramos sin None de al menos `min_length` líneas: (inicio, líneas)"""
+    if None not in seq:
+        if len(seq) >= min_length:
+            yield 0, seq
+        return
+    start = 0
+    n = len(seq)
+    while start < n:
+        while start < n and seq[start] is None:
+            start += 1
+        end = start
+        while end < n and seq[end] is not None:
+            end += 1
+        if end - start >= min_length:
+            yield start, seq[start:end]
+        start = end
+
+
+def _extend(a, b, pa, pb):
+    if a[pa] is None or a[pa] != b[pb]:
+        return None
+    while pa > 0 and pb > 0 and a[pa - 1] is not None and a[pa - 1] == b[pb - 1]:
+        pa -= 1
+        pb -= 1
+    length = 0
+    while pa + length < len(a) and pb + length < len(b) \
+            and a[pa + length] is not None and a[pa + length] == b[pb + length]:
+        length += 1
+    return pa, pb, length
@@ -1,80 +1,34 @@
 import os
-import re
 from collections import defaultdict
-from utils.helpers import is_text_file, safe_read_file
+from core.clone_detector import find_clones
+from core.file_classifier import is_text_file
+from core.near_duplicates import DEFAULT_THRESHOLD, find_near_duplicates
+from core.todo_scanner import DEFAULT_TAGS, TodoScanner, normalize_tags
+from utils.helpers import safe_read_file
 
 class CodeAnalyzer:
     """Analiza código para detectar TODOs, duplicados, métricas, etc."""
     
-    def __init__(self):
-        self.todo_patterns = [
-            r'#\s*TODO:?\s*(.+)',
-            r'//\s*TODO:?\s*(.+)',
-            r'/\*\s*TODO:?\s*(.+)\s*\*/',
-            r'<!--\s*TODO:?\s*(.+)\s*-->',
-        ]
-        
-        self.fixme_patterns = [
-            r'#\s*FIXME:?\s*(.+)',
-            r'//\s*FIXME:?\s*(.+)',
-            r'/\*\s*FIXME:?\s*(.+)\s*\*/',
-            r'<!--\s*FIXME:?\s*(.+)\s*-->',
-        ]
-        
-        self.bug_patterns = [
-            r'#\s*BUG:?\s*(.+)',
-            r'//\s*BUG:?\s*(.+)',
-            r'/\*\s*BUG:?\s*(.+)\s*\*/',
-            r'<!--\s*BUG:?\s*(.+)\s*-->',
-        ]
+    def __init__(self, todo_tags=None):
+        # TODO/FIXME/BUG más las etiquetas propias (HACK, XXX, NOTE...) en una sola regex
+        self.todo_scanner = TodoScanner(DEFAULT_TAGS + normalize_tags(todo_tags))
+        # Apariciones por huella (o firmas por cubo LSH) a partir de las cuales
+        # solo se comparan vecinas (None = todas)
+        self.clone_max_bucket = None
+        self.duplicates_capped = 0
+        self.near_duplicates_capped = 0
+    
+    def set_clone_max_bucket(self, max_bucket):
+        """Límite de apariciones por huella o cubo en la detección de duplicados (0 o None = exacto)"""
+        self.clone_max_bucket = max_bucket or None
+    
+    def set_todo_tags(self, extra_tags):
+        """Añade etiquetas propias a las predeterminadas (recompila el escáner)"""
+        self.todo_scanner = TodoScanner(DEFAULT_TAGS + normalize_tags(extra_tags))
     
     def find_todos_in_file(self, filepath):
-        """Encuentra TODOs, FIXMEs y BUGs en un archivo"""
-        if not is_text_file(filepath):
-            return []
-        
-        content, error = safe_read_file(filepath)
-        if error:
-            return []
-        
-        findings = []
-        lines = content.split('\n')
-        
-        for line_num, line in enumerate(lines, 1):
-            # Buscar TODOs
-            for pattern in self.todo_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    findings.append({
-                        'type': 'TODO',
-                        'line': line_num,
-                        'text': match.group(1).strip(),
-                        'full_line': line.strip()
-                    })
-            
-            # Buscar FIXMEs
-            for pattern in self.fixme_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    findings.append({
-                        'type': 'FIXME',
-                        'line': line_num,
-                        'text': match.group(1).strip(),
-                        'full_line': line.strip()
-                    })
-            
-            # Buscar BUGs
-            for pattern in self.bug_patterns:
-                match = re.search(pattern, line, re.IGNORECASE)
-                if match:
-                    findings.append({
-                        'type': 'BUG',
-                        'line': line_num,
-                        'text': match.group(1).strip(),
-                        'full_line': line.strip()
-                    })
-        
-        return findings
+        """Encuentra TODOs, FIXMEs, BUGs y etiquetas propias en un archivo"""
+        return self.todo_scanner.scan_file(filepath)
     
     def find_todos_in_files(self, filepaths):
         """Encuentra TODOs en múltiples archivos"""
@@ -86,8 +40,11 @@ class CodeAnalyzer:
         return all_findings
     
     def detect_duplicate_code(self, filepaths, min_lines=5):
-        """Detecta código duplicado entre archivos"""
-        # Implementación simplificada - busca bloques de líneas idénticas
+        """Detecta código duplicado entre archivos
+
+        Con `clone_max_bucket` el resultado puede omitir pares de copias muy
+        repetidas; `duplicates_capped` indica cuántas huellas se limitaron.
+        """
         duplicates = []
         
         file_contents = {}
@@ -102,52 +59,36 @@ class CodeAnalyzer:
                         and not line.strip().startswith('//')]
                 file_contents[filepath] = lines
         
-        # Comparar archivos
+        # Bloques comunes entre todos los pares en una sola pasada (winnowing)
         files = list(file_contents.keys())
-        for i in range(len(files)):
-            for j in range(i + 1, len(files)):
-                file1, file2 = files[i], files[j]
-                lines1, lines2 = file_contents[file1], file_contents[file2]
-                
-                # Buscar bloques comunes
-                common_blocks = self._find_common_blocks(lines1, lines2, min_lines)
-                if common_blocks:
-                    duplicates.append({
-                        'file1': file1,
-                        'file2': file2,
-                        'blocks': common_blocks
-                    })
+        sequences = [file_contents[f] for f in files]
+        clones = find_clones(sequences, min_lines, max_bucket=self.clone_max_bucket)
+        self.duplicates_capped = clones.capped
+        for (i, j), blocks in sorted(clones.items()):
+            lines1 = sequences[i]
+            duplicates.append({
+                'file1': files[i],
+                'file2': files[j],
+                'blocks': [{
+                    'lines': count,
+                    'start1': start1,
+                    'start2': start2,
+                    'content': lines1[start1:start1 + count]
+                } for start1, start2, count in blocks]
+            })
         
         return duplicates
     
-    def _find_common_blocks(self, lines1, lines2, min_lines):
-        """Encuentra bloques de líneas comunes"""
-        blocks = []
-        i = 0
-        while i < len(lines1):
-            j = 0
-            while j < len(lines2):
-                # Contar líneas consecutivas iguales
-                count = 0
-                while (i + count < len(lines1) and 
-                       j + count < len(lines2) and 
-                       lines1[i + count] == lines2[j + count]):
-                    count += 1
-                
-                if count >= min_lines:
-                    blocks.append({
-                        'lines': count,
-                        'start1': i,
-                        'start2': j,
-                        'content': lines1[i:i+count]
-                    })
-                    i += count
-                    j += count
-                else:
-                    j += 1
-            i += 1
-        
-        return blocks
+    def detect_near_duplicates(self, filepaths, threshold=DEFAULT_THRESHOLD, on_progress=None):
+        """Agrupa archivos casi iguales (copiados y retocados) por similitud MinHash
+
+        Con `clone_max_bucket` puede omitir pares de cubos LSH muy grandes;
+        `near_duplicates_capped` indica cuántos se limitaron.
+        """
+        groups = find_near_duplicates(filepaths, threshold, on_progress=on_progress,
+                                      max_bucket=self.clone_max_bucket)
+        self.near_duplicates_capped = groups.capped
+        return groups
     
     def get_file_metrics(self, filepath):
         """Obtiene métricas de un archivo"""
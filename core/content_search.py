@@ -0,0 +1,381 @@
+import os
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from core.file_classifier import SNIFF_SIZE, classify_by_name
+
+
+CHUNK_FILES = 64                     # Archivos por tarea del pool
+CHUNK_BYTES = 8 * 1024 * 1024        # ... o bytes, lo que llegue antes
+MAX_FILE_SIZE = 32 * 1024 * 1024     # Archivos más grandes no se buscan
+MAX_MATCHES_PER_FILE = 1000
+MAX_LINE_CHARS = 400                 # Las líneas enormes (minificados) se recortan
+
+_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+
+
+@dataclass
+class ContentQuery:
+    """Consulta de contenido (literal o regex, como grep)"""
+    pattern: str
+    regex: bool = False
+    case_sensitive: bool = False
+    whole_word: bool = False
+    context: int = 0  # Líneas de contexto antes y después
+
+    def compile(self):
+        """(patrón bytes, flags, literal obligatorio para el prefiltro, prefiltro en minúsculas)"""
+        source = self.pattern if self.regex else re.escape(self.pattern)
+        if self.whole_word:
+            source = rf"\b(?:{source})\b"
+        flags = 0 if self.case_sensitive else re.IGNORECASE
+        pattern = source.encode("utf-8")
+        re.compile(pattern, flags)  # Valida antes de repartir trabajo (lanza re.error)
+
+        literal = self.pattern if not self.regex else _required_literal(self.pattern, flags)
+        lowered = not self.case_sensitive
+        if literal and lowered and not literal.isascii():
+            literal = None  # bytes.lower() solo pliega ASCII
+        prefilter = None
+        if literal:
+            prefilter = literal.encode("utf-8")
+            if lowered:
+                prefilter = prefilter.lower()
+        return pattern, flags, prefilter, lowered
+
+
+@dataclass
+class ContentMatch:
+    """Línea que coincide, con columnas de la primera coincidencia y contexto"""
+    path: str
+    line: int    # 1-based
+    text: str
+    start: int   # Columna (caracteres) de inicio en `text`
+    end: int
+    before: list = field(default_factory=list)  # [(línea, texto)]
+    after: list = field(default_factory=list)
+
+
+# ── Prefiltro ───────────────────────────────────────────────────────────
+
+def _required_literal(pattern, flags=0):
+    """Literal más largo que toda coincidencia de la regex debe contener.
+
+    Recorre el árbol de sre_parse en la secuencia principal (los grupos se
+    aplanan); alternativas, repeticiones opcionales y clases cortan la
+    secuencia. Retorna None si no hay ninguno útil.
+    """
+    try:
+        parsed = sre_parse.parse(pattern, flags)
+    except re.error:
+        return None
+    if parsed.state.flags & re.IGNORECASE and not flags & re.IGNORECASE:
+        return None  # (?i) dentro del patrón: el prefiltro exacto no sirve
+    best = ""
+    run = []
+
+    def flush():
+        nonlocal best
+        literal = "".join(run)
+        if len(literal) > len(best):
+            best = literal
+        run.clear()
+
+    def visit(items):
+        for op, value in items:
+            if op is sre_parse.LITERAL:
+                run.append(chr(value))
+            elif op is sre_parse.SUBPATTERN and value[1] == 0 and value[2] == 0:
+                visit(value[-1])  # Grupo sin flags propios: parte de la secuencia
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and value[0] >= 1:
+                flush()
+                visit(value[2])  # Al menos una vez: su contenido es obligatorio
+                flush()
+            elif op is sre_parse.AT:
+                continue  # Anclas (^, $, \b) no consumen texto
+            else:
+                flush()
+
+    visit(parsed)
+    flush()
+    return best if len(best) >= 2 else None
+
+
+# ── Búsqueda (se ejecuta en los procesos del pool) ──────────────────────
+
+_compiled = {}
+
+
+def _compile_cached(pattern, flags):
+    key = (pattern, flags)
+    regex = _compiled.get(key)
+    if regex is None:
+        if len(_compiled) > 32:
+            _compiled.clear()
+        regex = _compiled[key] = re.compile(pattern, flags)
+    return regex
+
+
+def _decode(raw):
+    text = raw.decode("utf-8", "replace").rstrip("\r")
+    return text[:MAX_LINE_CHARS]
+
+
+def scan_buffer(buf, regex, context=0, max_matches=MAX_MATCHES_PER_FILE):
+    """Coincidencias de `regex` en un buffer: [(línea, texto, inicio, fin, antes, después)].
+
+    Una entrada por línea (la primera coincidencia); los números de línea se
+    calculan contando saltos entre coincidencias, sin partir el buffer.
+    """
+    results = []
+    line_no = 1
+    counted_to = 0
+    next_free = 0  # Inicio de la primera línea aún no reportada
+    for match in regex.finditer(buf):
+        pos = match.start()
+        if pos < next_free:
+            continue
+        line_no += buf.count(b"\n", counted_to, pos)
+        counted_to = pos
+        line_start = buf.rfind(b"\n", 0, pos) + 1
+        line_end = buf.find(b"\n", pos)
+        if line_end < 0:
+            line_end = len(buf)
+        prefix = buf[line_start:pos].decode("utf-8", "replace")
+        matched = buf[pos:min(match.end(), line_end)].decode("utf-8", "replace")
+
+        before = []
+        start = line_start
+        for offset in range(1, context + 1):
+            if start == 0:
+                break
+            prev_start = buf.rfind(b"\n", 0, start - 1) + 1
+            before.append((line_no - offset, _decode(buf[prev_start:start - 1])))
+            start = prev_start
+        before.reverse()
+
+        after = []
+        end = line_end
+        for offset in range(1, context + 1):
+            if end >= len(buf):
+                break
+            next_end = buf.find(b"\n", end + 1)
+            if next_end < 0:
+                next_end = len(buf)
+            if next_end == end + 1 and next_end == len(buf):
+                break
+            after.append((line_no + offset, _decode(buf[end + 1:next_end])))
+            end = next_end
+
+        results.append((line_no, _decode(buf[line_start:line_end]),
+                        len(prefix), len(prefix) + len(matched), before, after))
+        if len(results) >= max_matches:
+            break
+        next_free = line_end + 1
+    return results
+
+
+def read_file(path, max_size=MAX_FILE_SIZE):
+    """Contenido completo con os.read (sin capa de buffering); None si no se puede o es enorme"""
+    try:
+        fd = os.open(path, _OPEN_FLAGS)
+    except OSError:
+        return None
+    try:
+        size = os.fstat(fd).st_size
+        if size > max_size:
+            return None
+        data = os.read(fd, size + 1)
+        while len(data) < size:
+            more = os.read(fd, size - len(data))
+            if not more:
+                break
+            data += more
+        return data
+    except OSError:
+        return None
+    finally:
+        os.close(fd)
+
+
+def search_files(paths, pattern, flags, prefilter=None, lowered=False, context=0):
+    """Busca en una tanda de archivos: [(ruta, coincidencias de scan_buffer)]
+
+    El literal obligatorio descarta la mayoría de archivos con una búsqueda
+    de bytes antes de ejecutar la regex; los binarios (NUL en el prefijo) se
+    detectan solo en los que pasan el prefiltro.
+    """
+    regex = _compile_cached(pattern, flags)
+    found = []
+    for path in paths:
+        buf = read_file(path)
+        if not buf:
+            continue
+        if prefilter is not None and prefilter not in (buf.lower() if lowered else buf):
+            continue
+        if b"\0" in buf[:SNIFF_SIZE]:
+            continue
+        matches = scan_buffer(buf, regex, context)
+        if matches:
+            found.append((path, matches))
+    return found
+
+
+# ── Motor ───────────────────────────────────────────────────────────────
+
+SEARCH_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_search_pool():
+    """Pool de procesos compartido (se crea al primer uso)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=SEARCH_WORKERS)
+        return _pool
+
+
+def shutdown_search_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _chunks(paths, size_of):
+    chunk = []
+    chunk_bytes = 0
+    for path in paths:
+        chunk.append(path)
+        chunk_bytes += size_of(path)
+        if len(chunk) >= CHUNK_FILES or chunk_bytes >= CHUNK_BYTES:
+            yield chunk
+            chunk = []
+            chunk_bytes = 0
+    if chunk:
+        yield chunk
+
+
+class ContentSearch:
+    """Búsqueda de contenido en segundo plano repartida en un pool de procesos.
+
+    `files` es un iterable de rutas (puede ser perezoso, p.ej. un recorrido
+    del proyecto): se reparten en tandas mientras se enumeran. Como en
+    FilenameSearch, `on_batch([ContentMatch])` y `on_done(total, cancelada)`
+    llegan desde el hilo coordinador. Cancelar deja de repartir tandas y
+    descarta las pendientes; las que ya están en un proceso terminan solas.
+    """
+
+    def __init__(self, files, query, on_batch, on_done=None, size_of=None, use_processes=None):
+        self.files = files
+        self.query = query
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.size_of = size_of or (lambda path: 0)
+        # None: procesos solo si hay más de una tanda y más de un núcleo
+        self.use_processes = use_processes
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        """Ejecuta la búsqueda en el hilo actual (CLI)"""
+        self._run()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _run(self):
+        total = 0
+        try:
+            pattern, flags, prefilter, lowered = self.query.compile()
+            args = (pattern, flags, prefilter, lowered, self.query.context)
+            chunks = _chunks(self._iter_files(), self.size_of)
+            first = next(chunks, None)
+            if first is not None:
+                second = next(chunks, None)
+                parallel = self.use_processes
+                if parallel is None:
+                    parallel = second is not None and SEARCH_WORKERS > 1
+                pending = [first] + ([second] if second is not None else [])
+                if parallel:
+                    total = self._run_pool(pending, chunks, args)
+                else:
+                    total = self._run_inline(pending, chunks, args)
+        except Exception as e:
+            print(f"Error in content search: {e}")
+        if self.on_done is not None:
+            self.on_done(total, self.cancelled)
+
+    def _iter_files(self):
+        for path in self.files:
+            if self._cancelled.is_set():
+                return
+            if classify_by_name(path) is not False:
+                yield path
+
+    def _run_inline(self, pending, chunks, args):
+        total = 0
+        for chunk in _chain(pending, chunks):
+            if self._cancelled.is_set():
+                break
+            total += self._emit(search_files(chunk, *args))
+        return total
+
+    def _run_pool(self, pending, chunks, args):
+        pool = get_search_pool()
+        max_in_flight = 2 * SEARCH_WORKERS
+        in_flight = set()
+        total = 0
+        source = _chain(pending, chunks)
+        exhausted = False
+        while not self._cancelled.is_set():
+            while not exhausted and len(in_flight) < max_in_flight:
+                chunk = next(source, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                in_flight.add(pool.submit(search_files, chunk, *args))
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, timeout=0.1, return_when=FIRST_COMPLETED)
+            for future in done:
+                if not self._cancelled.is_set():
+                    total += self._emit(future.result())
+        for future in in_flight:
+            future.cancel()
+        return total
+
+    def _emit(self, found):
+        batch = [
+            ContentMatch(path, line, text, start, end, before, after)
+            for path, matches in found
+            for line, text, start, end, before, after in matches
+        ]
+        if batch and not self._cancelled.is_set():
+            self.on_batch(batch)
+        return len(batch)
+
+
+def _chain(first, rest):
+    yield from first
+    yield from rest
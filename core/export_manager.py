@@ -1,63 +1,268 @@
 import os
-import pyperclip
-from utils.helpers import safe_read_file, get_relative_path
+from utils.helpers import format_file_size, get_relative_path
+from core.export_sinks import ClipboardSink, open_file_sink
+from core.prefetch_reader import PrefetchReader
+from core.llm_packer import DEFAULT_TOKEN_BUDGET, FULL, SIGNATURES, TRUNCATED, LLMPacker
 
 class ExportManager:
-    """Gestiona la exportación de archivos seleccionados en diferentes formatos"""
+    """Gestiona la exportación de archivos seleccionados en diferentes formatos
+    
+    Cada formato es un generador de trozos de texto que se escribe en un sink
+    (archivo, gzip o portapapeles con límite), así la memoria no depende del
+    tamaño de la selección.
+    """
+    
+    MAX_FILE_SIZE = 10 * 1024 * 1024  # Igual que safe_read_file
+    READ_CHUNK = 1024 * 1024
+    # Lectura anticipada: archivos pequeños en paralelo, con tope de memoria
+    PREFETCH_MAX_FILE = 1024 * 1024
+    PREFETCH_BUDGET = 16 * 1024 * 1024
+    PREFETCH_WORKERS = 8
     
     def __init__(self, file_manager):
         self.file_manager = file_manager
+        self.last_pack = None  # PackResult de la última exportación con presupuesto
     
-    def export_to_clipboard(self, filepaths, use_relative_paths=True, include_content=True):
-        """Exporta archivos al portapapeles"""
-        output = []
+    # ── Streaming ───────────────────────────────────────────────────────
+    
+    @staticmethod
+    def _join_lines(elements):
+        """Equivalente en streaming a '\\n'.join(elements).
         
-        for filepath in filepaths:
-            if not os.path.isfile(filepath):
-                continue
-            
-            # Obtener ruta
-            if use_relative_paths and self.file_manager.root_path:
-                path_to_show = get_relative_path(filepath, self.file_manager.root_path)
+        Cada elemento es un str o un iterable de trozos (contenido de archivo).
+        """
+        first = True
+        for element in elements:
+            if not first:
+                yield "\n"
+            first = False
+            if isinstance(element, str):
+                yield element
             else:
-                path_to_show = filepath
-            
-            output.append(f"{'='*60}")
-            output.append(f"FILE: {path_to_show}")
-            output.append(f"{'='*60}")
+                yield from element
+    
+    def _read_file_chunks(self, filepath):
+        """Contenido del archivo por trozos: (primer_trozo, resto, error)
+        
+        Se lee el primer trozo por adelantado para saber si está vacío.
+        """
+        try:
+            file_size = os.path.getsize(filepath)
+            if file_size > self.MAX_FILE_SIZE:
+                return "", None, f"Archivo demasiado grande ({format_file_size(file_size)})"
+            f = open(filepath, 'r', encoding='utf-8', errors='ignore')
+        except Exception as e:
+            return "", None, str(e)
+        try:
+            first = f.read(self.READ_CHUNK)
+        except Exception as e:
+            f.close()
+            return "", None, str(e)
+        
+        def rest():
+            with f:
+                while True:
+                    chunk = f.read(self.READ_CHUNK)
+                    if not chunk:
+                        break
+                    yield chunk
+        
+        if not first:
+            f.close()
+            return "", None, None
+        return first, rest(), None
+    
+    def _prefetch_file(self, filepath):
+        """Lectura anticipada (hilo del pool): None si no existe o es grande"""
+        try:
+            if not os.path.isfile(filepath) or os.path.getsize(filepath) > self.PREFETCH_MAX_FILE:
+                return None
+            with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+                return f.read()
+        except Exception:
+            return None  # Se reintenta en orden para reportar el error igual que antes
+    
+    def _prefetch_size(self, filepath):
+        try:
+            size = os.path.getsize(filepath)
+        except OSError:
+            return 0
+        return size if size <= self.PREFETCH_MAX_FILE else 0
+    
+    def _iter_contents(self, filepaths, include_content=True):
+        """(ruta, primer_trozo, resto, error) de los archivos existentes, en orden
+        
+        Los archivos pequeños llegan ya leídos por el PrefetchReader; los
+        grandes se leen por trozos al llegar su turno.
+        """
+        if not include_content:
+            for filepath in filepaths:
+                if os.path.isfile(filepath):
+                    yield filepath, "", None, None
+            return
+        reader = PrefetchReader(
+            self._prefetch_file,
+            workers=self.PREFETCH_WORKERS,
+            max_bytes=self.PREFETCH_BUDGET,
+            size_fn=self._prefetch_size,
+        )
+        for filepath, content in reader.iter(filepaths):
+            if content is not None:
+                yield filepath, content, iter(()), None
+            elif os.path.isfile(filepath):
+                yield (filepath, *self._read_file_chunks(filepath))
+    
+    @staticmethod
+    def _content_element(first, rest, before="", after=""):
+        yield before + first
+        yield from rest
+        if after:
+            yield after
+    
+    def _display_path(self, filepath, use_relative_paths=True):
+        if use_relative_paths and self.file_manager.root_path:
+            return get_relative_path(filepath, self.file_manager.root_path)
+        return filepath
+    
+    def iter_content_export(self, filepaths, use_relative_paths=True, include_content=True):
+        """Trozos del formato 'con contenido'"""
+        return self._join_lines(self._content_elements(filepaths, use_relative_paths, include_content))
+    
+    def _content_elements(self, filepaths, use_relative_paths, include_content):
+        for filepath, first, rest, error in self._iter_contents(filepaths, include_content):
+            path_to_show = self._display_path(filepath, use_relative_paths)
+            yield f"{'='*60}"
+            yield f"FILE: {path_to_show}"
+            yield f"{'='*60}"
             
             if include_content:
-                content, error = safe_read_file(filepath)
-                if content:
-                    output.append(content)
+                if first:
+                    yield self._content_element(first, rest)
                 elif error:
-                    output.append(f"[Error reading file: {error}]")
+                    yield f"[Error reading file: {error}]"
             
-            output.append("")  # Línea en blanco entre archivos
+            yield ""  # Línea en blanco entre archivos
+    
+    def iter_paths_export(self, filepaths, use_relative_paths=True):
+        """Trozos del formato 'solo rutas'"""
+        return self._join_lines(self._display_path(fp, use_relative_paths) for fp in filepaths)
+    
+    def iter_llm_export(self, filepaths):
+        """Trozos del formato para LLMs"""
+        return self._join_lines(self._llm_elements(filepaths))
+    
+    def _llm_elements(self, filepaths):
+        yield "# Project Files"
+        yield ""
+        
+        if self.file_manager.root_path:
+            yield f"Root: {self.file_manager.root_path}"
+            yield ""
         
-        result = '\n'.join(output)
-        pyperclip.copy(result)
-        return result
+        for filepath, first, rest, error in self._iter_contents(filepaths):
+            relpath = self.file_manager.get_relative_path(filepath)
+            yield f"## File: `{relpath}`"
+            yield ""
+            
+            if first:
+                ext = os.path.splitext(filepath)[1].lstrip('.')
+                yield self._content_element(first, rest, before=f"```{ext if ext else 'text'}\n", after="\n```")
+            elif error:
+                yield f"*Error: {error}*"
+            
+            yield ""
     
-    def export_paths_only(self, filepaths, use_relative_paths=True):
-        """Exporta solo las rutas de los archivos"""
-        output = []
+    def iter_packed_llm_export(self, filepaths, budget=DEFAULT_TOKEN_BUDGET):
+        """Trozos del formato para LLMs limitado a `budget` tokens, con manifiesto"""
+        filepaths = list(filepaths)
+        pack = LLMPacker(index=self.file_manager.get_index()).pack(filepaths, budget)
+        self.last_pack = pack
+        return self._join_lines(self._packed_llm_elements(filepaths, pack))
+    
+    def _packed_llm_elements(self, filepaths, pack):
+        order = {fp: i for i, fp in enumerate(filepaths)}
+        entries = sorted(pack.entries, key=lambda e: order.get(e.path, 0))
+        limits = {e.path: e.max_chars for e in entries if e.status == TRUNCATED}
+        content_paths = [e.path for e in entries if e.status in (FULL, TRUNCATED)]
         
-        for filepath in filepaths:
-            if use_relative_paths and self.file_manager.root_path:
-                path_to_show = get_relative_path(filepath, self.file_manager.root_path)
-            else:
-                path_to_show = filepath
-            output.append(path_to_show)
+        yield "# Project Files"
+        yield ""
+        
+        if self.file_manager.root_path:
+            yield f"Root: {self.file_manager.root_path}"
+            yield ""
+        
+        yield from pack.manifest_lines(self.file_manager.get_relative_path)
+        
+        for filepath, first, rest, error in self._iter_contents(content_paths):
+            relpath = self.file_manager.get_relative_path(filepath)
+            ext = os.path.splitext(filepath)[1].lstrip('.') or 'text'
+            yield f"## File: `{relpath}`"
+            yield ""
+            
+            if first and filepath in limits:
+                text = self._take_chars(first, rest, limits[filepath])
+                yield f"```{ext}\n{text}\n```"
+                yield "*[truncated to fit the token budget]*"
+            elif first:
+                yield self._content_element(first, rest, before=f"```{ext}\n", after="\n```")
+            elif error:
+                yield f"*Error: {error}*"
+            
+            yield ""
         
-        result = '\n'.join(output)
-        pyperclip.copy(result)
-        return result
+        for entry in entries:
+            if entry.status != SIGNATURES:
+                continue
+            relpath = self.file_manager.get_relative_path(entry.path)
+            ext = os.path.splitext(entry.path)[1].lstrip('.') or 'text'
+            yield f"## Signatures: `{relpath}`"
+            yield ""
+            yield f"```{ext}\n{entry.summary}\n```"
+            yield ""
+    
+    @staticmethod
+    def _take_chars(first, rest, max_chars):
+        """Primeros `max_chars` caracteres sin leer el resto del archivo"""
+        parts = [first[:max_chars]]
+        taken = len(parts[0])
+        for chunk in rest:
+            if taken >= max_chars:
+                break
+            parts.append(chunk[:max_chars - taken])
+            taken += len(parts[-1])
+        if hasattr(rest, "close"):
+            rest.close()
+        return "".join(parts)
+    
+    def write_to_sink(self, chunks, sink):
+        """Vuelca un generador de trozos en un sink y lo cierra"""
+        with sink:
+            for chunk in chunks:
+                sink.write(chunk)
+        return sink
+    
+    def _copy(self, chunks):
+        return self.write_to_sink(chunks, ClipboardSink()).text
+    
+    # ── Formatos ────────────────────────────────────────────────────────
+    
+    def export_to_clipboard(self, filepaths, use_relative_paths=True, include_content=True):
+        """Exporta archivos al portapapeles"""
+        return self._copy(self.iter_content_export(filepaths, use_relative_paths, include_content))
+    
+    def export_paths_only(self, filepaths, use_relative_paths=True):
+        """Exporta solo las rutas de los archivos"""
+        return self._copy(self.iter_paths_export(filepaths, use_relative_paths))
     
     def export_with_tree_structure(self, filepaths):
         """Exporta con estructura de árbol"""
+        return self._copy(self.iter_tree_export(filepaths))
+    
+    def iter_tree_export(self, filepaths):
+        """Trozos del formato árbol (la estructura es pequeña: se arma en memoria)"""
         if not self.file_manager.root_path:
-            return self.export_paths_only(filepaths)
+            return self.iter_paths_export(filepaths)
         
         # Organizar por estructura de carpetas
         tree = {}
@@ -84,9 +289,7 @@ class ExportManager:
         output.append("=" * 60)
         self._build_tree_string(tree, output, "", True)
         
-        result = '\n'.join(output)
-        pyperclip.copy(result)
-        return result
+        return iter(['\n'.join(output)])
     
     def _build_tree_string(self, tree, output, prefix, is_last):
         """Construye string con formato de árbol"""
@@ -112,52 +315,26 @@ class ExportManager:
     
     def export_for_llm(self, filepaths):
         """Exporta optimizado para LLMs (con contexto claro)"""
-        output = []
-        output.append("# Project Files")
-        output.append("")
-        
-        if self.file_manager.root_path:
-            output.append(f"Root: {self.file_manager.root_path}")
-            output.append("")
-        
-        for filepath in filepaths:
-            if not os.path.isfile(filepath):
-                continue
-            
-            relpath = self.file_manager.get_relative_path(filepath)
-            output.append(f"## File: `{relpath}`")
-            output.append("")
-            
-            content, error = safe_read_file(filepath)
-            if content:
-                ext = os.path.splitext(filepath)[1].lstrip('.')
-                output.append(f"```{ext if ext else 'text'}")
-                output.append(content)
-                output.append("```")
-            elif error:
-                output.append(f"*Error: {error}*")
-            
-            output.append("")
-        
-        result = '\n'.join(output)
-        pyperclip.copy(result)
-        return result
+        return self._copy(self.iter_llm_export(filepaths))
+    
+    def export_for_llm_budget(self, filepaths, budget=DEFAULT_TOKEN_BUDGET):
+        """Exporta para LLMs respetando un presupuesto de tokens"""
+        return self._copy(self.iter_packed_llm_export(filepaths, budget))
     
     def export_to_file(self, filepaths, output_path, format='markdown'):
-        """Exporta a un archivo"""
+        """Exporta a un archivo (.gz comprimido) sin pasar por el portapapeles"""
         if format == 'markdown':
-            content = self.export_for_llm(filepaths)
+            chunks = self.iter_llm_export(filepaths)
         elif format == 'tree':
-            content = self.export_with_tree_structure(filepaths)
+            chunks = self.iter_tree_export(filepaths)
         elif format == 'paths':
-            content = self.export_paths_only(filepaths)
+            chunks = self.iter_paths_export(filepaths)
         else:
-            content = self.export_to_clipboard(filepaths)
+            chunks = self.iter_content_export(filepaths)
         
         try:
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            self.write_to_sink(chunks, open_file_sink(output_path))
             return True
         except Exception as e:
             print(f"Error exporting to file: {e}")
-            return False
\ No newline at end of file
+            return False
@@ -0,0 +1,105 @@
+import gzip
+import io
+
+
+class ExportSink:
+    """Destino de una exportación en streaming: recibe el texto por trozos"""
+
+    def write(self, chunk):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+class FileSink(ExportSink):
+    """Escribe directamente en un archivo de texto UTF-8"""
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self._file = open(path, "w", encoding=encoding)
+
+    def write(self, chunk):
+        self._file.write(chunk)
+
+    def close(self):
+        self._file.close()
+
+
+class GzipSink(ExportSink):
+    """Escribe comprimido con gzip (para exportaciones muy grandes)"""
+
+    def __init__(self, path, encoding="utf-8", compresslevel=6):
+        self.path = path
+        self._file = gzip.open(path, "wt", encoding=encoding, compresslevel=compresslevel)
+
+    def write(self, chunk):
+        self._file.write(chunk)
+
+    def close(self):
+        self._file.close()
+
+
+class ClipboardSink(ExportSink):
+    """Acumula hasta `max_chars` y lo copia al portapapeles al cerrar.
+
+    Si la exportación no cabe, se corta y se añade un aviso al final para
+    no agotar la memoria ni colgar el portapapeles del sistema.
+    """
+
+    DEFAULT_MAX_CHARS = 32 * 1024 * 1024
+    TRUNCATED_NOTICE = "\n\n[... export truncated: clipboard limit reached ...]"
+
+    def __init__(self, max_chars=None):
+        self.max_chars = max_chars or self.DEFAULT_MAX_CHARS
+        self.truncated = False
+        self.text = ""
+        self._buffer = io.StringIO()
+        self._size = 0
+
+    def write(self, chunk):
+        if self.truncated:
+            return
+        room = self.max_chars - self._size
+        if len(chunk) > room:
+            chunk = chunk[:room]
+            self.truncated = True
+        self._buffer.write(chunk)
+        self._size += len(chunk)
+
+    def close(self):
+        if self._buffer is None:
+            return
+        if self.truncated:
+            self._buffer.write(self.TRUNCATED_NOTICE)
+        self.text = self._buffer.getvalue()
+        self._buffer = None
+        import pyperclip  # Solo hace falta con interfaz; la CLI no lo usa
+        pyperclip.copy(self.text)
+
+
+class StreamSink(ExportSink):
+    """Escribe en un flujo ya abierto (p.ej. sys.stdout) sin cerrarlo"""
+
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, chunk):
+        self._stream.write(chunk)
+
+    def close(self):
+        self._stream.flush()
+
+
+def open_file_sink(path):
+    """Sink de archivo según la extensión (.gz -> comprimido)"""
+    if path.lower().endswith(".gz"):
+        return GzipSink(path)
+    return FileSink(path)
@@ -0,0 +1,98 @@
+import codecs
+import os
+
+
+SNIFF_SIZE = 8192
+
+TEXT_EXTENSIONS = {
+    '.txt', '.py', '.pyw', '.pyi', '.js', '.mjs', '.cjs', '.jsx', '.ts', '.tsx',
+    '.java', '.cpp', '.cc', '.cxx', '.hpp', '.c', '.h', '.cs', '.go', '.rs',
+    '.php', '.rb', '.swift', '.kt', '.kts', '.gradle', '.groovy', '.scala',
+    '.dart', '.lua', '.pl', '.r', '.m', '.vue', '.svelte', '.astro',
+    '.html', '.htm', '.css', '.scss', '.sass', '.less', '.json', '.jsonc',
+    '.xml', '.yaml', '.yml', '.toml', '.ini', '.cfg', '.conf', '.env',
+    '.properties', '.csv', '.tsv', '.md', '.rst', '.tex', '.sh', '.bash',
+    '.zsh', '.ps1', '.bat', '.cmd', '.sql', '.graphql', '.proto', '.svg',
+    '.dockerfile', '.tf', '.lock', '.log',
+}
+
+TEXT_FILENAMES = {
+    'dockerfile', 'makefile', 'gemfile', 'rakefile', 'procfile', 'vagrantfile',
+    'jenkinsfile', 'license', 'readme', 'cmakelists.txt', '.gitignore',
+    '.gitattributes', '.editorconfig', '.dockerignore', '.env',
+}
+
+BINARY_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.ico', '.webp', '.bmp', '.tiff', '.psd',
+    '.mp3', '.mp4', '.wav', '.ogg', '.flac', '.avi', '.mov', '.mkv', '.webm',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.odt',
+    '.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz', '.tgz', '.jar', '.war',
+    '.exe', '.dll', '.so', '.dylib', '.bin', '.o', '.a', '.lib', '.obj',
+    '.class', '.pyc', '.pyo', '.pyd', '.wasm', '.db', '.sqlite', '.sqlite3',
+    '.ttf', '.otf', '.woff', '.woff2', '.eot', '.icns', '.npy', '.pkl',
+}
+
+_BOMS = (
+    codecs.BOM_UTF8, codecs.BOM_UTF32_LE, codecs.BOM_UTF32_BE,
+    codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE,
+)
+
+# Bytes de control que no aparecen en texto (todo < 0x20 salvo \t \n \f \r y ESC)
+_CONTROL_BYTES = bytes(b for b in range(32) if b not in (9, 10, 12, 13, 27)) + b'\x7f'
+
+
+def classify_by_name(filepath):
+    """Veredicto por nombre/extensión: True, False o None si es desconocido"""
+    name = os.path.basename(filepath).lower()
+    if name in TEXT_FILENAMES:
+        return True
+    ext = os.path.splitext(name)[1]
+    if ext in TEXT_EXTENSIONS:
+        return True
+    if ext in BINARY_EXTENSIONS:
+        return False
+    return None
+
+
+def sniff_bytes(prefix):
+    """Decide si un prefijo de archivo parece texto (BOM, NUL, UTF-8, control)"""
+    if not prefix:
+        return True  # Archivo vacío
+    if prefix.startswith(_BOMS):
+        return True
+    if b'\x00' in prefix:
+        return False
+    try:
+        # final=False: el prefijo puede cortar un carácter multibyte
+        codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+        return True
+    except UnicodeDecodeError:
+        pass
+    # Otras codificaciones de 8 bits (latin-1, cp1252): pocos bytes de control
+    control = len(prefix) - len(prefix.translate(None, _CONTROL_BYTES))
+    return control / len(prefix) < 0.1
+
+
+def classify(filepath):
+    """Texto/binario: por extensión si se conoce, si no leyendo un prefijo"""
+    verdict = classify_by_name(filepath)
+    if verdict is not None:
+        return verdict
+    try:
+        with open(filepath, 'rb') as f:
+            return sniff_bytes(f.read(SNIFF_SIZE))
+    except OSError:
+        return False
+
+
+def is_text_file(filepath, stat=None):
+    """Como classify(), pero el veredicto se memoiza en la caché de metadatos.
+
+    Solo se lee el prefijo de SNIFF_SIZE bytes, y únicamente si la extensión
+    es desconocida y no hay un veredicto vigente para su (size, mtime) actual.
+    """
+    verdict = classify_by_name(filepath)
+    if verdict is not None:
+        return verdict
+    from core.metadata_cache import get_metadata_cache
+    return get_metadata_cache().is_text(filepath, stat)
@@ -1,30 +1,96 @@
 import os
-from utils.helpers import is_text_file, count_lines_in_file, format_file_size
+from utils.helpers import format_file_size
+from core.project_index import ProjectIndex
+from core.parallel_walker import ParallelWalker
+from core.metadata_cache import get_metadata_cache
 
 class FileManager:
     """Gestiona operaciones de archivos y directorios"""
     
     def __init__(self):
         self.root_path = None
+        self.index = None  # ProjectIndex compartido de la carpeta abierta
+        self.filename_index = None  # FilenameIndex del buscador difuso
+        self.trigram_index = None   # TrigramIndex que acota la búsqueda de contenido
     
     def set_root(self, path):
         """Establece la raíz del proyecto"""
+        if self.index is not None and self.index.root_path != path:
+            self.index = None
+        if self.filename_index is not None and self.filename_index.root_path != path:
+            self.filename_index = None
+        if self.trigram_index is not None and self.trigram_index.root_path != path:
+            self.trigram_index = None
         self.root_path = path
     
-    def list_directory(self, path, show_hidden=False):
-        """Lista archivos y carpetas en un directorio"""
+    def build_index(self, path):
+        """Construye el índice del proyecto (un solo recorrido del disco)"""
+        index = ProjectIndex(path)
+        self.set_index(index)
+        return index
+    
+    def set_index(self, index):
+        """Publica un índice ya construido si corresponde a la raíz actual"""
+        if index is None or self.root_path in (None, index.root_path):
+            self.index = index
+            return True
+        return False
+    
+    def set_filename_index(self, index):
+        """Publica el índice de nombres si corresponde a la raíz actual"""
+        if index is None or self.root_path in (None, index.root_path):
+            self.filename_index = index
+            return True
+        return False
+    
+    def set_trigram_index(self, index):
+        """Publica el índice de trigramas si corresponde a la raíz actual"""
+        if index is None or self.root_path in (None, index.root_path):
+            self.trigram_index = index
+            return True
+        return False
+    
+    def get_index(self, path=None):
+        """Retorna el índice si cubre la ruta indicada"""
+        index = self.index
+        if index is None:
+            return None
+        if path is not None and not index.covers(path):
+            return None
+        return index
+    
+    def walk(self, path):
+        """os.walk servido desde el índice o, si no hay, con el recorrido paralelo.
+
+        En ambos casos podar `dirnames` evita recorrer esas carpetas.
+        """
+        index = self.get_index(path)
+        if index is not None:
+            return index.walk(path)
+        return ParallelWalker().walk(path)
+    
+    def list_directory(self, path, show_hidden=False, use_index=True):
+        """Lista archivos y carpetas en un directorio (índice o un único os.scandir)"""
         try:
+            index = self.get_index(path) if use_index else None
+            if index is not None and index.is_dir(path):
+                return [
+                    {'name': e.name, 'path': e.path, 'is_dir': e.is_dir, 'is_file': not e.is_dir}
+                    for e in index.list_children(path)
+                    if show_hidden or not e.name.startswith('.')
+                ]
             items = []
-            for name in sorted(os.listdir(path)):
-                if not show_hidden and name.startswith('.'):
-                    continue
-                fullpath = os.path.join(path, name)
-                items.append({
-                    'name': name,
-                    'path': fullpath,
-                    'is_dir': os.path.isdir(fullpath),
-                    'is_file': os.path.isfile(fullpath)
-                })
+            with os.scandir(path) as it:
+                for entry in it:
+                    if not show_hidden and entry.name.startswith('.'):
+                        continue
+                    items.append({
+                        'name': entry.name,
+                        'path': os.path.join(path, entry.name),
+                        'is_dir': entry.is_dir(),
+                        'is_file': entry.is_file()
+                    })
+            items.sort(key=lambda item: item['name'])
             return items
         except PermissionError:
             return []
@@ -36,19 +102,17 @@ class FileManager:
         """Obtiene información detallada de un archivo"""
         try:
             stat = os.stat(filepath)
+            meta = get_metadata_cache().get(filepath, (stat.st_size, stat.st_mtime))
             info = {
                 'path': filepath,
                 'name': os.path.basename(filepath),
                 'size': stat.st_size,
                 'size_formatted': format_file_size(stat.st_size),
-                'is_text': is_text_file(filepath),
-                'lines': 0,
+                'is_text': bool(meta and meta.is_text),
+                'lines': meta.lines if meta and meta.is_text else 0,
                 'extension': os.path.splitext(filepath)[1]
             }
             
-            if info['is_text']:
-                info['lines'] = count_lines_in_file(filepath)
-            
             return info
         except Exception as e:
             print(f"Error getting file info {filepath}: {e}")
@@ -73,27 +137,37 @@ class FileManager:
             'extensions': {}
         }
         
+        index = self.get_index(path)
+        known = {}
+        
         try:
-            for root, dirs, files in os.walk(path):
+            filepaths = []
+            for root, dirs, files in self.walk(path):
                 stats['total_dirs'] += len(dirs)
                 for file in files:
-                    stats['total_files'] += 1
                     filepath = os.path.join(root, file)
-                    try:
-                        size = os.path.getsize(filepath)
-                        stats['total_size'] += size
-                        
-                        ext = os.path.splitext(file)[1] or 'sin extensión'
-                        if ext not in stats['extensions']:
-                            stats['extensions'][ext] = {'count': 0, 'lines': 0}
-                        stats['extensions'][ext]['count'] += 1
-                        
-                        if is_text_file(filepath):
-                            lines = count_lines_in_file(filepath)
-                            stats['total_lines'] += lines
-                            stats['extensions'][ext]['lines'] += lines
-                    except:
-                        pass
+                    entry = index.get(filepath) if index else None
+                    if entry is not None:
+                        known[filepath] = (entry.size, entry.mtime)
+                    filepaths.append(filepath)
+            
+            # Líneas y tamaños desde la caché persistente (solo se leen archivos cambiados)
+            metadata = get_metadata_cache().get_many(filepaths, known)
+            for filepath in filepaths:
+                stats['total_files'] += 1
+                meta = metadata.get(filepath)
+                if meta is None:
+                    continue
+                stats['total_size'] += meta.size
+                
+                ext = os.path.splitext(filepath)[1] or 'sin extensión'
+                if ext not in stats['extensions']:
+                    stats['extensions'][ext] = {'count': 0, 'lines': 0}
+                stats['extensions'][ext]['count'] += 1
+                
+                if meta.is_text:
+                    stats['total_lines'] += meta.lines
+                    stats['extensions'][ext]['lines'] += meta.lines
         except Exception as e:
             print(f"Error getting directory stats: {e}")
         
@@ -0,0 +1,137 @@
+import os
+import threading
+import time
+
+
+BATCH_SIZE = 200        # Coincidencias por lote entregado a la interfaz
+FLUSH_INTERVAL = 0.03   # Segundos máximos que una coincidencia espera en el lote
+
+
+def iter_entries(root, index=None, ignore=None, cancelled=None):
+    """Recorre `root` en profundidad produciendo (ruta, nombre, es_carpeta).
+
+    Usa el índice del proyecto si lo cubre y, si no, un os.scandir por
+    carpeta (el tipo sale de la propia entrada, sin stat extra). Las carpetas
+    ignoradas se producen pero no se recorren; se detiene en cuanto
+    `cancelled` (threading.Event) queda activado.
+    """
+    if index is not None and not index.covers(root):
+        index = None
+    stack = [root]
+    while stack:
+        if cancelled is not None and cancelled.is_set():
+            return
+        dirpath = stack.pop()
+        if index is not None and index.is_dir(dirpath) and index.covers(dirpath):
+            children = [(e.path, e.name, e.is_dir) for e in index.list_children(dirpath)]
+        else:
+            children = _scan(dirpath)
+        subdirs = []
+        for path, name, is_dir in children:
+            if ignore is not None and ignore.is_ignored(path, is_dir):
+                continue
+            yield path, name, is_dir
+            if is_dir:
+                subdirs.append(path)
+        stack.extend(reversed(subdirs))
+
+
+def _scan(dirpath):
+    children = []
+    try:
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir() and not entry.is_symlink()
+                except OSError:
+                    continue
+                children.append((entry.path, entry.name, is_dir))
+    except OSError:
+        return []
+    children.sort(key=lambda c: c[1])
+    return children
+
+
+def make_name_matcher(query, case_sensitive=False, match_extension=False):
+    """Predicado nombre -> bool con la semántica del diálogo de búsqueda"""
+    if not case_sensitive:
+        query = query.lower()
+    if match_extension:
+        if case_sensitive:
+            return lambda name: query in os.path.splitext(name)[1]
+        return lambda name: query in os.path.splitext(name)[1].lower()
+    if case_sensitive:
+        return lambda name: query in name
+    return lambda name: query in name.lower()
+
+
+class FilenameSearch:
+    """Búsqueda de nombres de archivo en un hilo, con resultados por lotes.
+
+    `on_batch([(ruta, es_carpeta)])` y `on_done(total, cancelada)` se llaman
+    desde el hilo de búsqueda: quien actualice widgets debe reenviarlos al
+    hilo de Tk (p.ej. con `after`). Los lotes se entregan al llenarse o cuando
+    la primera coincidencia pendiente supera FLUSH_INTERVAL, así los primeros
+    resultados aparecen enseguida aunque el árbol sea enorme.
+    """
+
+    def __init__(self, root, matcher, on_batch, on_done=None, include_dirs=False,
+                 index=None, ignore=None):
+        self.root = root
+        self.matcher = matcher
+        self.on_batch = on_batch
+        self.on_done = on_done
+        self.include_dirs = include_dirs
+        self.index = index
+        self.ignore = ignore
+        self._cancelled = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Pide detener la búsqueda; no se entregan más lotes"""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def _run(self):
+        matcher = self.matcher
+        include_dirs = self.include_dirs
+        batch = []
+        first_pending = 0.0
+        total = 0
+        try:
+            for path, name, is_dir in iter_entries(self.root, self.index, self.ignore,
+                                                   self._cancelled):
+                if batch and time.monotonic() - first_pending >= FLUSH_INTERVAL:
+                    total += len(batch)
+                    self._emit(batch)
+                    batch = []
+                if is_dir and not include_dirs:
+                    continue
+                if not matcher(name):
+                    continue
+                if not batch:
+                    first_pending = time.monotonic()
+                batch.append((path, is_dir))
+                if len(batch) >= BATCH_SIZE:
+                    total += len(batch)
+                    self._emit(batch)
+                    batch = []
+            if batch:
+                total += len(batch)
+                self._emit(batch)
+        except Exception as e:
+            print(f"Error searching in {self.root}: {e}")
+        if self.on_done is not None:
+            self.on_done(total, self.cancelled)
+
+    def _emit(self, batch):
+        if not self._cancelled.is_set():
+            self.on_batch(batch)
@@ -0,0 +1,587 @@
+import array
+import hashlib
+import os
+import pickle
+import re
+import threading
+from itertools import chain, compress
+
+from utils.helpers import app_base_path
+
+
+FORMAT_VERSION = 1
+MAX_SCORED = 1000     # Candidatos que reciben la puntuación completa en cada consulta
+
+# Puntuación estilo fzf: coincidencia + bonificaciones por posición - huecos
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = 10     # Inicio de la ruta o de un segmento (tras "/")
+BONUS_DELIMITER = 8     # Tras "_", "-", "." o espacio
+BONUS_CAMEL = 7         # Mayúscula tras minúscula, o dígito tras letra
+BONUS_CONSECUTIVE = 5   # Carácter contiguo al anterior
+BONUS_BASENAME = 2      # Por carácter que cae en el nombre del archivo
+
+_DELIMITERS = frozenset("_-. ")
+
+
+def default_index_path(root_path):
+    """Archivo persistente del índice de nombres de una carpeta (bajo data/)"""
+    key = os.path.normcase(os.path.abspath(root_path)).encode("utf-8", "surrogatepass")
+    digest = hashlib.sha1(key).hexdigest()[:16]
+    return os.path.join(app_base_path(), "data", "filename_index", f"{digest}.bin")
+
+
+def normalize_query(query):
+    """Minúsculas, sin espacios y con "/" como separador"""
+    return "".join(query.split()).lower().replace("\\", "/")
+
+
+def _bonus(text, i):
+    if i == 0:
+        return BONUS_BOUNDARY
+    prev = text[i - 1]
+    if prev == "/":
+        return BONUS_BOUNDARY
+    if prev in _DELIMITERS:
+        return BONUS_DELIMITER
+    cur = text[i]
+    if (prev.islower() and cur.isupper()) or (prev.isalpha() and cur.isdigit()):
+        return BONUS_CAMEL
+    return 0
+
+
+def fuzzy_match(text, query, lowered=None):
+    """Puntúa `query` (normalizada) como subsecuencia de `text`.
+
+    Retorna (puntuación, posiciones) o None si no coincide. Como fzf v1:
+    avanza de forma voraz hasta la última letra y retrocede desde ahí para
+    quedarse con la ventana más corta, y puntúa esa ventana.
+    """
+    if lowered is None:
+        lowered = text.lower()
+    if not query:
+        return 0, []
+    pos = -1
+    for ch in query:
+        pos = lowered.find(ch, pos + 1)
+        if pos < 0:
+            return None
+
+    positions = [0] * len(query)
+    i = pos
+    for j in range(len(query) - 1, -1, -1):
+        i = lowered.rfind(query[j], 0, i + 1)
+        positions[j] = i
+        i -= 1
+
+    basename_start = text.rfind("/") + 1
+    score = 0
+    prev = -2
+    run_bonus = 0
+    for k, i in enumerate(positions):
+        bonus = _bonus(text, i)
+        if i == prev + 1:
+            bonus = max(bonus, run_bonus, BONUS_CONSECUTIVE)
+        else:
+            if k:
+                score += SCORE_GAP_START + (i - prev - 2) * SCORE_GAP_EXTENSION
+            run_bonus = bonus
+        if k == 0:
+            bonus *= 2
+        score += SCORE_MATCH + bonus
+        if i >= basename_start:
+            score += BONUS_BASENAME
+        prev = i
+    return score, positions
+
+
+def _consume(lowered, query, k):
+    """Cuántos caracteres de `query` quedan cubiertos tras recorrer `lowered`"""
+    m = len(query)
+    pos = 0
+    while k < m:
+        pos = lowered.find(query[k], pos)
+        if pos < 0:
+            break
+        k += 1
+        pos += 1
+    return k
+
+
+def _subsequence_pattern(text):
+    """Regex que encuentra `text` como subsecuencia sin retroceso exponencial"""
+    first = re.escape(text[0])
+    rest = "".join(f"[^{re.escape(ch)}]*{re.escape(ch)}" for ch in text[1:])
+    return re.compile(first + rest)
+
+
+class FilenameIndex:
+    """Índice compacto de rutas de archivo para el buscador difuso.
+
+    Cada componente de ruta (nombre de carpeta o de archivo) se guarda una
+    sola vez y las carpetas/archivos son pares (padre, componente) en arrays,
+    así 500k rutas ocupan unos pocos MB y se persisten entre sesiones.
+
+    Para buscar no se recorre cada ruta: se calcula cuánto de la consulta
+    cubre cada carpeta (de padre a hijo) y cuánto del final cubre cada nombre
+    distinto, y se combinan por carpeta con operaciones de conjuntos. Solo
+    los mejores candidatos reciben la puntuación completa de fuzzy_match.
+    """
+
+    def __init__(self, root_path, ignore=None):
+        self.root_path = root_path
+        self.ignore = ignore  # Motor de ignorados (opcional) para eventos nuevos
+        self.version = 0
+        self.saved_version = -1  # Versión escrita en disco (para no guardar sin cambios)
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._strings = []        # Componentes internados
+        self._lower = []          # Mismos componentes en minúsculas
+        self._string_ids = {}
+        self._dir_parent = array.array("i", [-1])  # Carpeta 0 = raíz
+        self._dir_name = array.array("I", [self._intern("")])
+        self._file_dir = array.array("I")
+        self._file_name = array.array("I")
+        self._file_alive = bytearray()
+        self._dead_files = 0
+        # Derivados (se reconstruyen al cargar)
+        self._dir_alive = bytearray([1])
+        self._dir_files = [{}]    # carpeta -> {componente: archivo}
+        self._dir_subdirs = [{}]  # carpeta -> {componente: carpeta}
+        self._name_fids = {}      # componente -> [archivos con ese nombre]
+        self._file_names = self._name_fids.keys()
+        self._last = None         # (consulta, versión, progreso por carpeta)
+
+    def _intern(self, name):
+        sid = self._string_ids.get(name)
+        if sid is None:
+            sid = len(self._strings)
+            self._strings.append(name)
+            self._lower.append(name.lower())
+            self._string_ids[name] = sid
+        return sid
+
+    # ── Construcción ────────────────────────────────────────────────────
+
+    @classmethod
+    def from_project_index(cls, project_index, ignore=None):
+        """Construye el índice desde un ProjectIndex (sin volver a leer el disco)"""
+        index = cls(project_index.root_path, ignore)
+        index._build(project_index.walk(project_index.root_path))
+        return index
+
+    def _build(self, walk_iter):
+        root = self.root_path
+        dir_ids = {root: 0}
+        ignore = self.ignore
+        with self._lock:
+            for dirpath, dirnames, filenames in walk_iter:
+                did = dir_ids.get(dirpath)
+                if did is None:
+                    continue
+                for name in dirnames:
+                    path = os.path.join(dirpath, name)
+                    if ignore is not None and ignore.is_ignored(path, is_dir=True):
+                        continue
+                    dir_ids[path] = self._add_dir(did, name)
+                for name in filenames:
+                    if ignore is not None and ignore.is_ignored(os.path.join(dirpath, name), is_dir=False):
+                        continue
+                    self._add_file(did, name)
+            self.version += 1
+
+    def _add_dir(self, parent, name):
+        sid = self._intern(name)
+        existing = self._dir_subdirs[parent].get(sid)
+        if existing is not None:
+            return existing
+        did = len(self._dir_parent)
+        self._dir_parent.append(parent)
+        self._dir_name.append(sid)
+        self._dir_alive.append(1)
+        self._dir_files.append({})
+        self._dir_subdirs.append({})
+        self._dir_subdirs[parent][sid] = did
+        return did
+
+    def _add_file(self, did, name):
+        sid = self._intern(name)
+        if sid in self._dir_files[did]:
+            return False
+        fid = len(self._file_dir)
+        self._file_dir.append(did)
+        self._file_name.append(sid)
+        self._file_alive.append(1)
+        self._dir_files[did][sid] = fid
+        self._name_fids.setdefault(sid, []).append(fid)
+        return True
+
+    # ── Actualización incremental ───────────────────────────────────────
+
+    def apply_events(self, events):
+        """Aplica eventos del FileSystemWatcher (altas y bajas de rutas)"""
+        changed = False
+        with self._lock:
+            for event in events:
+                parts = self._split(event.path)
+                if not parts:
+                    continue
+                if event.kind == "deleted":
+                    changed |= self._remove(parts)
+                elif event.kind == "added":
+                    if self.ignore is not None and self.ignore.is_ignored(event.path, event.is_dir):
+                        continue
+                    changed |= self._insert(parts, event.is_dir)
+            if changed:
+                self.version += 1
+        return changed
+
+    def sync(self, project_index):
+        """Ajusta el índice a un ProjectIndex recién construido (solo altas y bajas)"""
+        root = self.root_path
+        walk_iter = project_index.walk(root)
+        if self.ignore is not None:
+            walk_iter = self.ignore.walk(walk_iter)
+        wanted = set()
+        for dirpath, _dirnames, filenames in walk_iter:
+            rel = os.path.relpath(dirpath, root)
+            base = () if rel == os.curdir else tuple(rel.split(os.sep))
+            wanted.update(base + (name,) for name in filenames)
+        with self._lock:
+            current = {
+                tuple(self.relpath(fid).split("/"))
+                for fid, alive in enumerate(self._file_alive) if alive
+            }
+            changed = False
+            for parts in current - wanted:
+                changed |= self._remove(list(parts))
+            for parts in sorted(wanted - current):
+                did = 0
+                for name in parts[:-1]:
+                    did = self._add_dir(did, name)
+                changed |= self._add_file(did, parts[-1])
+            if changed:
+                self.version += 1
+        return changed
+
+    def _split(self, path):
+        rel = os.path.relpath(path, self.root_path)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            return None
+        return rel.split(os.sep)
+
+    def _find_dir(self, parts):
+        did = 0
+        for name in parts:
+            sid = self._string_ids.get(name)
+            did = self._dir_subdirs[did].get(sid) if sid is not None else None
+            if did is None:
+                return None
+        return did
+
+    def _insert(self, parts, is_dir):
+        parent = self._find_dir(parts[:-1])
+        if parent is None:
+            return False  # Carpeta padre fuera del índice
+        if is_dir:
+            before = len(self._dir_parent)
+            self._add_dir(parent, parts[-1])
+            return len(self._dir_parent) > before
+        return self._add_file(parent, parts[-1])
+
+    def _remove(self, parts):
+        parent = self._find_dir(parts[:-1])
+        sid = self._string_ids.get(parts[-1])
+        if parent is None or sid is None:
+            return False
+        fid = self._dir_files[parent].pop(sid, None)
+        if fid is not None:
+            self._drop_file(fid)
+            return True
+        did = self._dir_subdirs[parent].pop(sid, None)
+        if did is None:
+            return False
+        stack = [did]
+        while stack:
+            d = stack.pop()
+            self._dir_alive[d] = 0
+            for f in self._dir_files[d].values():
+                self._drop_file(f)
+            self._dir_files[d] = {}
+            stack.extend(self._dir_subdirs[d].values())
+            self._dir_subdirs[d] = {}
+        return True
+
+    def _drop_file(self, fid):
+        self._file_alive[fid] = 0
+        self._dead_files += 1
+        sid = self._file_name[fid]
+        fids = self._name_fids[sid]
+        fids.remove(fid)
+        if not fids:
+            del self._name_fids[sid]
+
+    # ── Consultas ───────────────────────────────────────────────────────
+
+    def __len__(self):
+        return len(self._file_dir) - self._dead_files
+
+    def relpath(self, fid):
+        """Ruta relativa con "/" de un archivo"""
+        parts = [self._strings[self._file_name[fid]]]
+        did = self._file_dir[fid]
+        while did > 0:
+            parts.append(self._strings[self._dir_name[did]])
+            did = self._dir_parent[did]
+        return "/".join(reversed(parts))
+
+    def abspath(self, fid):
+        return os.path.join(self.root_path, *self.relpath(fid).split("/"))
+
+    def search(self, query, limit=200):
+        """Rutas que contienen la consulta como subsecuencia, mejor puntuadas primero.
+
+        Retorna ([(puntuación, ruta absoluta, posiciones en la ruta relativa)], total).
+        """
+        q = normalize_query(query)
+        if not q:
+            return [], 0
+        with self._lock:
+            progress = self._dir_progress(q)
+            levels = self._name_levels(q)
+            total, groups = self._combine(q, progress, levels)
+            scored = []
+            for fid in self._pool(q, groups, levels[-1], total):
+                rel = self.relpath(fid)
+                result = fuzzy_match(rel, q)
+                if result is not None:
+                    # Desempate: rutas más cortas primero
+                    scored.append((result[0], -len(rel), fid, result[1]))
+            scored.sort(reverse=True)
+            return [(s, self.abspath(fid), pos) for s, _l, fid, pos in scored[:limit]], total
+
+    def _dir_progress(self, q):
+        """Prefijo de la consulta que cubre la ruta de cada carpeta (con "/" final).
+
+        Si la consulta alarga la anterior (escribir letra a letra) solo se
+        recalculan las carpetas que cubrían la anterior completa.
+        """
+        m = len(q)
+        lower = self._lower
+        parents = self._dir_parent
+        names = self._dir_name
+        alive = self._dir_alive
+        last = self._last
+        if last is not None and last[1] == self.version and q.startswith(last[0]):
+            prev_full = len(last[0])
+            progress = list(last[2])
+            for did in range(1, len(parents)):
+                if progress[did] == prev_full and alive[did]:
+                    progress[did] = _consume(lower[names[did]] + "/", q, progress[parents[did]])
+        else:
+            progress = [0] * len(parents)
+            for did in range(1, len(parents)):
+                if not alive[did]:
+                    continue
+                k = progress[parents[did]]
+                if k < m:
+                    k = _consume(lower[names[did]] + "/", q, k)
+                progress[did] = k
+        self._last = (q, self.version, progress)
+        return progress
+
+    def _name_levels(self, q):
+        """levels[j] = nombres de archivo que contienen los últimos j caracteres.
+
+        Cada nivel filtra el anterior con una expresión regular sin retroceso
+        (`a[^b]*b...`), evaluada en C con map/compress sobre los nombres.
+        """
+        m = len(q)
+        lower = self._lower.__getitem__
+        levels = [None] * (m + 1)
+        current = list(self._file_names)
+        for j in range(1, m + 1):
+            pattern = _subsequence_pattern(q[m - j:])
+            current = list(compress(current, map(pattern.search, map(lower, current))))
+            levels[j] = set(current)
+            if not current:
+                for k in range(j + 1, m + 1):
+                    levels[k] = set()
+                break
+        return levels
+
+    def _combine(self, q, progress, levels):
+        """Cruza carpetas y nombres sin recorrer cada ruta.
+
+        Un archivo coincide si lo que su carpeta no cubre de la consulta es un
+        sufijo contenido en su nombre: por carpeta basta intersectar sus
+        nombres con el nivel correspondiente. Retorna (total, [(falta, carpeta,
+        nombres o None si valen todos)]).
+        """
+        m = len(q)
+        total = 0
+        groups = []
+        for did, files in enumerate(self._dir_files):
+            if not files:
+                continue
+            need = m - progress[did]
+            if need == 0:
+                groups.append((0, did, None))
+                total += len(files)
+                continue
+            ok = levels[need]
+            if not ok:
+                continue
+            matched = ok.intersection(files) if len(files) > len(ok) else files.keys() & ok
+            if matched:
+                groups.append((need, did, matched))
+                total += len(matched)
+        return total, groups
+
+    def _pool(self, q, groups, full_names, total):
+        """Archivos que reciben la puntuación completa (como mucho MAX_SCORED).
+
+        Con muchos resultados no se enumeran todos: primero van los archivos
+        cuyo nombre contiene toda la consulta (empieza por ella, la contiene
+        seguida, el resto), luego los que la reparten entre carpeta y nombre,
+        empezando por las carpetas que cubren más.
+        """
+        if total <= MAX_SCORED:
+            pool = []
+            for _need, did, sids in groups:
+                files = self._dir_files[did]
+                pool.extend(files.values() if sids is None else map(files.__getitem__, sids))
+            return pool
+
+        lower = self._lower
+        starts, contains, rest = [], [], []
+        for sid in full_names:
+            name = lower[sid]
+            if name.startswith(q):
+                starts.append(sid)
+            elif q in name:
+                contains.append(sid)
+            else:
+                rest.append(sid)
+        if len(rest) > MAX_SCORED:
+            rest.sort(key=lambda sid: len(lower[sid]))
+            rest = rest[:MAX_SCORED]
+        else:
+            strings = self._strings
+            rest.sort(key=lambda sid: fuzzy_match(strings[sid], q, lower[sid])[0], reverse=True)
+        starts.sort(key=lambda sid: len(lower[sid]))
+        contains.sort(key=lambda sid: len(lower[sid]))
+
+        pool = []
+        seen = set()
+        for sid in chain(starts, contains, rest):
+            fids = self._name_fids.get(sid, ())
+            pool.extend(fids)
+            seen.add(sid)
+            if len(pool) >= MAX_SCORED:
+                return pool[:MAX_SCORED]
+        for _need, did, sids in sorted(groups, key=lambda g: g[0]):
+            files = self._dir_files[did]
+            for sid in (files if sids is None else sids):
+                if sid not in seen:
+                    pool.append(files[sid])
+            if len(pool) >= MAX_SCORED:
+                break
+        return pool[:MAX_SCORED]
+
+    # ── Persistencia ────────────────────────────────────────────────────
+
+    def save(self, path=None):
+        """Guarda el índice compactado (sin archivos/carpetas borrados)"""
+        path = path or default_index_path(self.root_path)
+        with self._lock:
+            if self._dead_files or not all(self._dir_alive):
+                self._compact()
+            data = {
+                "format": FORMAT_VERSION,
+                "root": self.root_path,
+                "strings": "\0".join(self._strings),
+                "dir_parent": self._dir_parent.tobytes(),
+                "dir_name": self._dir_name.tobytes(),
+                "file_dir": self._file_dir.tobytes(),
+                "file_name": self._file_name.tobytes(),
+            }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self.saved_version = self.version
+            return True
+        except OSError as e:
+            print(f"Error saving filename index {path}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, root_path, path=None, ignore=None):
+        """Carga el índice guardado de una carpeta; None si no hay o no es válido"""
+        path = path or default_index_path(root_path)
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Error loading filename index {path}: {e}")
+            return None
+        if not isinstance(data, dict) or data.get("format") != FORMAT_VERSION \
+                or os.path.normcase(data.get("root", "")) != os.path.normcase(root_path):
+            return None
+
+        index = cls(root_path, ignore)
+        index._strings = data["strings"].split("\0")
+        index._lower = [s.lower() for s in index._strings]
+        index._string_ids = {s: i for i, s in enumerate(index._strings)}
+        for name in ("dir_parent", "dir_name", "file_dir", "file_name"):
+            arr = array.array(getattr(index, "_" + name).typecode)
+            arr.frombytes(data[name])
+            setattr(index, "_" + name, arr)
+        index._rebuild_derived()
+        index.version += 1
+        index.saved_version = index.version
+        return index
+
+    def _rebuild_derived(self):
+        dirs = len(self._dir_parent)
+        self._dir_alive = bytearray(b"\x01") * dirs
+        self._dir_files = [{} for _ in range(dirs)]
+        self._dir_subdirs = [{} for _ in range(dirs)]
+        for did in range(1, dirs):
+            self._dir_subdirs[self._dir_parent[did]][self._dir_name[did]] = did
+        for fid, (did, sid) in enumerate(zip(self._file_dir, self._file_name)):
+            self._dir_files[did][sid] = fid
+        self._file_alive = bytearray(b"\x01") * len(self._file_dir)
+        self._dead_files = 0
+        self._name_fids = {}
+        for fid, sid in enumerate(self._file_name):
+            self._name_fids.setdefault(sid, []).append(fid)
+        self._file_names = self._name_fids.keys()
+        self._last = None
+
+    def _compact(self):
+        """Renumera carpetas y archivos vivos (las carpetas siguen antes que sus hijas)"""
+        dir_map = {0: 0}
+        parents = array.array("i", [-1])
+        names = array.array("I", [self._dir_name[0]])
+        for did in range(1, len(self._dir_parent)):
+            if self._dir_alive[did] and self._dir_parent[did] in dir_map:
+                dir_map[did] = len(parents)
+                parents.append(dir_map[self._dir_parent[did]])
+                names.append(self._dir_name[did])
+        file_dir = array.array("I")
+        file_name = array.array("I")
+        for fid in range(len(self._file_dir)):
+            if self._file_alive[fid] and self._file_dir[fid] in dir_map:
+                file_dir.append(dir_map[self._file_dir[fid]])
+                file_name.append(self._file_name[fid])
+        self._dir_parent, self._dir_name = parents, names
+        self._file_dir, self._file_name = file_dir, file_name
+        self._rebuild_derived()
@@ -0,0 +1,471 @@
+"""
+Vigilancia de cambios en el sistema de archivos.
+
+En Linux usa inotify (vía ctypes, sin dependencias); en otros sistemas o si
+inotify no está disponible, cae a un sondeo barato por mtime de carpetas.
+Los eventos se agrupan (debounce) y se entregan en lotes al callback.
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+
+@dataclass
+class FileSystemEvent:
+    kind: str  # ADDED | MODIFIED | DELETED
+    path: str
+    is_dir: bool = False
+
+
+EventsCallback = Callable[[list], None]
+
+
+def _coalesce(previous, current):
+    """Combina dos eventos sobre la misma ruta; None si se anulan"""
+    if previous is None:
+        return current
+    if previous.kind == ADDED and current.kind == DELETED:
+        return None
+    if previous.kind == ADDED:
+        return FileSystemEvent(ADDED, current.path, current.is_dir)
+    if previous.kind == DELETED and current.kind == ADDED:
+        return FileSystemEvent(MODIFIED, current.path, current.is_dir)
+    return current
+
+
+class _InotifyBackend:
+    """Backend inotify (Linux) a través de ctypes"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_ISDIR = 0x40000000
+    IN_CLOEXEC = 0o2000000
+    IN_NONBLOCK = 0o4000
+
+    WATCH_MASK = (
+        IN_MODIFY | IN_CLOSE_WRITE | IN_ATTRIB | IN_MOVED_FROM | IN_MOVED_TO
+        | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+    )
+    _HEADER = struct.Struct("iIII")
+
+    def __init__(self, root_path, emit, should_watch_dir):
+        self.root_path = root_path
+        self._emit = emit
+        self._should_watch_dir = should_watch_dir
+        self._wd_to_path = {}
+        self._path_to_wd = {}
+        self._fd = -1
+        self._stop_r, self._stop_w = os.pipe()
+
+        try:
+            libc_name = ctypes.util.find_library("c") or "libc.so.6"
+            self._libc = ctypes.CDLL(libc_name, use_errno=True)
+            self._libc.inotify_init1.argtypes = [ctypes.c_int]
+            self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+            self._libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+            self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+            if self._fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+            self._add_tree(root_path, emit_added=False)
+        except BaseException:
+            # Sin objeto que cerrar después (p.ej. ENOSPC): liberar los fds aquí
+            self.close()
+            raise
+
+    @classmethod
+    def is_supported(cls):
+        return sys.platform.startswith("linux")
+
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                # Límite de watches del sistema: que el vigilante use el sondeo
+                raise OSError(err, "inotify watch limit reached")
+            return
+        self._wd_to_path[wd] = path
+        self._path_to_wd[path] = wd
+
+    def _add_tree(self, top, emit_added):
+        """Registra watches para una carpeta y todas sus subcarpetas"""
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            if dirpath != self.root_path and not self._should_watch_dir(dirpath):
+                continue
+            self._add_watch(dirpath)
+            try:
+                with os.scandir(dirpath) as it:
+                    for entry in it:
+                        try:
+                            is_dir = entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        if emit_added:
+                            # Carpeta creada con contenido (p.ej. mv o git checkout)
+                            self._emit(FileSystemEvent(ADDED, entry.path, is_dir))
+                        if is_dir:
+                            stack.append(entry.path)
+            except OSError:
+                pass
+
+    def _forget_tree(self, top):
+        prefix = top.rstrip(os.sep) + os.sep
+        for path in [p for p in self._path_to_wd if p == top or p.startswith(prefix)]:
+            wd = self._path_to_wd.pop(path)
+            self._wd_to_path.pop(wd, None)
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            try:
+                ready, _, _ = select.select([self._fd, self._stop_r], [], [])
+            except (OSError, ValueError):
+                break
+            if self._stop_r in ready:
+                break
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                break
+            self._parse(data)
+
+    def _parse(self, data):
+        offset = 0
+        header_size = self._HEADER.size
+        while offset + header_size <= len(data):
+            wd, mask, _cookie, name_len = self._HEADER.unpack_from(data, offset)
+            offset += header_size
+            raw_name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+
+            if mask & self.IN_Q_OVERFLOW:
+                # Se perdieron eventos: pedir revisión completa de la raíz
+                self._emit(FileSystemEvent(MODIFIED, self.root_path, True))
+                continue
+            if mask & self.IN_IGNORED:
+                path = self._wd_to_path.pop(wd, None)
+                if path is not None:
+                    self._path_to_wd.pop(path, None)
+                continue
+
+            dirpath = self._wd_to_path.get(wd)
+            if dirpath is None:
+                continue
+            if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                continue  # El padre ya reporta la eliminación
+
+            path = os.path.join(dirpath, os.fsdecode(raw_name)) if raw_name else dirpath
+            is_dir = bool(mask & self.IN_ISDIR)
+
+            if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                self._emit(FileSystemEvent(ADDED, path, is_dir))
+                if is_dir:
+                    try:
+                        self._add_tree(path, emit_added=True)
+                    except OSError:
+                        pass
+            elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                self._emit(FileSystemEvent(DELETED, path, is_dir))
+                if is_dir:
+                    self._forget_tree(path)
+            elif mask & (self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_ATTRIB) and not is_dir:
+                self._emit(FileSystemEvent(MODIFIED, path, False))
+
+    def wake(self):
+        try:
+            os.write(self._stop_w, b"x")
+        except OSError:
+            pass
+
+    def close(self):
+        for fd in (self._fd, self._stop_r, self._stop_w):
+            if fd < 0:
+                continue
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class _PollingBackend:
+    """Sondeo portable: stat de carpetas y revisión rotativa de archivos.
+
+    Cada ciclo solo hace stat de las carpetas; las que cambiaron de mtime se
+    vuelven a listar. Las modificaciones de contenido (que no tocan el mtime
+    de la carpeta) se detectan revisando un lote rotativo de archivos.
+    """
+
+    FILES_PER_CYCLE = 2000
+
+    def __init__(self, root_path, emit, should_watch_dir, interval=2.0):
+        self.root_path = root_path
+        self._emit = emit
+        self._should_watch_dir = should_watch_dir
+        self.interval = interval
+        self._wake = threading.Event()
+        self._dir_mtimes = {}   # carpeta -> mtime_ns
+        self._listings = {}     # carpeta -> {nombre: (is_dir, size, mtime_ns)}
+        self._file_cursor = 0
+        self._file_list = None  # Se regenera solo cuando cambia algún listado
+        self._snapshot_tree(root_path, emit_added=False)
+
+    def _scan_dir(self, dirpath):
+        listing = {}
+        with os.scandir(dirpath) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir:
+                        listing[entry.name] = (True, 0, 0)
+                    else:
+                        st = entry.stat()
+                        listing[entry.name] = (False, st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+        return listing
+
+    def _snapshot_tree(self, top, emit_added):
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            if dirpath != self.root_path and not self._should_watch_dir(dirpath):
+                continue
+            try:
+                self._dir_mtimes[dirpath] = os.stat(dirpath).st_mtime_ns
+                listing = self._scan_dir(dirpath)
+            except OSError:
+                continue
+            self._listings[dirpath] = listing
+            self._file_list = None
+            for name, (is_dir, _size, _mtime) in listing.items():
+                path = os.path.join(dirpath, name)
+                if emit_added:
+                    self._emit(FileSystemEvent(ADDED, path, is_dir))
+                if is_dir:
+                    stack.append(path)
+
+    def _forget_tree(self, top):
+        prefix = top.rstrip(os.sep) + os.sep
+        for path in [p for p in self._listings if p == top or p.startswith(prefix)]:
+            self._listings.pop(path, None)
+            self._dir_mtimes.pop(path, None)
+
+    def _check_dirs(self):
+        for dirpath in list(self._dir_mtimes):
+            if dirpath not in self._dir_mtimes:
+                continue  # Eliminada durante este mismo ciclo
+            try:
+                mtime = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                continue  # El padre reportará la eliminación
+            if mtime == self._dir_mtimes[dirpath]:
+                continue
+            self._dir_mtimes[dirpath] = mtime
+            try:
+                new_listing = self._scan_dir(dirpath)
+            except OSError:
+                continue
+            old_listing = self._listings.get(dirpath, {})
+            self._listings[dirpath] = new_listing
+            self._file_list = None
+
+            for name, (is_dir, size, file_mtime) in new_listing.items():
+                path = os.path.join(dirpath, name)
+                old = old_listing.get(name)
+                if old is None:
+                    self._emit(FileSystemEvent(ADDED, path, is_dir))
+                    if is_dir:
+                        self._snapshot_tree(path, emit_added=True)
+                elif not is_dir and old[1:] != (size, file_mtime):
+                    self._emit(FileSystemEvent(MODIFIED, path, False))
+            for name, (is_dir, _size, _mtime) in old_listing.items():
+                if name not in new_listing:
+                    path = os.path.join(dirpath, name)
+                    self._emit(FileSystemEvent(DELETED, path, is_dir))
+                    if is_dir:
+                        self._forget_tree(path)
+
+    def _check_files_slice(self):
+        """Revisa un lote rotativo de archivos para detectar ediciones"""
+        if self._file_list is None:
+            self._file_list = [
+                (dirpath, name)
+                for dirpath, listing in self._listings.items()
+                for name, info in listing.items()
+                if not info[0]
+            ]
+        files = self._file_list
+        if not files:
+            return
+        start = self._file_cursor % len(files)
+        batch = files[start:start + self.FILES_PER_CYCLE]
+        self._file_cursor = start + len(batch)
+        for dirpath, name in batch:
+            known = self._listings.get(dirpath, {}).get(name)
+            if known is None:
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if (st.st_size, st.st_mtime_ns) != known[1:]:
+                self._listings[dirpath][name] = (False, st.st_size, st.st_mtime_ns)
+                self._emit(FileSystemEvent(MODIFIED, path, False))
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            self._wake.wait(self.interval)
+            if stop_event.is_set():
+                break
+            try:
+                self._check_dirs()
+                self._check_files_slice()
+            except Exception as e:
+                print(f"Error polling {self.root_path}: {e}")
+
+    def wake(self):
+        self._wake.set()
+
+    def close(self):
+        pass
+
+
+class FileSystemWatcher:
+    """Vigila una carpeta y entrega lotes de FileSystemEvent al callback.
+
+    El callback se invoca desde un hilo secundario; en Tk hay que reenviar
+    el trabajo al hilo principal con after().
+    """
+
+    def __init__(self, root_path, callback: EventsCallback, should_watch_dir=None,
+                 debounce=0.3, poll_interval=2.0, force_polling=False):
+        self.root_path = root_path
+        self.callback = callback
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+        self._should_watch_dir = should_watch_dir or (lambda path: True)
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._pending_event = threading.Event()
+        self._stop = threading.Event()
+        self._backend = None
+        self._backend_lock = threading.Lock()
+        self._threads = []
+
+    @property
+    def backend_name(self):
+        if isinstance(self._backend, _InotifyBackend):
+            return "inotify"
+        if isinstance(self._backend, _PollingBackend):
+            return "polling"
+        return None
+
+    def start(self):
+        """Inicia la vigilancia en segundo plano (sin bloquear al llamador)"""
+        self._threads = [
+            threading.Thread(target=self._run_backend, daemon=True),
+            threading.Thread(target=self._dispatch_loop, daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _run_backend(self):
+        # Crear el backend recorre todo el árbol (watches o instantánea):
+        # se hace en este hilo para no congelar al que llamó a start()
+        try:
+            backend = self._create_backend()
+        except Exception as e:
+            print(f"Error starting file watcher for {self.root_path}: {e}")
+            return
+        with self._backend_lock:
+            if self._stop.is_set():
+                backend.close()
+                return
+            self._backend = backend
+        backend.run(self._stop)
+
+    def _create_backend(self):
+        if not self.force_polling and _InotifyBackend.is_supported():
+            try:
+                # Si falla, el constructor ya cerró sus descriptores
+                return _InotifyBackend(self.root_path, self._queue_event, self._should_watch_dir)
+            except (OSError, AttributeError) as e:
+                print(f"inotify no disponible ({e}), usando sondeo")
+        return _PollingBackend(
+            self.root_path, self._queue_event, self._should_watch_dir, self.poll_interval
+        )
+
+    def stop(self):
+        """Detiene la vigilancia y libera recursos"""
+        self._stop.set()
+        self._pending_event.set()
+        with self._backend_lock:
+            backend = self._backend
+        if backend is not None:
+            backend.wake()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        if backend is not None:
+            backend.close()
+        self._threads = []
+
+    def _queue_event(self, event):
+        with self._pending_lock:
+            merged = _coalesce(self._pending.get(event.path), event)
+            if merged is None:
+                self._pending.pop(event.path, None)
+            else:
+                self._pending[event.path] = merged
+        self._pending_event.set()
+
+    def _dispatch_loop(self):
+        """Entrega los eventos cuando pasa `debounce` sin actividad nueva"""
+        while not self._stop.is_set():
+            self._pending_event.wait()
+            # Esperar a que se calme la ráfaga (guardados, checkouts, builds)
+            while not self._stop.is_set():
+                self._pending_event.clear()
+                time.sleep(self.debounce)
+                if not self._pending_event.is_set():
+                    break
+            if self._stop.is_set():
+                break
+            with self._pending_lock:
+                events = list(self._pending.values())
+                self._pending.clear()
+            if events:
+                try:
+                    self.callback(events)
+                except Exception as e:
+                    print(f"Error dispatching filesystem events: {e}")
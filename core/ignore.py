@@ -0,0 +1,291 @@
+import os
+import re
+import threading
+
+from core.file_classifier import BINARY_EXTENSIONS
+
+
+# Carpetas que nunca se recorren (dependencias, entornos, VCS, salidas de build)
+IGNORED_DIRS = {
+    "node_modules", "bower_components", "venv", ".venv", "env", ".env",
+    "__pycache__", ".pytest_cache", ".mypy_cache", ".tox", "site-packages",
+    ".git", ".svn", ".hg", "dist", "build", "target", ".next", ".nuxt",
+    ".idea", ".vscode", ".vs", "coverage", ".gradle",
+}
+
+# Carpetas que además se omiten al preparar contexto/documentación
+CONTEXT_DIRS = {
+    "out", "bin", "obj", "lib", "scripts", "eggs",
+    ".m2", ".ivy2", "vendor", "packages", "deps",
+}
+
+ARCHIVE_EXTENSIONS = {
+    ".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz", ".tgz", ".whl", ".egg",
+}
+
+COMPILED_EXTENSIONS = {
+    ".pyc", ".pyo", ".so", ".dll", ".exe", ".o", ".a", ".class",
+}
+
+CONTEXT_EXTENSIONS = ARCHIVE_EXTENSIONS | COMPILED_EXTENSIONS | {
+    ".min.js", ".min.css", ".map", ".lock", ".log",
+    ".png", ".jpg", ".jpeg", ".gif", ".ico", ".svg",
+    ".mp3", ".mp4", ".avi", ".mov", ".pdf", ".doc", ".docx",
+}
+
+# Perfiles por uso: todos comparten IGNORED_DIRS y las reglas de .gitignore/.ignore
+PROFILES = {
+    "selection": {"extensions": ARCHIVE_EXTENSIONS | {".pyc", ".pyo"}},
+    "binary": {"extensions": BINARY_EXTENSIONS},
+    "context": {"extra_dirs": CONTEXT_DIRS, "extensions": CONTEXT_EXTENSIONS},
+    "readme": {"extra_dirs": CONTEXT_DIRS, "extensions": COMPILED_EXTENSIONS, "ignore_hidden": True},
+}
+
+IGNORE_FILENAMES = (".gitignore", ".ignore")
+
+
+def _translate(pattern):
+    """Traduce un patrón glob de gitignore a regex (sin anclar)"""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "*":
+            if pattern.startswith("**/", i):
+                out.append("(?:.*/)?")
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                out.append(".*")
+                i += 2
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            start = i + 1
+            if start < n and pattern[start] in "!^":
+                start += 1
+            end = pattern.find("]", start + 1)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace("\\", "\\\\")
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append(f"[{body}]")
+                i = end + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+def parse_ignore_lines(lines):
+    """Reglas (regex, negada, solo_carpetas) de un archivo .gitignore"""
+    rules = []
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        negate = line.startswith("!")
+        if negate:
+            line = line[1:]
+        if line.startswith("\\"):
+            line = line[1:]
+        line = re.sub(r"(?<!\\) +$", "", line)
+        dir_only = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            continue
+        anchored = "/" in line
+        regex = _translate(line.lstrip("/"))
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        rules.append((regex, negate, dir_only))
+    return rules
+
+
+class _RuleSet:
+    """Reglas de un archivo de ignore compiladas en un único matcher"""
+
+    def __init__(self, rules):
+        self.rules = [(re.compile(f"^{rx}$"), negate, dir_only) for rx, negate, dir_only in rules]
+        self.has_negations = any(negate for _, negate, _ in rules)
+        file_rx = [rx for rx, negate, dir_only in rules if not negate and not dir_only]
+        dir_rx = [rx for rx, negate, _ in rules if not negate]
+        self._file_re = re.compile("^(?:" + "|".join(file_rx) + ")$") if file_rx else None
+        self._dir_re = re.compile("^(?:" + "|".join(dir_rx) + ")$") if dir_rx else None
+
+    def decide(self, rel, is_dir):
+        """True/False si alguna regla aplica, None si ninguna"""
+        if not self.has_negations:
+            matcher = self._dir_re if is_dir else self._file_re
+            return True if matcher is not None and matcher.match(rel) else None
+        # Con negaciones gana la última regla que coincida
+        for regex, negate, dir_only in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel):
+                return not negate
+        return None
+
+
+class IgnoreEngine:
+    """Decide qué rutas de un proyecto se ignoran.
+
+    Combina las carpetas/extensiones integradas con los .gitignore/.ignore
+    del proyecto (cada uno relativo a su carpeta, los más profundos mandan).
+    Las decisiones por carpeta se cachean, así que comprobar un archivo
+    cuesta una búsqueda en diccionario más las reglas de su propia carpeta.
+    """
+
+    def __init__(self, root_path, extra_dirs=(), extensions=(), ignore_hidden=False,
+                 use_ignore_files=True):
+        self.root_path = os.path.normpath(os.path.abspath(root_path))
+        self.ignored_dirs = {d.lower() for d in IGNORED_DIRS | set(extra_dirs)}
+        extensions = {e.lower() for e in extensions}
+        self._simple_exts = {e for e in extensions if e.count(".") == 1}
+        self._compound_exts = tuple(e for e in extensions if e.count(".") > 1)
+        self.ignore_hidden = ignore_hidden
+        self.use_ignore_files = use_ignore_files
+        self._root_prefix = os.path.normcase(self.root_path).rstrip(os.sep) + os.sep
+        self._dir_cache = {}    # ruta relativa -> ignorada
+        self._rules_cache = {}  # ruta relativa -> [(base, _RuleSet)]
+        self._lock = threading.Lock()
+
+    # ── API ─────────────────────────────────────────────────────────────
+
+    def is_ignored(self, path, is_dir=None):
+        """Indica si la ruta (o alguna carpeta que la contiene) está ignorada"""
+        rel = self._relative(path)
+        if rel is None:
+            # Fuera del proyecto: solo reglas por nombre
+            if is_dir is None:
+                is_dir = os.path.isdir(path)
+            return self._builtin(os.path.basename(path), is_dir)
+        if not rel:
+            return False
+        if is_dir is None:
+            is_dir = os.path.isdir(path)
+        if is_dir:
+            return self._is_dir_ignored(rel)
+        parent = rel.rpartition("/")[0]
+        if parent and self._is_dir_ignored(parent):
+            return True
+        return self._decide(rel, False)
+
+    def should_descend(self, dirpath):
+        """Predicado para ParallelWalker / FileSystemWatcher"""
+        return not self.is_ignored(dirpath, is_dir=True)
+
+    def walk(self, walk_iter):
+        """Filtra un recorrido estilo os.walk podando carpetas ignoradas"""
+        for dirpath, dirnames, filenames in walk_iter:
+            dirnames[:] = [
+                d for d in dirnames
+                if not self.is_ignored(os.path.join(dirpath, d), is_dir=True)
+            ]
+            filenames[:] = [
+                f for f in filenames
+                if not self.is_ignored(os.path.join(dirpath, f), is_dir=False)
+            ]
+            yield dirpath, dirnames, filenames
+
+    def filter_files(self, filepaths):
+        """Archivos de la lista que no están ignorados"""
+        return [fp for fp in filepaths if not self.is_ignored(fp, is_dir=False)]
+
+    # ── Evaluación ──────────────────────────────────────────────────────
+
+    def _relative(self, path):
+        norm = os.path.normpath(os.path.abspath(path))
+        if os.path.normcase(norm) == os.path.normcase(self.root_path):
+            return ""
+        if not os.path.normcase(norm).startswith(self._root_prefix):
+            return None
+        return norm[len(self._root_prefix):].replace(os.sep, "/")
+
+    def _builtin(self, name, is_dir):
+        if self.ignore_hidden and name.startswith("."):
+            return True
+        lowered = name.lower()
+        if is_dir:
+            return lowered in self.ignored_dirs or lowered.endswith(".egg-info")
+        if os.path.splitext(lowered)[1] in self._simple_exts:
+            return True
+        return bool(self._compound_exts) and lowered.endswith(self._compound_exts)
+
+    def _is_dir_ignored(self, rel):
+        cached = self._dir_cache.get(rel)
+        if cached is not None:
+            return cached
+        parent = rel.rpartition("/")[0]
+        ignored = (bool(parent) and self._is_dir_ignored(parent)) or self._decide(rel, True)
+        self._dir_cache[rel] = ignored
+        return ignored
+
+    def _decide(self, rel, is_dir):
+        parent, _sep, name = rel.rpartition("/")
+        if self._builtin(name, is_dir):
+            return True
+        for base, ruleset in self._rules_for(parent):
+            verdict = ruleset.decide(rel[len(base) + 1:] if base else rel, is_dir)
+            if verdict is not None:
+                return verdict
+        return False
+
+    def _rules_for(self, dir_rel):
+        """Reglas aplicables en una carpeta, de la más profunda a la raíz"""
+        cached = self._rules_cache.get(dir_rel)
+        if cached is not None:
+            return cached
+        inherited = self._rules_for(dir_rel.rpartition("/")[0]) if dir_rel else []
+        own = self._load_rules(dir_rel) if self.use_ignore_files else None
+        rules = ([(dir_rel, own)] + inherited) if own else inherited
+        with self._lock:
+            self._rules_cache[dir_rel] = rules
+        return rules
+
+    def _load_rules(self, dir_rel):
+        dirpath = os.path.join(self.root_path, *dir_rel.split("/")) if dir_rel else self.root_path
+        lines = []
+        for filename in IGNORE_FILENAMES:
+            try:
+                with open(os.path.join(dirpath, filename), "r", encoding="utf-8", errors="ignore") as f:
+                    lines.extend(f.readlines())
+            except OSError:
+                continue
+        rules = parse_ignore_lines(lines)
+        return _RuleSet(rules) if rules else None
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_ignore_engine(root_path, profile="selection"):
+    """Motor compartido para una carpeta y perfil (se compila una sola vez)"""
+    key = (os.path.normcase(os.path.abspath(root_path)), profile)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = IgnoreEngine(root_path, **PROFILES[profile])
+            _engines[key] = engine
+        return engine
+
+
+def reset_ignore_engines(root_path=None):
+    """Descarta motores compilados (p.ej. tras editar un .gitignore)"""
+    with _engines_lock:
+        if root_path is None:
+            _engines.clear()
+            return
+        root_key = os.path.normcase(os.path.abspath(root_path))
+        for key in [k for k in _engines if k[0] == root_key]:
+            del _engines[key]
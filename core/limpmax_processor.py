@@ -6,6 +6,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable
 
+from core.ignore import get_ignore_engine
+from core.parallel_walker import ParallelWalker
+
 
 ProgressCallback = Callable[[dict], None]
 
@@ -22,21 +25,6 @@ class LimpMaxConfig:
 
 
 class LimpMaxProcessor:
-    IGNORED_DIRS = {
-        "node_modules", "venv", ".venv", "env", ".env", "__pycache__",
-        ".git", ".svn", ".hg", "dist", "build", ".idea", ".vscode",
-    }
-
-    ARCHIVE_EXTS = {
-        ".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz", ".tgz",
-    }
-
-    BINARY_EXTS = {
-        ".png", ".jpg", ".jpeg", ".gif", ".ico", ".webp", ".bmp", ".tiff",
-        ".mp3", ".mp4", ".wav", ".avi", ".mov", ".pdf", ".exe", ".dll",
-        ".so", ".dylib", ".bin", ".class", ".pyc", ".pyo", ".jar",
-    }
-
     SUPPORTED_COMMENT_STYLES = {
         ".py": ("#", None),
         ".sh": ("#", None),
@@ -95,6 +83,12 @@ class LimpMaxProcessor:
         ".js", ".jsx", ".ts", ".tsx",
     }
 
+    def __init__(self, project_index=None):
+        # ProjectIndex de la carpeta abierta; evita re-escanear el disco
+        self.project_index = project_index
+        # Motor de ignore del proyecto en proceso (perfil "binary")
+        self.ignore = None
+
     def _next_available_dir(self, desired: Path) -> Path:
         if not desired.exists():
             return desired
@@ -108,11 +102,8 @@ class LimpMaxProcessor:
             idx += 1
 
     def _is_ignored_path(self, path: Path) -> bool:
-        parts = {p.lower() for p in path.parts}
-        if any(p in self.IGNORED_DIRS for p in parts):
-            return True
-        ext = path.suffix.lower()
-        return ext in self.ARCHIVE_EXTS or ext in self.BINARY_EXTS
+        ignore = self.ignore or get_ignore_engine(str(path.parent), "binary")
+        return ignore.is_ignored(str(path), is_dir=False)
 
     def _supports_comments(self, ext: str) -> bool:
         return ext in self.SUPPORTED_COMMENT_STYLES
@@ -240,16 +231,33 @@ class LimpMaxProcessor:
 
         return new_text, stats
 
-    def _scan_all_files(self, root: Path, excluded_roots: set[Path] | None = None) -> list[Path]:
+    def _scan_all_files(self, root: Path, excluded_roots: set[Path] | None = None,
+                        ignore=None) -> list[Path]:
+        """Archivos del proyecto; con `ignore` no se entra en carpetas ignoradas"""
         files = []
         excluded_norm = {p.resolve() for p in (excluded_roots or set())}
-        for current_root, dirs, names in os.walk(root):
-            current = Path(current_root).resolve()
-            # Evitar recorrer carpeta(s) de salida cuando estén dentro del proyecto.
-            dirs[:] = [
-                d for d in dirs
-                if (current / d).resolve() not in excluded_norm
-            ]
+
+        def should_descend(path):
+            if ignore is not None and not ignore.should_descend(path):
+                return False
+            return not excluded_norm or Path(path).resolve() not in excluded_norm
+
+        index = self.project_index
+        # El índice solo sirve si recorrió todo lo que hace falta (sin poda, o con poda pedida)
+        if index is not None and index.root_path and Path(index.root_path).resolve() == root \
+                and (ignore is not None or index.should_descend is None):
+            # Mismo proyecto que el abierto: servir el listado desde el índice.
+            # La salida espejo puede haberse creado ahora, así que se excluye igual.
+            index_root = index.root_path
+            for current_root, dirs, names in index.walk(index_root):
+                current = root / os.path.relpath(current_root, index_root)
+                dirs[:] = [d for d in dirs if should_descend(os.path.join(current_root, d))]
+                for name in names:
+                    files.append(current / name)
+            return files
+        # Evitar recorrer carpeta(s) de salida cuando estén dentro del proyecto.
+        walker = ParallelWalker(should_descend=should_descend)
+        for current_root, _dirs, names in walker.walk(str(root)):
             for name in names:
                 files.append(Path(current_root) / name)
         return files
@@ -264,6 +272,7 @@ class LimpMaxProcessor:
             raise ValueError("Selecciona carpeta de salida.")
 
         start = time.time()
+        self.ignore = get_ignore_engine(str(root), "binary")
         single = Path(cfg.single_file).resolve() if cfg.single_file else None
         mirror_dir = Path(cfg.output_dir).resolve() if cfg.output_mode == "mirror" else None
 
@@ -280,7 +289,12 @@ class LimpMaxProcessor:
             all_files = [single]
         else:
             excluded = {mirror_dir} if mirror_dir else set()
-            all_files = self._scan_all_files(root, excluded_roots=excluded)
+            # En modo espejo se copia todo; si se sobrescribe, ni se entra en lo ignorado
+            all_files = self._scan_all_files(
+                root,
+                excluded_roots=excluded,
+                ignore=None if cfg.output_mode == "mirror" else self.ignore,
+            )
 
         process_candidates: set[Path] = set()
         for fp in all_files:
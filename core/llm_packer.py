@@ -0,0 +1,241 @@
+import math
+import os
+import re
+import time
+from dataclasses import dataclass, field
+
+from core.metadata_cache import get_metadata_cache
+
+
+DEFAULT_TOKEN_BUDGET = 100000
+CHARS_PER_TOKEN = 4  # Misma estimación que AIManager (len // 4)
+
+FULL = "full"
+TRUNCATED = "truncated"
+SIGNATURES = "signatures"
+PATH_ONLY = "path"
+DROPPED = "dropped"
+
+# Peso por tipo de archivo: código > docs/config > datos generados
+TYPE_WEIGHTS = {
+    '.py': 1.0, '.js': 1.0, '.jsx': 1.0, '.ts': 1.0, '.tsx': 1.0, '.java': 1.0,
+    '.kt': 1.0, '.kts': 0.8, '.go': 1.0, '.rs': 1.0, '.c': 1.0, '.h': 0.9,
+    '.cpp': 1.0, '.hpp': 0.9, '.cs': 1.0, '.php': 1.0, '.rb': 1.0, '.swift': 1.0,
+    '.vue': 1.0, '.svelte': 1.0, '.sql': 0.8, '.sh': 0.7,
+    '.html': 0.6, '.css': 0.5, '.scss': 0.5,
+    '.md': 0.6, '.rst': 0.5, '.txt': 0.4,
+    '.toml': 0.5, '.yaml': 0.5, '.yml': 0.5, '.ini': 0.4, '.cfg': 0.4,
+    '.json': 0.3, '.xml': 0.3, '.csv': 0.1, '.lock': 0.05, '.log': 0.05,
+}
+DEFAULT_TYPE_WEIGHT = 0.3
+
+# Líneas que sirven de resumen cuando el archivo no cabe completo
+_SIGNATURE_RE = re.compile(
+    r'^\s*(?:export\s+)?(?:default\s+)?(?:public\s+|private\s+|protected\s+|static\s+|async\s+)*'
+    r'(?:def|class|function|func|fn|interface|struct|enum|trait|impl|type|module)\b.*$',
+    re.MULTILINE,
+)
+
+
+@dataclass
+class PackEntry:
+    """Decisión del empaquetador para un archivo"""
+    path: str
+    status: str
+    tokens: int = 0           # Tokens que ocupa en la salida
+    full_tokens: int = 0      # Tokens estimados del archivo completo
+    score: float = 0.0
+    max_chars: int = 0        # Para TRUNCATED: caracteres a incluir
+    summary: str = ""         # Para SIGNATURES
+
+
+@dataclass
+class PackResult:
+    """Resultado del empaquetado: entradas en orden de salida + manifiesto"""
+    budget: int
+    entries: list = field(default_factory=list)
+    used_tokens: int = 0      # Tokens que ocupa la salida (contenido + manifiesto)
+    elapsed: float = 0.0
+    listed_dropped: int = 0   # Omitidos que caben nombrados en el manifiesto
+
+    def by_status(self, status):
+        return [e for e in self.entries if e.status == status]
+
+    def manifest_lines(self, relpath=os.path.basename, max_dropped=None):
+        """Manifiesto en Markdown de lo incluido, truncado, resumido u omitido"""
+        if max_dropped is None:
+            max_dropped = self.listed_dropped
+        lines = [
+            "## Manifest",
+            "",
+            f"Token budget: {self.budget:,} · used: ~{self.used_tokens:,}",
+            "",
+        ]
+        titles = (
+            (FULL, "Included"),
+            (TRUNCATED, "Truncated"),
+            (SIGNATURES, "Signatures only"),
+            (PATH_ONLY, "Path only"),
+            (DROPPED, "Dropped"),
+        )
+        for status, title in titles:
+            entries = self.by_status(status)
+            if not entries:
+                continue
+            lines.append(f"### {title} ({len(entries)})")
+            shown = entries[:max_dropped] if status == DROPPED else entries
+            for e in shown:
+                lines.append(f"- `{relpath(e.path)}` (~{e.full_tokens:,} tokens)")
+            if len(shown) < len(entries):
+                lines.append(f"- ... {len(entries) - len(shown):,} more")
+            lines.append("")
+        return lines
+
+
+def estimate_tokens(chars):
+    return max(1, math.ceil(chars / CHARS_PER_TOKEN))
+
+
+def extract_signatures(filepath, max_lines=60):
+    """Definiciones (def/class/function...) de un archivo de texto"""
+    try:
+        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+            content = f.read()
+    except OSError:
+        return ""
+    found = [m.group(0).rstrip() for m in _SIGNATURE_RE.finditer(content)]
+    return "\n".join(found[:max_lines])
+
+
+class LLMPacker:
+    """Elige qué archivos entran en una exportación con presupuesto de tokens.
+
+    Solo usa metadatos cacheados (tamaño, mtime, texto/binario): el
+    contenido se lee únicamente para extraer firmas de unos pocos archivos.
+    La prioridad combina tipo, orden de selección, antigüedad y tamaño.
+    """
+
+    CONTENT_SHARE = 0.9        # El resto se reserva para firmas y rutas
+    MAX_TRUNCATED_SHARE = 0.25 # Ningún archivo truncado ocupa más que esto
+    MIN_TRUNCATED_TOKENS = 300
+    MAX_SIGNATURE_FILES = 200
+    ENTRY_OVERHEAD = 12        # Encabezado y bloque de código por archivo
+    LISTED_DROPPED = 20        # Omitidos que se nombran en el manifiesto (como máximo)
+    MANIFEST_HEADER = 40       # Título, línea de presupuesto y títulos de sección
+    MANIFEST_SHARE = 0.1       # La reserva del manifiesto nunca pasa de esta fracción
+
+    def __init__(self, metadata_cache=None, index=None):
+        self._metadata_cache = metadata_cache
+        self.index = index
+
+    @property
+    def metadata_cache(self):
+        return self._metadata_cache or get_metadata_cache()
+
+    def _metadata(self, filepaths):
+        known = {}
+        if self.index is not None:
+            for fp in filepaths:
+                entry = self.index.get(fp)
+                if entry is not None and not entry.is_dir:
+                    known[fp] = (entry.size, entry.mtime)
+        return self.metadata_cache.get_many(filepaths, known)
+
+    @staticmethod
+    def _manifest_cost(filepath):
+        """Tokens de la línea del archivo en el manifiesto"""
+        return estimate_tokens(len(filepath) + 24)
+
+    def score(self, filepath, meta, position, total, newest, oldest, tokens):
+        ext = os.path.splitext(filepath)[1].lower()
+        type_weight = TYPE_WEIGHTS.get(ext, DEFAULT_TYPE_WEIGHT)
+        order_weight = 1.0 - 0.5 * (position / max(1, total))
+        span = max(1.0, newest - oldest)
+        recency = 0.5 + 0.5 * ((meta.mtime - oldest) / span)
+        size_penalty = 1.0 / math.log2(2 + tokens / 1000)
+        return type_weight * order_weight * recency * size_penalty
+
+    def pack(self, filepaths, budget=DEFAULT_TOKEN_BUDGET):
+        """Decide el estado de cada archivo y retorna un PackResult"""
+        start = time.time()
+        filepaths = list(dict.fromkeys(filepaths))
+        metadata = self._metadata(filepaths)
+        result = PackResult(budget=budget)
+
+        candidates = []
+        for position, fp in enumerate(filepaths):
+            meta = metadata.get(fp)
+            if meta is None:
+                continue
+            if not meta.is_text:
+                result.entries.append(PackEntry(fp, DROPPED))
+                continue
+            candidates.append((position, fp, meta, estimate_tokens(meta.size)))
+
+        if candidates:
+            mtimes = [meta.mtime for _, _, meta, _ in candidates]
+            newest, oldest = max(mtimes), min(mtimes)
+            total = len(filepaths)
+            ranked = sorted(
+                (
+                    (self.score(fp, meta, position, total, newest, oldest, tokens), position, fp, tokens)
+                    for position, fp, meta, tokens in candidates
+                ),
+                key=lambda item: (-item[0], item[1]),
+            )
+        else:
+            ranked = []
+
+        # Reserva del manifiesto según las rutas reales: encabezado + las líneas
+        # más largas que podría ocupar la lista de omitidos
+        listing = sorted((self._manifest_cost(fp) for fp in filepaths), reverse=True)
+        reserve = min(self.MANIFEST_HEADER + sum(listing[:self.LISTED_DROPPED]),
+                      int(budget * self.MANIFEST_SHARE))
+        content_budget = int(budget * self.CONTENT_SHARE)
+        used = reserve
+        leftovers = []
+        for score, position, fp, tokens in ranked:
+            cost = tokens + self.ENTRY_OVERHEAD + self._manifest_cost(fp)
+            if used + cost <= content_budget:
+                result.entries.append(PackEntry(fp, FULL, cost, tokens, score))
+                used += cost
+                continue
+            room = min(content_budget - used, int(budget * self.MAX_TRUNCATED_SHARE))
+            if room >= self.MIN_TRUNCATED_TOKENS:
+                chars = (room - self.ENTRY_OVERHEAD - self._manifest_cost(fp)) * CHARS_PER_TOKEN
+                result.entries.append(PackEntry(fp, TRUNCATED, room, tokens, score, max_chars=chars))
+                used += room
+                continue
+            leftovers.append((score, fp, tokens))
+
+        # Lo que no cupo: firmas (solo de unos pocos) o, si no, la ruta
+        summarized = 0
+        for score, fp, tokens in leftovers:
+            if summarized < self.MAX_SIGNATURE_FILES and used < budget:
+                summary = extract_signatures(fp)
+                if summary:
+                    cost = estimate_tokens(len(summary)) + self.ENTRY_OVERHEAD + self._manifest_cost(fp)
+                    summarized += 1
+                    if used + cost <= budget:
+                        result.entries.append(PackEntry(fp, SIGNATURES, cost, tokens, score, summary=summary))
+                        used += cost
+                        continue
+            cost = self._manifest_cost(fp)
+            if used + cost <= budget:
+                result.entries.append(PackEntry(fp, PATH_ONLY, cost, tokens, score))
+                used += cost
+            else:
+                result.entries.append(PackEntry(fp, DROPPED, 0, tokens, score))
+
+        # Se informa solo lo que se emite: la reserva se cambia por el
+        # encabezado y los omitidos que quepan en lo que sobra
+        emitted = used - reserve + min(budget, self.MANIFEST_HEADER)
+        for entry in result.by_status(DROPPED)[:self.LISTED_DROPPED]:
+            cost = self._manifest_cost(entry.path)
+            if emitted + cost > budget:
+                break
+            emitted += cost
+            result.listed_dropped += 1
+        result.used_tokens = emitted
+        result.elapsed = time.time() - start
+        return result
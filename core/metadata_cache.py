@@ -0,0 +1,346 @@
+import os
+import sqlite3
+import stat as stat_module
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from core.file_classifier import classify
+from utils.helpers import app_base_path
+from utils.line_counter import BATCH_WORKERS, scan_file
+
+
+UNCOUNTED = -1  # `lines` de un registro que solo tiene el veredicto texto/binario
+
+
+@dataclass
+class FileMetadata:
+    """Metadatos cacheados de un archivo (válidos mientras no cambie su stat)"""
+    path: str
+    size: int
+    mtime: float
+    lines: int = 0
+    is_text: bool = False
+    content_hash: str | None = None
+
+
+def default_cache_path():
+    """Ruta del archivo SQLite persistente (junto a config.json)"""
+    return os.path.join(app_base_path(), "data", "metadata_cache.db")
+
+
+class MetadataCache:
+    """Caché persistente (SQLite) de tamaño, mtime, líneas, texto/binario y hash.
+
+    Guarda también firmas MinHash (tabla `signatures`) para la búsqueda de
+    archivos casi duplicados.
+
+    Cada registro se identifica por la ruta y solo es válido si (size, mtime)
+    coinciden con el stat actual; así reabrir un proyecto no lee el contenido
+    de ningún archivo que no haya cambiado.
+    """
+
+    _QUERY_BATCH = 500
+    # Subir al cambiar cómo se calculan los registros (p.ej. reglas de texto/binario)
+    SCHEMA_VERSION = 2
+    _PARALLEL_MIN = 8  # Archivos pendientes a partir de los cuales se leen en paralelo
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_cache_path()
+        self._lock = threading.RLock()
+        self._memory = {}   # clave -> FileMetadata (registros ya consultados)
+        self._pending = {}  # clave -> FileMetadata pendiente de escribir
+        self._conn = self._connect()
+
+    def _connect(self):
+        try:
+            if self.db_path != ":memory:":
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        except (OSError, sqlite3.Error) as e:
+            print(f"Error opening metadata cache {self.db_path}: {e}")
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            pass
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                lines INTEGER NOT NULL DEFAULT 0,
+                is_text INTEGER NOT NULL DEFAULT 0,
+                content_hash TEXT
+            )"""
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS signatures (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                scheme TEXT NOT NULL,
+                signature BLOB NOT NULL
+            )"""
+        )
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != self.SCHEMA_VERSION:
+                conn.execute("DELETE FROM files")
+                conn.execute("DELETE FROM signatures")
+                conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+        except sqlite3.Error as e:
+            print(f"Error migrating metadata cache: {e}")
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def _key(path):
+        return os.path.normcase(os.path.abspath(path))
+
+    # ── Lectura ─────────────────────────────────────────────────────────
+
+    def lookup(self, path, size, mtime):
+        """Retorna el registro si sigue vigente para (size, mtime), sin tocar el disco"""
+        key = self._key(path)
+        with self._lock:
+            record = self._memory.get(key)
+            if record is None:
+                self._load_keys([key])
+                record = self._memory.get(key)
+        if record is not None and record.size == size and record.mtime == mtime \
+                and record.lines != UNCOUNTED:
+            return record
+        return None
+
+    def is_text(self, path, stat=None):
+        """Veredicto texto/binario memoizado; si no hay uno vigente solo se lee el prefijo.
+
+        A diferencia de get(), no cuenta líneas ni calcula el hash: el registro
+        se guarda como UNCOUNTED y get() lo completará cuando haga falta.
+        """
+        if stat is None:
+            try:
+                raw = os.stat(path)
+            except OSError:
+                return False
+            if not stat_module.S_ISREG(raw.st_mode):
+                return False
+            stat = (raw.st_size, raw.st_mtime)
+        size, mtime = stat
+        key = self._key(path)
+        with self._lock:
+            record = self._memory.get(key)
+            if record is None:
+                self._load_keys([key])
+                record = self._memory.get(key)
+        if record is not None and record.size == size and record.mtime == mtime:
+            return record.is_text
+        is_text = classify(path)
+        # Un binario ya queda completo (sin líneas ni hash); un texto queda por contar
+        record = FileMetadata(path=path, size=size, mtime=mtime,
+                              lines=UNCOUNTED if is_text else 0, is_text=is_text)
+        with self._lock:
+            self._memory[key] = record
+            self._pending[key] = record
+            if len(self._pending) >= self._QUERY_BATCH:
+                self.flush()  # Veredictos sueltos: se escriben por tandas
+        return is_text
+
+    def get(self, path, stat=None):
+        """Retorna metadatos vigentes; solo lee el archivo si su stat cambió"""
+        return self.get_many([path], {path: stat} if stat else None).get(path)
+
+    def get_many(self, paths, stats=None):
+        """Metadatos de varios archivos: ruta -> FileMetadata.
+
+        `stats` puede traer (size, mtime) ya conocidos (p.ej. del ProjectIndex)
+        para no hacer stat. Las rutas inexistentes o que no son archivos se omiten.
+        """
+        stats = stats or {}
+        wanted = []
+        for path in paths:
+            st = stats.get(path)
+            if st is None:
+                try:
+                    raw = os.stat(path)
+                except OSError:
+                    continue
+                if not stat_module.S_ISREG(raw.st_mode):
+                    continue
+                st = (raw.st_size, raw.st_mtime)
+            wanted.append((path, self._key(path), st[0], st[1]))
+
+        with self._lock:
+            self._load_keys([key for _, key, _, _ in wanted if key not in self._memory])
+
+        result = {}
+        stale = []
+        for path, key, size, mtime in wanted:
+            record = self._memory.get(key)
+            if record is not None and record.size == size and record.mtime == mtime \
+                    and record.lines != UNCOUNTED:
+                result[path] = record
+            else:
+                stale.append((path, key, size, mtime))
+
+        if len(stale) >= self._PARALLEL_MIN:
+            with ThreadPoolExecutor(max_workers=BATCH_WORKERS) as pool:
+                computed = list(pool.map(lambda item: self._compute(item[0], item[2], item[3]), stale))
+        else:
+            computed = [self._compute(path, size, mtime) for path, _key, size, mtime in stale]
+        for (path, key, _size, _mtime), record in zip(stale, computed):
+            with self._lock:
+                self._memory[key] = record
+                self._pending[key] = record
+            result[path] = record
+
+        if stale:
+            self.flush()
+        return result
+
+    def line_count(self, path, stat=None):
+        """Líneas de un archivo de texto (0 para binarios o si no existe)"""
+        record = self.get(path, stat)
+        return record.lines if record and record.is_text else 0
+
+    def _load_keys(self, keys):
+        """Carga registros desde SQLite a memoria (se llama con el lock tomado)"""
+        for start in range(0, len(keys), self._QUERY_BATCH):
+            batch = keys[start:start + self._QUERY_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            try:
+                rows = self._conn.execute(
+                    f"SELECT path, size, mtime, lines, is_text, content_hash "
+                    f"FROM files WHERE path IN ({placeholders})",
+                    batch,
+                ).fetchall()
+            except sqlite3.Error as e:
+                print(f"Error reading metadata cache: {e}")
+                return
+            for path, size, mtime, lines, is_text, content_hash in rows:
+                self._memory[path] = FileMetadata(
+                    path=path, size=size, mtime=mtime, lines=lines,
+                    is_text=bool(is_text), content_hash=content_hash,
+                )
+
+    def lookup_signatures(self, entries, scheme):
+        """Firmas guardadas vigentes: ruta -> bytes.
+
+        `entries` son (ruta, size, mtime); una firma solo vale si coinciden el
+        stat y el esquema con que se calculó (p.ej. número de permutaciones).
+        """
+        wanted = {self._key(path): (path, size, mtime) for path, size, mtime in entries}
+        keys = list(wanted)
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), self._QUERY_BATCH):
+                batch = keys[start:start + self._QUERY_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                try:
+                    rows = self._conn.execute(
+                        f"SELECT path, size, mtime, signature FROM signatures "
+                        f"WHERE scheme = ? AND path IN ({placeholders})",
+                        [scheme, *batch],
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    print(f"Error reading metadata cache: {e}")
+                    break
+                for key, size, mtime, signature in rows:
+                    path, want_size, want_mtime = wanted[key]
+                    if size == want_size and mtime == want_mtime:
+                        found[path] = bytes(signature)
+        return found
+
+    def store_signatures(self, rows, scheme):
+        """Guarda firmas calculadas: `rows` son (ruta, size, mtime, bytes)"""
+        data = [(self._key(path), size, mtime, scheme, sqlite3.Binary(signature))
+                for path, size, mtime, signature in rows]
+        if not data:
+            return
+        with self._lock:
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO signatures "
+                    "(path, size, mtime, scheme, signature) VALUES (?, ?, ?, ?, ?)",
+                    data,
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing metadata cache: {e}")
+
+    # ── Cálculo ─────────────────────────────────────────────────────────
+
+    def _compute(self, path, size, mtime):
+        """Lee el archivo una vez: cuenta líneas y calcula el hash a la vez"""
+        record = FileMetadata(path=path, size=size, mtime=mtime, is_text=classify(path))
+        if not record.is_text:
+            return record
+        try:
+            record.lines, record.content_hash = scan_file(path, with_hash=True)
+        except (OSError, ValueError):
+            pass
+        return record
+
+    # ── Escritura ───────────────────────────────────────────────────────
+
+    def invalidate(self, path):
+        """Olvida el registro de una ruta (p.ej. archivo eliminado)"""
+        key = self._key(path)
+        with self._lock:
+            self._memory.pop(key, None)
+            self._pending.pop(key, None)
+            try:
+                self._conn.execute("DELETE FROM files WHERE path = ?", (key,))
+                self._conn.execute("DELETE FROM signatures WHERE path = ?", (key,))
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error updating metadata cache: {e}")
+
+    def flush(self):
+        """Escribe en disco los registros pendientes"""
+        with self._lock:
+            if not self._pending:
+                return
+            rows = [
+                (key, r.size, r.mtime, r.lines, int(r.is_text), r.content_hash)
+                for key, r in self._pending.items()
+            ]
+            self._pending.clear()
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO files "
+                    "(path, size, mtime, lines, is_text, content_hash) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                self._conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing metadata cache: {e}")
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self._conn.close()
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_metadata_cache():
+    """Instancia compartida de la caché (se abre al primer uso)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = MetadataCache()
+        return _default_cache
+
+
+def close_metadata_cache():
+    """Escribe lo pendiente y cierra la instancia compartida (al salir)"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is not None:
+            _default_cache.close()
+            _default_cache = None
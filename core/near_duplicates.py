@@ -0,0 +1,307 @@
+import os
+import random
+import re
+import sys
+import zlib
+from array import array
+from concurrent.futures import FIRST_COMPLETED, wait
+
+try:
+    import numpy as np
+except ImportError:  # Sin NumPy se calcula lo mismo en Python puro (unas 30 veces más lento)
+    np = None
+
+from core.content_search import SEARCH_WORKERS, get_search_pool, read_file
+from core.file_classifier import SNIFF_SIZE, classify_by_name
+from core.metadata_cache import get_metadata_cache
+
+
+NUM_PERM = 128             # Valores por firma MinHash
+BANDS = 32                 # Bandas LSH de ROWS valores: candidatos desde ~0.4 de similitud
+ROWS = NUM_PERM // BANDS
+SHINGLE_TOKENS = 5         # Tokens por shingle
+MIN_TOKENS = 50            # Archivos más cortos no tienen firma (todo se parece)
+MAX_FILE_SIZE = 4 * 1024 * 1024
+DEFAULT_THRESHOLD = 0.8    # Similitud de Jaccard estimada mínima
+CHUNK_FILES = 64           # Archivos por tarea del pool
+
+# Cambia si cambia cómo se calculan las firmas; el hash de tuplas depende
+# de la versión y el ancho de Python, así que también forman parte.
+SCHEME = (f"minhash1-{NUM_PERM}-{SHINGLE_TOKENS}-{MIN_TOKENS}"
+          f"-py{sys.version_info[0]}.{sys.version_info[1]}-{sys.hash_info.width}")
+
+_PRIME = (1 << 61) - 1
+_MASK32 = 0xFFFFFFFF
+_BLOCK = 4096              # Shingles por bloque en NumPy (BLOCK x NUM_PERM uint64)
+
+_rng = random.Random(0x6D696E68)
+_A = [_rng.randrange(1, 1 << 32) for _ in range(NUM_PERM)]
+_B = [_rng.randrange(0, 1 << 32) for _ in range(NUM_PERM)]
+
+# Normalización: literales y nombres se abstraen para que renombrar variables
+# o cambiar cadenas y números no cambie los shingles.
+_KEYWORDS = (
+    "and as assert async await break case catch class const continue def default "
+    "del do elif else enum except export extends finally fn for func function go "
+    "if impl import in interface is lambda let match new nonlocal not or package "
+    "pass private protected public raise return static struct switch this throw "
+    "try type var void while with yield"
+).split()
+_STRING_RE = re.compile(rb'"(?:[^"\\\n]|\\.)*"|\'(?:[^\'\\\n]|\\.)*\'')
+_NUMBER_RE = re.compile(rb"\b\d[\w.]*")
+_IDENT_RE = re.compile(rb"\b(?!(?:" + "|".join(_KEYWORDS).encode() + rb")\b)[A-Za-z_]\w*")
+_TOKEN_RE = re.compile(rb"\w+|[^\w\s]")
+
+
+class SimilarResult(list):
+    """Pares o grupos de similitud más cuántos cubos LSH superaron el límite.
+
+    Si `capped` > 0 el resultado puede estar incompleto: en esos cubos solo
+    se compararon firmas vecinas.
+    """
+    capped = 0
+
+
+# ── Firmas (se ejecuta en los procesos del pool) ────────────────────────
+
+def shingle_set(buf):
+    """Hashes de los shingles de SHINGLE_TOKENS tokens normalizados; None si es corto"""
+    text = _IDENT_RE.sub(b"$", _NUMBER_RE.sub(b"0", _STRING_RE.sub(b'"', buf)))
+    tokens = _TOKEN_RE.findall(text)
+    if len(tokens) < MIN_TOKENS:
+        return None
+    ids = list(map(zlib.crc32, tokens))
+    return set(map(hash, zip(*[ids[j:] for j in range(SHINGLE_TOKENS)])))
+
+
+def minhash(shingles):
+    """Firma de NUM_PERM valores uint32 (bytes little-endian).
+
+    Cada permutación es h(x) = ((a·x + b) mod 2^61-1) & 0xFFFFFFFF sobre los
+    32 bits bajos del shingle; con a, b < 2^32 no hay desbordes en uint64,
+    así que NumPy y Python puro dan exactamente la misma firma.
+    """
+    if np is not None:
+        values = np.fromiter(shingles, dtype=np.int64, count=len(shingles)).view(np.uint64)
+        values &= np.uint64(_MASK32)
+        signature = np.full(NUM_PERM, _MASK32, dtype=np.uint64)
+        for start in range(0, len(values), _BLOCK):
+            block = values[start:start + _BLOCK, None] * _A_NP + _B_NP
+            block %= np.uint64(_PRIME)
+            block &= np.uint64(_MASK32)
+            np.minimum(signature, block.min(axis=0), out=signature)
+        return signature.astype("<u4").tobytes()
+
+    values = [x & _MASK32 for x in shingles]
+    signature = array("I", [
+        min([(a * x + b) % _PRIME & _MASK32 for x in values]) for a, b in zip(_A, _B)
+    ])
+    if sys.byteorder == "big":
+        signature.byteswap()
+    return signature.tobytes()
+
+
+if np is not None:
+    _A_NP = np.array(_A, dtype=np.uint64)
+    _B_NP = np.array(_B, dtype=np.uint64)
+
+
+def compute_signatures(paths):
+    """Firma de cada archivo de una tanda: [(ruta, bytes)]; b"" si no tiene"""
+    results = []
+    for path in paths:
+        signature = b""
+        buf = read_file(path, MAX_FILE_SIZE)
+        if buf and b"\0" not in buf[:SNIFF_SIZE]:
+            shingles = shingle_set(buf)
+            if shingles:
+                signature = minhash(shingles)
+        results.append((path, signature))
+    return results
+
+
+def file_signatures(paths, cache=None, on_progress=None, use_processes=None):
+    """Firmas MinHash de varios archivos: ruta -> bytes (solo los que tienen).
+
+    Las vigentes salen de la caché de metadatos; el resto se calcula en
+    tandas (en el pool de procesos compartido si hay más de un núcleo) y se
+    guarda. `on_progress(hechos, total)` se llama tras cada tanda.
+    """
+    cache = cache or get_metadata_cache()
+    entries = []
+    for path in paths:
+        if classify_by_name(path) is False:
+            continue
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        entries.append((path, st.st_size, st.st_mtime))
+
+    signatures = cache.lookup_signatures(entries, SCHEME)
+    stats = {path: (size, mtime) for path, size, mtime in entries}
+    stale = [path for path, _size, _mtime in entries if path not in signatures]
+    chunks = [stale[i:i + CHUNK_FILES] for i in range(0, len(stale), CHUNK_FILES)]
+    total = len(entries)
+    done = total - len(stale)
+    if on_progress is not None:
+        on_progress(done, total)
+
+    def collect(computed):
+        nonlocal done
+        cache.store_signatures([(path, *stats[path], sig) for path, sig in computed], SCHEME)
+        signatures.update(computed)
+        done += len(computed)
+        if on_progress is not None:
+            on_progress(done, total)
+
+    parallel = use_processes
+    if parallel is None:
+        parallel = len(chunks) > 1 and SEARCH_WORKERS > 1
+    if parallel:
+        pool = get_search_pool()
+        pending = iter(chunks)
+        in_flight = set()
+        while True:
+            while len(in_flight) < 2 * SEARCH_WORKERS:
+                chunk = next(pending, None)
+                if chunk is None:
+                    break
+                in_flight.add(pool.submit(compute_signatures, chunk))
+            if not in_flight:
+                break
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                collect(future.result())
+    else:
+        for chunk in chunks:
+            collect(compute_signatures(chunk))
+
+    return {path: sig for path, sig in signatures.items() if sig}
+
+
+# ── LSH ─────────────────────────────────────────────────────────────────
+
+def similar_pairs(signatures, threshold=DEFAULT_THRESHOLD, max_bucket=None):
+    """Pares (i, j, similitud) con i < j y similitud estimada >= threshold.
+
+    LSH por bandas: dos firmas son candidatas si coinciden en las ROWS
+    filas de alguna banda; solo los candidatos se comparan (fracción de
+    valores iguales = Jaccard estimado). Sin `max_bucket` se comparan todos
+    los pares de cada cubo; con él, en los cubos más grandes cada firma solo
+    se compara con la siguiente (como en clone_detector.find_clones) y
+    SimilarResult.capped lo indica.
+    """
+    n = len(signatures)
+    pairs = SimilarResult()
+    if n < 2:
+        return pairs
+    candidates = set()
+    if np is not None:
+        matrix = np.frombuffer(b"".join(signatures), dtype="<u4").reshape(n, NUM_PERM)
+        for band in range(BANDS):
+            # Clave de la banda mezclando sus filas en un uint64 (las colisiones
+            # solo añaden candidatos que la verificación descarta)
+            key = np.zeros(n, dtype=np.uint64)
+            for row in range(band * ROWS, (band + 1) * ROWS):
+                key = key * np.uint64(0x100000001B3) + matrix[:, row]
+            order = np.argsort(key, kind="stable")
+            ordered = key[order]
+            starts = np.flatnonzero(np.concatenate(([True], ordered[1:] != ordered[:-1])))
+            ends = np.append(starts[1:], n)
+            for start, end in zip(starts[ends - starts > 1].tolist(), ends[ends - starts > 1].tolist()):
+                pairs.capped += _add_bucket(candidates, sorted(order[start:end].tolist()), n, max_bucket)
+        if not candidates:
+            return pairs
+        encoded = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        encoded.sort()
+        first, second = encoded // n, encoded % n
+        for start in range(0, len(encoded), 65536):
+            i = first[start:start + 65536]
+            j = second[start:start + 65536]
+            similarity = (matrix[i] == matrix[j]).mean(axis=1)
+            keep = similarity >= threshold
+            pairs.extend(zip(i[keep].tolist(), j[keep].tolist(), similarity[keep].tolist()))
+        return pairs
+
+    rows = [_decode(sig) for sig in signatures]
+    width = ROWS * 4
+    for band in range(BANDS):
+        buckets = {}
+        for index, sig in enumerate(signatures):
+            buckets.setdefault(sig[band * width:(band + 1) * width], []).append(index)
+        for members in buckets.values():
+            if len(members) > 1:
+                pairs.capped += _add_bucket(candidates, members, n, max_bucket)
+    for code in sorted(candidates):
+        i, j = divmod(code, n)
+        similarity = sum(a == b for a, b in zip(rows[i], rows[j])) / NUM_PERM
+        if similarity >= threshold:
+            pairs.append((i, j, similarity))
+    return pairs
+
+
+def _decode(signature):
+    values = array("I", signature)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def _add_bucket(candidates, members, n, max_bucket=None):
+    """Añade los pares de un cubo (índices crecientes) codificados como i * n + j.
+
+    Retorna 1 si el cubo superó `max_bucket` y solo se emparejaron vecinas.
+    """
+    if max_bucket and len(members) > max_bucket:
+        candidates.update(i * n + j for i, j in zip(members, members[1:]))
+        return 1
+    for position, i in enumerate(members):
+        base = i * n
+        candidates.update(base + j for j in members[position + 1:])
+    return 0
+
+
+def clusters(pairs, n):
+    """Agrupa pares similares (unión-búsqueda): [(miembros, [(i, j, similitud)])]"""
+    parent = list(range(n))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j, _similarity in pairs:
+        root_i, root_j = find(i), find(j)
+        if root_i != root_j:
+            parent[max(root_i, root_j)] = min(root_i, root_j)
+
+    groups = {}
+    for i, j, similarity in pairs:
+        groups.setdefault(find(i), []).append((i, j, similarity))
+    result = []
+    for group_pairs in groups.values():
+        members = sorted({i for i, _j, _s in group_pairs} | {j for _i, j, _s in group_pairs})
+        result.append((members, group_pairs))
+    result.sort(key=lambda item: (-len(item[0]), item[0][0]))
+    return result
+
+
+def find_near_duplicates(paths, threshold=DEFAULT_THRESHOLD, cache=None, on_progress=None,
+                         max_bucket=None):
+    """Grupos de archivos casi duplicados, de mayor a menor.
+
+    [{'files': [rutas], 'similarity': máxima del grupo, 'pairs': [(ruta1, ruta2, similitud)]}]
+    en un SimilarResult; `max_bucket` como en similar_pairs.
+    """
+    signatures = file_signatures(paths, cache, on_progress)
+    files = [path for path in paths if path in signatures]
+    pairs = similar_pairs([signatures[path] for path in files], threshold, max_bucket)
+    groups = SimilarResult({
+        'files': [files[i] for i in members],
+        'similarity': max(similarity for _i, _j, similarity in group_pairs),
+        'pairs': [(files[i], files[j], similarity) for i, j, similarity in group_pairs],
+    } for members, group_pairs in clusters(pairs, len(files)))
+    groups.capped = pairs.capped
+    return groups
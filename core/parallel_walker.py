@@ -0,0 +1,202 @@
+import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+
+DEFAULT_WORKERS = 8
+
+
+@dataclass
+class WalkRecord:
+    """Entrada obtenida de os.scandir (stat ya resuelto para archivos)"""
+    path: str
+    name: str
+    is_dir: bool
+    size: int = 0
+    mtime: float = 0.0
+
+    @classmethod
+    def from_entry(cls, entry, dirpath):
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            return None
+        path = os.path.join(dirpath, entry.name)
+        if is_dir:
+            return cls(path=path, name=entry.name, is_dir=True)
+        try:
+            st = entry.stat()
+            size, mtime = st.st_size, st.st_mtime
+        except OSError:
+            size, mtime = 0, 0.0
+        return cls(path=path, name=entry.name, is_dir=False, size=size, mtime=mtime)
+
+
+class ParallelWalker:
+    """Recorrido de carpetas con os.scandir repartido entre varios hilos.
+
+    Cada hilo tiene su propia cola de carpetas pendientes (toma la más
+    reciente, en profundidad) y cuando se queda sin trabajo roba la más
+    antigua de otro hilo, que suele ser la de mayor subárbol. scandir y stat
+    liberan el GIL, así que la latencia de disco/red se solapa entre hilos.
+
+    El resultado es determinista: los hijos de cada carpeta se ordenan por
+    nombre, sin importar qué hilo los visitó.
+    """
+
+    def __init__(self, workers=None, ignored_dirs=None, should_descend=None):
+        self.workers = max(1, workers or DEFAULT_WORKERS)
+        self.ignored_dirs = set(ignored_dirs or ())
+        self.should_descend = should_descend
+
+    # ── API ─────────────────────────────────────────────────────────────
+
+    def scan(self, root, record_factory=None):
+        """Recorre `root` y retorna {carpeta: [registros ordenados por nombre]}"""
+        return self._scan(root, record_factory or WalkRecord.from_entry)
+
+    def walk(self, root, record_factory=None):
+        """Equivalente a os.walk (topdown, sin seguir enlaces) con orden estable.
+
+        Es perezoso como os.walk: al retomar tras cada yield se encargan al
+        pool las subcarpetas que quedan en `dirnames`, así que podar
+        `dirnames` evita recorrerlas. Como los enlaces simbólicos, las
+        carpetas ignoradas aparecen en `dirnames` pero no se recorren.
+        """
+        factory = record_factory or WalkRecord.from_entry
+        if not os.path.isdir(root):
+            return
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            stack = [(root, pool.submit(self._scan_dir, root, factory))]
+            while stack:
+                dirpath, future = stack.pop()
+                listing, subdirs = future.result()
+                dirnames = [r.name for r in listing if r.is_dir]
+                filenames = [r.name for r in listing if not r.is_dir]
+                yield dirpath, dirnames, filenames
+                descend = set(subdirs)
+                for name in reversed(dirnames):
+                    path = os.path.join(dirpath, name)
+                    if path in descend:
+                        stack.append((path, pool.submit(self._scan_dir, path, factory)))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def iter_files(self, root):
+        """Registros de archivo bajo `root` en el mismo orden que walk()"""
+        listings = {}
+
+        def remember(entry, dirpath):
+            record = WalkRecord.from_entry(entry, dirpath)
+            if record is not None and not record.is_dir:
+                listings.setdefault(dirpath, []).append(record)
+            return record
+
+        for dirpath, _dirs, _files in self.walk(root, remember):
+            records = listings.pop(dirpath, [])
+            records.sort(key=lambda r: r.name)
+            yield from records
+
+    # ── Recorrido ───────────────────────────────────────────────────────
+
+    def _should_skip(self, path, name):
+        if name in self.ignored_dirs:
+            return True
+        return self.should_descend is not None and not self.should_descend(path)
+
+    def _scan_dir(self, dirpath, record_factory):
+        listing = []
+        subdirs = []
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    try:
+                        record = record_factory(entry, dirpath)
+                    except Exception as e:
+                        print(f"Error reading entry {entry.path}: {e}")
+                        continue
+                    if record is None:
+                        continue
+                    listing.append(record)
+                    if record.is_dir and not entry.is_symlink() \
+                            and not self._should_skip(record.path, entry.name):
+                        subdirs.append(record.path)
+        except (PermissionError, FileNotFoundError, NotADirectoryError):
+            pass
+        except OSError as e:
+            print(f"Error scanning {dirpath}: {e}")
+        listing.sort(key=lambda r: r.name)
+        return listing, subdirs
+
+    def _scan(self, root, record_factory):
+        listings = {}
+        if not os.path.isdir(root):
+            return listings
+
+        if self.workers == 1:
+            stack = [root]
+            while stack:
+                dirpath = stack.pop()
+                listings[dirpath], subdirs = self._scan_dir(dirpath, record_factory)
+                stack.extend(subdirs)
+            return listings
+
+        queues = [deque() for _ in range(self.workers)]
+        queues[0].append(root)
+        pending = [1]  # carpetas encoladas o en proceso
+        # Los hilos sin trabajo esperan aquí; se despiertan al publicar carpetas o al terminar
+        ready = threading.Condition()
+
+        def steal(me):
+            for offset in range(1, self.workers):
+                victim = queues[(me + offset) % self.workers]
+                try:
+                    return victim.popleft()
+                except IndexError:
+                    continue
+            return None
+
+        def worker(me):
+            own = queues[me]
+            while True:
+                try:
+                    dirpath = own.pop()
+                except IndexError:
+                    # Se busca trabajo con el lock tomado: nadie publica entre la
+                    # búsqueda y el wait(), así que no se pierden avisos
+                    with ready:
+                        while True:
+                            if pending[0] == 0:
+                                return
+                            dirpath = steal(me)
+                            if dirpath is not None:
+                                break
+                            ready.wait()
+                listing, subdirs = self._scan_dir(dirpath, record_factory)
+                listings[dirpath] = listing
+                with ready:
+                    pending[0] += len(subdirs) - 1
+                    own.extend(subdirs)
+                    if pending[0] == 0:
+                        ready.notify_all()
+                    elif subdirs:
+                        ready.notify(len(subdirs))
+
+        threads = [
+            threading.Thread(target=worker, args=(i,), daemon=True)
+            for i in range(1, self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        worker(0)
+        for thread in threads:
+            thread.join()
+        return listings
+
+
+def parallel_walk(root, workers=None, ignored_dirs=None, should_descend=None):
+    """Atajo: ParallelWalker(...).walk(root)"""
+    return ParallelWalker(workers, ignored_dirs, should_descend).walk(root)
@@ -0,0 +1,57 @@
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+def file_size(path):
+    """Tamaño en disco (0 si no existe); estimación por defecto del presupuesto"""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class PrefetchReader:
+    """Lee por adelantado los próximos archivos en paralelo y los entrega en orden.
+
+    Se mantienen como máximo `max_ahead` lecturas en curso y `max_bytes`
+    (estimados con `size_fn`) de datos ya leídos sin consumir; siempre se
+    permite al menos una, aunque supere el presupuesto por sí sola.
+    """
+
+    def __init__(self, read_fn, workers=8, max_ahead=64, max_bytes=16 * 1024 * 1024, size_fn=None):
+        self.read_fn = read_fn
+        self.workers = max(1, workers)
+        self.max_ahead = max(1, max_ahead)
+        self.max_bytes = max_bytes
+        self.size_fn = size_fn or file_size
+
+    def iter(self, items):
+        """Genera (item, read_fn(item)) en el mismo orden que `items`"""
+        source = iter(items)
+        pending = deque()  # (item, future, bytes reservados)
+        in_flight = 0
+        held = None
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            while True:
+                while len(pending) < self.max_ahead:
+                    if held is None:
+                        try:
+                            item = next(source)
+                        except StopIteration:
+                            break
+                        held = (item, self.size_fn(item))
+                    item, size = held
+                    if pending and in_flight + size > self.max_bytes:
+                        break  # Esperar a que el escritor consuma lo leído
+                    pending.append((item, pool.submit(self.read_fn, item), size))
+                    in_flight += size
+                    held = None
+                if not pending:
+                    break
+                item, future, size = pending.popleft()
+                in_flight -= size
+                yield item, future.result()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,258 @@
+import bisect
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from core.parallel_walker import ParallelWalker
+
+
+@dataclass
+class IndexEntry:
+    """Entrada del índice: datos de os.scandir + stat ya resueltos"""
+    path: str
+    name: str
+    is_dir: bool
+    size: int = 0
+    mtime: float = 0.0
+
+
+def _key(path):
+    """Normaliza una ruta para usarla como clave del índice"""
+    return os.path.normcase(os.path.normpath(path))
+
+
+class ProjectIndex:
+    """Índice en memoria del proyecto abierto.
+
+    Se construye una sola vez por carpeta (un recorrido con os.scandir guardando
+    el stat de cada entrada) y lo consultan los managers en lugar de volver a
+    recorrer el disco.
+    """
+
+    def __init__(self, root_path=None, workers=None, should_descend=None):
+        self.root_path = None
+        self.workers = workers
+        # Carpetas que no se recorren (p.ej. ignoradas); quedan listadas pero sin hijos
+        self.should_descend = should_descend
+        self.build_time = 0.0
+        self.version = 0     # Aumenta con cada cambio; permite cachear derivados
+        self._entries = {}   # clave normalizada -> IndexEntry
+        self._children = {}  # clave de carpeta -> [IndexEntry] ordenados por nombre
+        self._lock = threading.RLock()
+        if root_path:
+            self.build(root_path)
+
+    # ── Construcción ────────────────────────────────────────────────────
+
+    def build(self, root_path):
+        """Recorre el árbol completo una única vez (sin seguir enlaces a carpetas)"""
+        start = time.time()
+        entries = {}
+        children = {}
+
+        root_key = _key(root_path)
+        entries[root_key] = IndexEntry(
+            path=root_path,
+            name=os.path.basename(os.path.normpath(root_path)) or root_path,
+            is_dir=True,
+        )
+
+        # Recorrido paralelo (hilos con robo de trabajo); hijos ya ordenados
+        walker = ParallelWalker(self.workers, should_descend=self.should_descend)
+        listings = walker.scan(root_path, self._record_from_entry)
+        for dirpath, listing in listings.items():
+            for record in listing:
+                entries[_key(record.path)] = record
+            children[_key(dirpath)] = listing
+
+        with self._lock:
+            self.root_path = root_path
+            self._entries = entries
+            self._children = children
+            self.build_time = time.time() - start
+            self.version += 1
+        return self
+
+    @staticmethod
+    def _record_from_entry(entry, dirpath):
+        try:
+            is_dir = entry.is_dir()
+        except OSError:
+            return None
+        path = os.path.join(dirpath, entry.name)
+        if is_dir:
+            return IndexEntry(path=path, name=entry.name, is_dir=True)
+        try:
+            st = entry.stat()
+            size, mtime = st.st_size, st.st_mtime
+        except OSError:
+            size, mtime = 0, 0.0
+        return IndexEntry(path=path, name=entry.name, is_dir=False, size=size, mtime=mtime)
+
+    # ── Actualización incremental ───────────────────────────────────────
+
+    def apply_events(self, events):
+        """Aplica eventos del FileSystemWatcher y retorna las rutas afectadas
+
+        Solo se hace stat de las rutas que cambiaron. Si el vigilante perdió
+        eventos (aviso sobre la raíz) retorna None sin tocar nada: hace falta
+        un build() completo, que el llamador lanza en segundo plano.
+        """
+        if any(event.is_dir and event.kind == "modified" and _key(event.path) == _key(self.root_path)
+               for event in events):
+            return None
+        changed = []
+        with self._lock:
+            for event in events:
+                if not self.covers(event.path):
+                    continue
+                if event.kind == "deleted":
+                    if self._remove(event.path):
+                        changed.append(event.path)
+                elif self._upsert(event.path):
+                    changed.append(event.path)
+            if changed:
+                self.version += 1
+        return changed
+
+    def _upsert(self, path):
+        parent_key = _key(os.path.dirname(path))
+        siblings = self._children.get(parent_key)
+        if siblings is None:
+            return False  # Carpeta padre fuera del índice
+        try:
+            st = os.stat(path)
+        except OSError:
+            return self._remove(path)
+        is_dir = os.path.isdir(path)
+        key = _key(path)
+        record = self._entries.get(key)
+        if record is not None and record.is_dir != is_dir:
+            self._remove(path)  # Pasó de archivo a carpeta (o al revés)
+            record = None
+        if record is None:
+            record = IndexEntry(path=path, name=os.path.basename(path), is_dir=is_dir)
+            self._entries[key] = record
+            names = [e.name for e in siblings]
+            siblings.insert(bisect.bisect(names, record.name), record)
+            # Como en build(): enlaces y carpetas ignoradas quedan sin recorrer
+            # (fuera de covers()), así sus consultas van al disco
+            if is_dir and not os.path.islink(path) \
+                    and (self.should_descend is None or self.should_descend(path)):
+                self._children.setdefault(key, [])
+        if not is_dir:
+            record.size, record.mtime = st.st_size, st.st_mtime
+        return True
+
+    def _remove(self, path):
+        key = _key(path)
+        record = self._entries.pop(key, None)
+        if record is None:
+            return False
+        siblings = self._children.get(_key(os.path.dirname(path)))
+        if siblings is not None:
+            siblings[:] = [e for e in siblings if e is not record]
+        if record.is_dir:
+            prefix = key.rstrip(os.sep) + os.sep
+            for sub in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[sub]
+            for sub in [k for k in self._children if k == key or k.startswith(prefix)]:
+                del self._children[sub]
+        return True
+
+    # ── Consultas ───────────────────────────────────────────────────────
+
+    def covers(self, path):
+        """Indica si la ruta está dentro de la parte recorrida del índice"""
+        if not self.root_path or not path:
+            return False
+        root_key = _key(self.root_path)
+        key = _key(path)
+        if key == root_key:
+            return True
+        if not key.startswith(root_key.rstrip(os.sep) + os.sep):
+            return False
+        # Carpetas no recorridas (ignoradas o enlaces): se consultan en disco
+        while key != root_key:
+            entry = self._entries.get(key)
+            if entry is not None and entry.is_dir and key not in self._children:
+                return False
+            key = os.path.dirname(key)
+        return True
+
+    def get(self, path):
+        """Retorna la entrada de una ruta o None"""
+        return self._entries.get(_key(path))
+
+    def exists(self, path):
+        return _key(path) in self._entries
+
+    def is_file(self, path):
+        entry = self.get(path)
+        return entry is not None and not entry.is_dir
+
+    def is_dir(self, path):
+        entry = self.get(path)
+        return entry is not None and entry.is_dir
+
+    def list_children(self, path):
+        """Hijos directos de una carpeta (ordenados por nombre)"""
+        return list(self._children.get(_key(path), ()))
+
+    def walk(self, top=None):
+        """Equivalente a os.walk (topdown) servido desde memoria.
+
+        Como en os.walk, se pueden podar subcarpetas modificando `dirnames`;
+        las carpetas no recorridas aparecen en `dirnames` pero no se visitan.
+        """
+        top = top or self.root_path
+        if not self.is_dir(top):
+            return
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            listing = self._children.get(_key(dirpath), ())
+            dirnames = [e.name for e in listing if e.is_dir]
+            filenames = [e.name for e in listing if not e.is_dir]
+            yield dirpath, dirnames, filenames
+            for name in reversed(dirnames):
+                path = os.path.join(dirpath, name)
+                if _key(path) in self._children:
+                    stack.append(path)
+
+    def iter_files(self, top=None):
+        """Itera las entradas de archivo bajo `top` (por defecto toda la raíz)"""
+        for dirpath, _dirs, _files in self.walk(top):
+            for entry in self._children.get(_key(dirpath), ()):
+                if not entry.is_dir:
+                    yield entry
+
+    def diff(self, previous):
+        """Compara con un índice anterior de la misma raíz.
+
+        Retorna (versión de `previous` comparada, rutas que cambiaron): las
+        que aparecen o desaparecen, cambian de tipo, tamaño o mtime, o pasan
+        a recorrerse (o dejan de recorrerse).
+        """
+        with previous._lock:
+            version = previous.version
+            old_entries = list(previous._entries.items())
+            old_walked = set(previous._children)
+        with self._lock:
+            new_entries = list(self._entries.items())
+            walked = set(self._children)
+        old = {key: (e.is_dir, e.size, e.mtime, key in old_walked) for key, e in old_entries}
+        changed = [e.path for key, e in new_entries
+                   if old.pop(key, None) != (e.is_dir, e.size, e.mtime, key in walked)]
+        changed.extend(e.path for key, e in old_entries if key in old)
+        return version, changed
+
+    def file_count(self):
+        return sum(1 for e in self._entries.values() if not e.is_dir)
+
+    def dir_count(self):
+        return sum(1 for e in self._entries.values() if e.is_dir)
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,6 +1,7 @@
 import os
 from collections import defaultdict
-from utils.helpers import count_lines_in_file, is_text_file, format_file_size
+from utils.helpers import format_file_size
+from core.metadata_cache import get_metadata_cache
 
 class ProjectStats:
     """Calcula y mantiene estadísticas del proyecto"""
@@ -45,7 +46,8 @@ class ProjectStats:
         '.tiff': 'Image',
     }
     
-    def __init__(self):
+    def __init__(self, metadata_cache=None):
+        self._metadata_cache = metadata_cache
         self.stats = {
             'total_files': 0,
             'total_folders': 0,
@@ -57,7 +59,31 @@ class ProjectStats:
             'selected_size': 0
         }
     
-    def calculate_stats(self, filepaths):
+    @property
+    def metadata_cache(self):
+        """Caché persistente de líneas/tamaños (compartida por defecto)"""
+        return self._metadata_cache or get_metadata_cache()
+    
+    def _collect_metadata(self, filepaths, index=None):
+        """Metadatos vigentes de los archivos existentes, en el orden recibido
+        
+        Si se pasa el ProjectIndex, existencia, tamaño y mtime salen del índice;
+        el contenido solo se lee para archivos nuevos o modificados.
+        """
+        files = []
+        known = {}
+        for filepath in filepaths:
+            entry = index.get(filepath) if index is not None else None
+            if entry is not None:
+                if entry.is_dir:
+                    continue
+                known[filepath] = (entry.size, entry.mtime)
+            files.append(filepath)
+        
+        metadata = self.metadata_cache.get_many(files, known)
+        return [(fp, metadata[fp]) for fp in files if fp in metadata]
+    
+    def calculate_stats(self, filepaths, index=None):
         """Calcula estadísticas de una lista de archivos"""
         stats = {
             'total_files': 0,
@@ -66,26 +92,23 @@ class ProjectStats:
             'by_extension': defaultdict(lambda: {'count': 0, 'lines': 0, 'size': 0})
         }
         
-        for filepath in filepaths:
-            if not os.path.isfile(filepath):
-                continue
-            
+        try:
+            collected = self._collect_metadata(filepaths, index)
+        except Exception as e:
+            print(f"Error calculating stats: {e}")
+            return stats
+        
+        for filepath, meta in collected:
             stats['total_files'] += 1
+            stats['total_size'] += meta.size
             
-            try:
-                size = os.path.getsize(filepath)
-                stats['total_size'] += size
-                
-                ext = os.path.splitext(filepath)[1] or 'sin extensión'
-                stats['by_extension'][ext]['count'] += 1
-                stats['by_extension'][ext]['size'] += size
-                
-                if is_text_file(filepath):
-                    lines = count_lines_in_file(filepath)
-                    stats['total_lines'] += lines
-                    stats['by_extension'][ext]['lines'] += lines
-            except Exception as e:
-                print(f"Error calculating stats for {filepath}: {e}")
+            ext = os.path.splitext(filepath)[1] or 'sin extensión'
+            stats['by_extension'][ext]['count'] += 1
+            stats['by_extension'][ext]['size'] += meta.size
+            
+            if meta.is_text:
+                stats['total_lines'] += meta.lines
+                stats['by_extension'][ext]['lines'] += meta.lines
         
         return stats
     
@@ -143,14 +166,12 @@ class ProjectStats:
         """Obtiene los archivos con más líneas"""
         file_lines = []
         
-        for filepath in filepaths:
-            if not os.path.isfile(filepath) or not is_text_file(filepath):
+        for filepath, meta in self._collect_metadata(filepaths):
+            if not meta.is_text:
                 continue
-            
-            lines = count_lines_in_file(filepath)
             file_lines.append({
                 'path': filepath,
-                'lines': lines,
+                'lines': meta.lines,
                 'name': os.path.basename(filepath)
             })
         
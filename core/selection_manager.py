@@ -1,94 +1,546 @@
 import os
+import stat
+
+from core.metadata_cache import get_metadata_cache
+from core.project_index import IndexEntry, ProjectIndex
+
+# Estados del checkbox de un nodo del árbol
+CHECKED = "checked"
+PARTIAL = "partial"
+UNCHECKED = "unchecked"
+
+
+def _components(path):
+    """Divide una ruta en (clave normalizada, ruta acumulada) por componente"""
+    norm = os.path.normpath(path)
+    names = [n for i, n in enumerate(norm.split(os.sep)) if n or i == 0]
+    keys = os.path.normcase(norm).split(os.sep)[:len(names)]
+    parts = []
+    prefix = None
+    for name, key in zip(names, keys):
+        prefix = name + os.sep if prefix is None else os.path.join(prefix, name)
+        parts.append((key, prefix))
+    return parts
+
+
+class _Node:
+    """Nodo del trie de selección"""
+    __slots__ = ("path", "children", "state", "exclude", "totals")
+
+    def __init__(self, path):
+        self.path = path
+        self.children = {}   # clave normalizada del nombre -> _Node
+        self.state = None    # True/False explícito; None hereda del padre
+        self.exclude = None  # Filtro (ruta, es_carpeta) del subárbol marcado
+        self.totals = None   # (generación, archivos, bytes, líneas) cacheados
+
 
 class SelectionManager:
-    """Gestiona el estado de selección de archivos y carpetas"""
-    
+    """Gestiona el estado de selección de archivos y carpetas.
+
+    La selección es un trie de rutas: marcar una carpeta guarda un único
+    marcador de "subárbol completo" (con un filtro opcional de exclusión) y
+    las excepciones por debajo se guardan como nodos con estado propio. Los
+    archivos concretos se obtienen del índice del proyecto solo cuando se
+    piden, y los totales (archivos, bytes y líneas) se cachean por nodo y
+    por carpeta; los cambios en disco solo invalidan las rutas afectadas.
+    """
+
     def __init__(self):
-        self.selected_items = set()  # Paths absolutos
+        self._root = _Node("")
         self.selection_state = {}  # node_id -> estado
-    
+        self.index = None  # ProjectIndex de la carpeta abierta (opcional)
+        self._observers = []
+        self._files_cache = None  # (generación, [rutas])
+        self._tree_totals_cache = {}  # filtro -> {carpeta: (archivos, bytes, líneas)}
+        self._generation = 0
+        self._synced = (None, None)  # (índice, versión) con que se calcularon las cachés
+
+    def set_index(self, index, changes=None):
+        """Asigna el índice del proyecto para evitar recorrer el disco.
+
+        `changes` es (índice anterior, versión, rutas) de ProjectIndex.diff: si
+        las cachés se calcularon con ese índice en esa versión se conservan y
+        solo se descartan los totales de las rutas que cambiaron.
+        """
+        self.index = index
+        if index is not None and changes is not None:
+            previous, version, paths = changes
+            if self._synced == (previous, version):
+                self._synced = (index, index.version)
+                self.invalidate_paths(paths)
+
+    def subscribe(self, callback):
+        """Registra un callback que se llama cuando cambia la selección"""
+        if callback not in self._observers:
+            self._observers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Elimina el registro de un callback"""
+        if callback in self._observers:
+            self._observers.remove(callback)
+
+    def _notify_observers(self):
+        dead = []
+        for cb in self._observers:
+            try:
+                cb()
+            except Exception:
+                dead.append(cb)
+        for cb in dead:
+            self._observers.remove(cb)
+
+    # ── Modificación ────────────────────────────────────────────────────
+
     def toggle_selection(self, item_path):
         """Marca/desmarca un item"""
-        if item_path in self.selected_items:
-            self.selected_items.remove(item_path)
-            return False
-        else:
-            self.selected_items.add(item_path)
-            return True
-    
+        new_state = not self.is_selected(item_path)
+        self._set(item_path, new_state)
+        return new_state
+
     def select_item(self, item_path):
-        """Marca un item"""
-        self.selected_items.add(item_path)
-    
+        """Marca un item (si es carpeta, todo su contenido)"""
+        self._set(item_path, True)
+
     def deselect_item(self, item_path):
-        """Desmarca un item"""
-        self.selected_items.discard(item_path)
-    
+        """Desmarca un item (si es carpeta, todo su contenido)"""
+        self._set(item_path, False)
+
+    def select_all_in_folder(self, folder_path, exclude=None):
+        """Selecciona recursivamente todo en una carpeta.
+
+        `exclude(ruta, es_carpeta)` descarta descendientes (p.ej. ignorados);
+        se evalúa al expandir la selección, no al marcarla.
+        """
+        if not self._is_dir(folder_path):
+            return
+        self._set(folder_path, True, exclude)
+
+    def deselect_all_in_folder(self, folder_path):
+        """Deselecciona recursivamente todo en una carpeta"""
+        if not self._is_dir(folder_path):
+            return
+        self._set(folder_path, False)
+
+    def clear_selection(self):
+        """Limpia todas las selecciones"""
+        self._root.children.clear()
+        self._files_cache = None
+        self._prune_totals_cache()
+        self.selection_state.clear()
+        self._notify_observers()
+
+    def _set(self, path, state, exclude=None):
+        """Fija el estado de una ruta y descarta las excepciones por debajo"""
+        parts = _components(path)
+        chain = [self._root]
+        inherited, inherited_exclude = False, None
+        for key, prefix in parts:
+            node = chain[-1].children.get(key)
+            if node is None:
+                node = chain[-1].children[key] = _Node(prefix)
+            if len(chain) < len(parts) and node.state is not None:
+                inherited, inherited_exclude = node.state, node.exclude
+            chain.append(node)
+
+        node = chain[-1]
+        node.children.clear()
+        node.state = state
+        node.exclude = exclude if state else None
+        if state == inherited and node.exclude is None and (not state or inherited_exclude is None):
+            node.state = None  # Coincide con lo heredado
+
+        # Quitar nodos que ya no aportan nada
+        for i in range(len(chain) - 1, 0, -1):
+            current = chain[i]
+            if current.state is not None or current.children:
+                break
+            del chain[i - 1].children[parts[i - 1][0]]
+        for current in chain:
+            current.totals = None
+        self._files_cache = None
+        self._prune_totals_cache()
+        self._notify_observers()
+
+    # ── Consultas ───────────────────────────────────────────────────────
+
     def is_selected(self, item_path):
-        """Verifica si un item está seleccionado"""
-        return item_path in self.selected_items
-    
+        """Verifica si un item está seleccionado (O(profundidad))"""
+        parts = _components(item_path)
+        node = self._root
+        state, exclude, marker = False, None, -1
+        for depth, (key, _prefix) in enumerate(parts):
+            node = node.children.get(key)
+            if node is None:
+                break
+            if node.state is not None:
+                state, exclude, marker = node.state, node.exclude, depth
+        if not state or exclude is None:
+            return state
+        # Rutas filtradas bajo el marcador (carpetas ignoradas, archivos omitidos)
+        last = len(parts) - 1
+        for depth in range(marker + 1, len(parts)):
+            prefix = parts[depth][1]
+            if exclude(prefix, depth < last or self._is_dir(prefix)):
+                return False
+        return True
+
+    def get_check_state(self, item_path):
+        """CHECKED, PARTIAL o UNCHECKED según el item y sus descendientes"""
+        selected = self.is_selected(item_path)
+        node = self._find(item_path)
+        if node is not None and self._has_override(node, not selected):
+            return PARTIAL
+        return CHECKED if selected else UNCHECKED
+
     def get_selected_files(self):
         """Retorna solo archivos seleccionados"""
-        return [path for path in self.selected_items if os.path.isfile(path)]
-    
+        if not self._sync():
+            return [entry.path for entry in self._iter_selected()]
+        if self._files_cache is None or self._files_cache[0] != self._generation:
+            self._files_cache = (self._generation, [entry.path for entry in self._iter_selected()])
+        return list(self._files_cache[1])
+
+    def get_selected_totals(self, item_path=None):
+        """(archivos, bytes, líneas) seleccionados bajo una ruta (por defecto, todo)"""
+        self._sync()
+        if item_path is None:
+            return self._sum(self._node_totals(child, False, None) for child in self._root.children.values())
+
+        parts = _components(item_path)
+        node = self._root
+        state, exclude = False, None
+        for key, _prefix in parts:
+            if node.state is not None:
+                state, exclude = node.state, node.exclude
+            node = node.children.get(key)
+            if node is None:
+                break
+        if node is not None:
+            return self._node_totals(node, state, exclude)
+        # Sin nodo propio: toda la ruta hereda el estado del ancestro marcado
+        if not self.is_selected(item_path):
+            return (0, 0, 0)
+        if self._is_dir(item_path):
+            return self._tree_totals(item_path, self._inherited_exclude(parts))
+        return self._file_totals(self._stat(item_path))
+
+    def invalidate_paths(self, paths):
+        """Descarta solo los totales afectados por cambios en disco.
+
+        Se llama con las rutas que retorna ProjectIndex.apply_events; sin
+        esta llamada, un cambio de versión del índice descarta todo.
+        """
+        index = self.index
+        if index is None or self._synced[0] is not index:
+            return
+        changed = set()
+        ancestors = set()
+        for path in paths:
+            key = os.path.normcase(os.path.normpath(path))
+            changed.add(key)
+            while key not in ancestors:
+                ancestors.add(key)
+                up = os.path.dirname(key)
+                if up == key:
+                    break
+                key = up
+        if not changed:
+            self._synced = (index, index.version)
+            return
+
+        def under_changed(key):
+            while True:
+                if key in changed:
+                    return True
+                up = os.path.dirname(key)
+                if up == key:
+                    return False
+                key = up
+
+        # Carpetas memorizadas que contienen una ruta cambiada o están debajo
+        for memo in self._tree_totals_cache.values():
+            for stale in [k for k in memo if k in ancestors or under_changed(k)]:
+                del memo[stale]
+
+        # Nodos del trie en el camino y bajo las rutas
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            node.totals = None
+            for child in node.children.values():
+                key = os.path.normcase(os.path.normpath(child.path))
+                if key in ancestors or under_changed(key):
+                    stack.append(child)
+        self._files_cache = None
+        self._synced = (index, index.version)
+
     def get_selected_folders(self):
-        """Retorna solo carpetas seleccionadas"""
-        return [path for path in self.selected_items if os.path.isdir(path)]
-    
+        """Retorna las carpetas marcadas como subárbol completo"""
+        return [path for path in self.get_all_selected() if self._is_dir(path)]
+
     def get_all_selected(self):
-        """Retorna todos los items seleccionados"""
-        return list(self.selected_items)
-    
-    def clear_selection(self):
-        """Limpia todas las selecciones"""
-        self.selected_items.clear()
-        self.selection_state.clear()
-    
+        """Retorna las rutas marcadas explícitamente"""
+        marked = []
+        stack = list(self._root.children.values())
+        while stack:
+            node = stack.pop()
+            if node.state:
+                marked.append(node.path)
+            stack.extend(node.children.values())
+        return sorted(marked)
+
     def get_selection_count(self):
-        """Cuenta items seleccionados"""
-        return len(self.selected_items)
-    
-    def select_all_in_folder(self, folder_path):
-        """Selecciona recursivamente todo en una carpeta"""
-        if not os.path.isdir(folder_path):
-            return
-        
-        try:
-            for root, dirs, files in os.walk(folder_path):
-                # Agregar la carpeta actual
-                self.selected_items.add(root)
-                
-                # Agregar todos los archivos
-                for file in files:
-                    filepath = os.path.join(root, file)
-                    self.selected_items.add(filepath)
-                
-                # Agregar todas las subcarpetas
-                for dir_name in dirs:
-                    dirpath = os.path.join(root, dir_name)
-                    self.selected_items.add(dirpath)
-        except Exception as e:
-            print(f"Error selecting folder contents: {e}")
-    
-    def deselect_all_in_folder(self, folder_path):
-        """Deselecciona recursivamente todo en una carpeta"""
-        if not os.path.isdir(folder_path):
-            return
-        
-        # Crear lista temporal para evitar modificar durante iteración
-        to_remove = []
-        for item in self.selected_items:
-            if item.startswith(folder_path):
-                to_remove.append(item)
-        
-        for item in to_remove:
-            self.selected_items.discard(item)
-    
+        """Cuenta archivos seleccionados"""
+        return self.get_selected_totals()[0]
+
     def save_state(self, node_id, state):
         """Guarda el estado de un nodo del árbol"""
         self.selection_state[node_id] = state
-    
+
     def get_state(self, node_id):
         """Obtiene el estado de un nodo"""
-        return self.selection_state.get(node_id, False)
\ No newline at end of file
+        return self.selection_state.get(node_id, False)
+
+    # ── Trie ────────────────────────────────────────────────────────────
+
+    def _find(self, path):
+        node = self._root
+        for key, _prefix in _components(path):
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node
+
+    def _inherited_exclude(self, parts):
+        """Filtro del marcador explícito más profundo sobre la ruta"""
+        node, exclude = self._root, None
+        for key, _prefix in parts:
+            node = node.children.get(key)
+            if node is None:
+                break
+            if node.state is not None:
+                exclude = node.exclude
+        return exclude
+
+    @staticmethod
+    def _has_override(node, state):
+        stack = list(node.children.values())
+        while stack:
+            current = stack.pop()
+            if current.state is state:
+                return True
+            stack.extend(current.children.values())
+        return False
+
+    def _resolve(self, node, state, exclude):
+        """Estado efectivo de un nodo dado lo que hereda: (es_carpeta, estado, filtro)"""
+        is_dir = bool(node.children) or self._is_dir(node.path)
+        if node.state is not None:
+            return is_dir, node.state, node.exclude
+        if state and exclude is not None and exclude(node.path, is_dir):
+            return is_dir, False, None
+        return is_dir, state, exclude
+
+    def _iter_selected(self):
+        for child in self._root.children.values():
+            yield from self._iter_node(child, False, None)
+
+    def _iter_node(self, node, state, exclude):
+        """Entradas de archivo seleccionadas bajo un nodo del trie"""
+        is_dir, state, exclude = self._resolve(node, state, exclude)
+        if not is_dir:
+            entry = self._stat(node.path) if state else None
+            if entry is not None:
+                yield entry
+            return
+        if not state:
+            for child in node.children.values():
+                yield from self._iter_node(child, False, None)
+            return
+        if not node.children:
+            yield from self._iter_tree(node.path, exclude)
+            return
+        for entry in self._listing(node.path):
+            child = node.children.get(os.path.normcase(entry.name))
+            if child is not None:
+                yield from self._iter_node(child, True, exclude)
+            elif exclude is not None and exclude(entry.path, entry.is_dir):
+                continue
+            elif entry.is_dir:
+                yield from self._iter_tree(entry.path, exclude)
+            else:
+                yield entry
+
+    def _iter_tree(self, top, exclude):
+        """Archivos bajo `top` (sin excepciones del trie) aplicando el filtro"""
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            subdirs = []
+            for entry in self._listing(dirpath):
+                if exclude is not None and exclude(entry.path, entry.is_dir):
+                    continue
+                if entry.is_dir:
+                    subdirs.append(entry.path)
+                else:
+                    yield entry
+            stack.extend(reversed(subdirs))
+
+    def _node_totals(self, node, state, exclude):
+        """(archivos, bytes, líneas) de un nodo; se cachea mientras no cambie nada debajo"""
+        caching = self.index is not None
+        if caching and node.totals is not None and node.totals[0] == self._generation:
+            return node.totals[1:]
+
+        is_dir, state, exclude = self._resolve(node, state, exclude)
+        if not is_dir:
+            totals = self._file_totals(self._stat(node.path) if state else None)
+        elif not state:
+            totals = self._sum(self._node_totals(child, False, None) for child in node.children.values())
+        elif not node.children:
+            totals = self._tree_totals(node.path, exclude)
+        else:
+            parts = []
+            files = []
+            for entry in self._listing(node.path):
+                child = node.children.get(os.path.normcase(entry.name))
+                if child is not None:
+                    parts.append(self._node_totals(child, True, exclude))
+                elif exclude is not None and exclude(entry.path, entry.is_dir):
+                    continue
+                elif entry.is_dir:
+                    parts.append(self._tree_totals(entry.path, exclude))
+                else:
+                    files.append(entry)
+            lines = self._line_counts(files)
+            parts.extend((1, entry.size, lines.get(entry.path, 0)) for entry in files)
+            totals = self._sum(parts)
+
+        if caching:
+            node.totals = (self._generation,) + totals
+        return totals
+
+    def _tree_totals(self, top, exclude):
+        """(archivos, bytes, líneas) de un subárbol completo, memorizado por carpeta
+
+        Recorre solo las carpetas que no estén ya memorizadas y pide las líneas
+        de todos sus archivos en una sola consulta a la caché de metadatos.
+        """
+        memo = self._tree_totals_cache.setdefault(exclude, {}) if self.index is not None else {}
+        top_key = os.path.normcase(os.path.normpath(top))
+        if top_key in memo:
+            return memo[top_key]
+
+        pending = []  # (carpeta, subcarpetas, archivos) en preorden
+        stack = [top]
+        while stack:
+            dirpath = stack.pop()
+            key = os.path.normcase(os.path.normpath(dirpath))
+            if key in memo:
+                continue
+            files, subdirs = [], []
+            for entry in self._listing(dirpath):
+                if exclude is not None and exclude(entry.path, entry.is_dir):
+                    continue
+                (subdirs if entry.is_dir else files).append(entry)
+            pending.append((key, [os.path.normcase(os.path.normpath(d.path)) for d in subdirs], files))
+            stack.extend(d.path for d in subdirs)
+
+        lines = self._line_counts([entry for _key, _subdirs, files in pending for entry in files])
+        # En orden inverso cada carpeta se suma después de sus subcarpetas
+        for key, subdirs, files in reversed(pending):
+            parts = [(1, entry.size, lines.get(entry.path, 0)) for entry in files]
+            parts.extend(memo[sub] for sub in subdirs)
+            memo[key] = self._sum(parts)
+        return memo[top_key]
+
+    def _file_totals(self, entry):
+        if entry is None:
+            return (0, 0, 0)
+        return (1, entry.size, self._line_counts([entry]).get(entry.path, 0))
+
+    @staticmethod
+    def _line_counts(entries):
+        """Líneas de cada archivo de texto según la caché de metadatos"""
+        if not entries:
+            return {}
+        stats = {entry.path: (entry.size, entry.mtime) for entry in entries}
+        metadata = get_metadata_cache().get_many(list(stats), stats)
+        return {path: (meta.lines or 0) if meta.is_text else 0 for path, meta in metadata.items()}
+
+    @staticmethod
+    def _sum(parts):
+        count = size = lines = 0
+        for files, nbytes, nlines in parts:
+            count += files
+            size += nbytes
+            lines += nlines
+        return count, size, lines
+
+    def _sync(self):
+        """Descarta las cachés si el índice cambió sin invalidate_paths.
+
+        Retorna False si no hay índice (entonces no se cachea nada).
+        """
+        index = self.index
+        if index is None:
+            return False
+        if self._synced[0] is not index or self._synced[1] != index.version:
+            self._generation += 1
+            self._tree_totals_cache = {}
+            self._files_cache = None
+            self._synced = (index, index.version)
+        return True
+
+    def _prune_totals_cache(self):
+        """Olvida los totales memorizados con filtros que ya no usa ningún marcador"""
+        live = {None}
+        stack = list(self._root.children.values())
+        while stack:
+            node = stack.pop()
+            live.add(node.exclude)
+            stack.extend(node.children.values())
+        for exclude in [e for e in self._tree_totals_cache if e not in live]:
+            del self._tree_totals_cache[exclude]
+
+    # ── Acceso al índice / disco ────────────────────────────────────────
+
+    def _covering_index(self, path):
+        index = self.index
+        if index is not None and index.covers(path):
+            return index
+        return None
+
+    def _is_dir(self, path):
+        index = self._covering_index(path)
+        if index is not None:
+            return index.is_dir(path)
+        return os.path.isdir(path)
+
+    def _stat(self, path):
+        """Entrada de un archivo existente o None"""
+        index = self._covering_index(path)
+        if index is not None:
+            entry = index.get(path)
+            return entry if entry is not None and not entry.is_dir else None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        return IndexEntry(path=path, name=os.path.basename(path), is_dir=False,
+                          size=st.st_size, mtime=st.st_mtime)
+
+    def _listing(self, dirpath):
+        """Hijos directos de una carpeta, del índice o (si no lo cubre) del disco"""
+        index = self._covering_index(dirpath)
+        if index is not None:
+            return index.list_children(dirpath)
+        try:
+            with os.scandir(dirpath) as it:
+                records = [ProjectIndex._record_from_entry(e, dirpath) for e in it]
+        except OSError:
+            return []
+        return sorted((r for r in records if r is not None), key=lambda r: r.name)
@@ -0,0 +1,113 @@
+import re
+
+from core.content_search import read_file
+from core.file_classifier import is_text_file
+
+
+DEFAULT_TAGS = ("TODO", "FIXME", "BUG")
+MAX_FILE_SIZE = 10 * 1024 * 1024  # Mismo límite que safe_read_file
+
+# Sintaxis de comentario: (nombre, apertura, cierre obligatorio en la misma línea)
+COMMENT_SYNTAXES = (
+    ("hash", rb"\#", None),
+    ("line", rb"//", None),
+    ("block", rb"/\*", rb"[^\S\n]*\*/"),
+    ("html", rb"<!--", rb"[^\S\n]*-->"),
+)
+
+
+def normalize_tags(tags):
+    """Etiquetas en mayúsculas, sin vacías ni repetidas, en el orden dado"""
+    cleaned = (str(tag).strip().upper() for tag in tags or ())
+    return tuple(dict.fromkeys(tag for tag in cleaned if tag))
+
+
+def build_pattern(tags):
+    """Una sola regex (bytes) con una alternativa por sintaxis de comentario.
+
+    Cada alternativa tiene los grupos `<sintaxis>_tag` y `<sintaxis>_text`;
+    todo va dentro de un lookahead para que finditer pruebe cada apertura
+    aunque otra coincidencia de la misma línea ya la cubra.
+    """
+    alternation = b"|".join(
+        re.escape(tag.encode("utf-8"))
+        for tag in sorted(tags, key=len, reverse=True)
+    )
+    branches = []
+    space = rb"[^\S\n]*"  # \s sin cruzar a la línea siguiente
+    for name, opener, closer in COMMENT_SYNTAXES:
+        group = name.encode()
+        branch = (opener + space + rb"(?P<" + group + rb"_tag>" + alternation + rb"):?" + space
+                  + rb"(?P<" + group + rb"_text>.+)")
+        if closer is not None:
+            branch += closer
+        branches.append(branch)
+    return re.compile(rb"(?=" + rb"|".join(branches) + rb")", re.IGNORECASE)
+
+
+class TodoScanner:
+    """Detecta TODO/FIXME/BUG (y etiquetas propias) en una sola pasada por archivo.
+
+    Sobre el buffer en minúsculas se buscan solo las etiquetas (bytes.find); la
+    regex combinada se ejecuta únicamente en las líneas donde aparece alguna,
+    y los números de línea salen de contar saltos entre coincidencias.
+    """
+
+    def __init__(self, tags=DEFAULT_TAGS):
+        self.tags = normalize_tags(tags) or DEFAULT_TAGS
+        self._needles = tuple(tag.encode("utf-8").lower() for tag in self.tags)
+        self._pattern = build_pattern(self.tags)
+
+    def scan_file(self, filepath):
+        """Hallazgos de un archivo ([] si es binario, enorme o ilegible)"""
+        if not is_text_file(filepath):
+            return []
+        buf = read_file(filepath, MAX_FILE_SIZE)
+        if not buf:
+            return []
+        return self.scan_buffer(buf)
+
+    def scan_buffer(self, buf):
+        """[{type, line, text, full_line}] en orden de aparición"""
+        lowered = buf.lower()
+        hits = []
+        for needle in self._needles:
+            pos = lowered.find(needle)
+            while pos >= 0:
+                hits.append(pos)
+                pos = lowered.find(needle, pos + 1)
+        if not hits:
+            return []
+        hits.sort()
+
+        findings = []
+        line_no = 1
+        counted_to = 0
+        next_line = 0
+        for pos in hits:
+            if pos < next_line:
+                continue  # Línea ya examinada
+            line_start = buf.rfind(b"\n", 0, pos) + 1
+            line_end = buf.find(b"\n", pos)
+            if line_end < 0:
+                line_end = len(buf)
+            next_line = line_end + 1
+            full_line = None
+            seen = set()  # Como antes: una coincidencia por sintaxis y etiqueta en cada línea
+            for match in self._pattern.finditer(buf, line_start, line_end):
+                name = match.lastgroup[:-len("_text")]
+                tag = match.group(name + "_tag").decode("utf-8", "ignore").upper()
+                if (name, tag) in seen:
+                    continue
+                seen.add((name, tag))
+                if full_line is None:
+                    line_no += buf.count(b"\n", counted_to, line_start)
+                    counted_to = line_start
+                    full_line = buf[line_start:line_end].decode("utf-8", "ignore").strip()
+                findings.append({
+                    "type": tag,
+                    "line": line_no,
+                    "text": match.group(name + "_text").decode("utf-8", "ignore").strip(),
+                    "full_line": full_line,
+                })
+        return findings
@@ -0,0 +1,533 @@
+import array
+import hashlib
+import os
+import pickle
+import re
+import sys
+import threading
+from collections import defaultdict, deque
+from itertools import accumulate, chain, repeat
+from operator import sub
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+from core.content_search import MAX_FILE_SIZE, SEARCH_WORKERS, get_search_pool, read_file
+from core.file_classifier import SNIFF_SIZE, classify_by_name
+from utils.helpers import app_base_path
+
+
+FORMAT_VERSION = 1
+SEGMENT_FILES = 2000        # Archivos por segmento de postings (y por tarea del pool)
+WORD_CACHE_SIZE = 200_000   # Palabras cuyo conjunto de trigramas se recuerda
+COMPACT_RATIO = 0.25        # Fracción de archivos borrados que compacta al guardar
+FEW_CANDIDATES = 32         # Con tan pocos candidatos no compensa decodificar más trigramas
+
+_WORD_RE = re.compile(rb"\w{3,}")
+
+
+def default_index_path(root_path):
+    """Archivo persistente del índice de trigramas de una carpeta (bajo data/)"""
+    key = os.path.normcase(os.path.abspath(root_path)).encode("utf-8", "surrogatepass")
+    digest = hashlib.sha1(key).hexdigest()[:16]
+    return os.path.join(app_base_path(), "data", "trigram_index", f"{digest}.bin")
+
+
+# ── Trigramas ───────────────────────────────────────────────────────────
+#
+# Solo se indexan trigramas dentro de palabras ASCII ([A-Za-z0-9_]) en
+# minúsculas: cualquier literal de la consulta aparece tal cual en el
+# archivo, así que los trigramas de sus palabras también están en las
+# palabras del archivo. El índice sirve igual para consultas con y sin
+# distinción de mayúsculas; la regex decide al verificar.
+
+_word_grams = {}
+
+
+def _grams_of_word(word):
+    grams = _word_grams.get(word)
+    if grams is None:
+        if len(_word_grams) >= WORD_CACHE_SIZE:
+            _word_grams.clear()
+        grams = _word_grams[word] = [word[i:i + 3] for i in range(len(word) - 2)]
+    return grams
+
+
+def extract_trigrams(buf):
+    """Conjunto de trigramas (bytes de 3) de las palabras de un buffer"""
+    words = set(_WORD_RE.findall(buf.lower()))
+    lists = list(map(_word_grams.get, words))
+    if None in lists:
+        lists = list(map(_grams_of_word, words))
+    return set(chain.from_iterable(lists))
+
+
+def _read_grams(path):
+    """((tamaño, mtime), trigramas) de un archivo; sin trigramas si es binario o enorme"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None, ()
+    buf = read_file(path) if st.st_size <= MAX_FILE_SIZE else None
+    if not buf or b"\0" in buf[:SNIFF_SIZE]:
+        return (st.st_size, st.st_mtime), ()
+    return (st.st_size, st.st_mtime), extract_trigrams(buf)
+
+
+# ── Postings ────────────────────────────────────────────────────────────
+
+def _encode(fids):
+    """Lista ordenada de ids -> tipo del array + primer id + diferencias consecutivas"""
+    deltas = array.array("I", map(sub, fids[1:], fids[:-1])) if len(fids) > 1 else array.array("I")
+    top = max(deltas, default=0)
+    typecode = "B" if top < 0x100 else "H" if top < 0x10000 else "I"
+    if typecode != "I":
+        deltas = array.array(typecode, deltas)
+    return typecode.encode() + fids[0].to_bytes(4, "little") + deltas.tobytes()
+
+
+def _decode(blob):
+    deltas = array.array(chr(blob[0]))
+    deltas.frombytes(blob[5:])
+    return accumulate(deltas, initial=int.from_bytes(blob[1:5], "little"))
+
+
+def index_files(root, relpaths, first_fid):
+    """Indexa una tanda de archivos (se ejecuta en el pool de procesos).
+
+    Retorna (segmento {trigrama: postings codificados}, [(tamaño, mtime)]);
+    el archivo i de la tanda recibe el id first_fid + i.
+    """
+    postings = defaultdict(list)
+    stamps = []
+    for fid, rel in enumerate(relpaths, first_fid):
+        stamp, grams = _read_grams(os.path.join(root, rel))
+        stamps.append(stamp or (-1, 0.0))
+        # Equivale a `for g in grams: postings[g].append(fid)` sin bucle en Python
+        deque(map(list.append, map(postings.__getitem__, grams), repeat(fid)), maxlen=0)
+    return {gram: _encode(fids) for gram, fids in postings.items()}, stamps
+
+
+# ── Plan de consulta ────────────────────────────────────────────────────
+
+def query_plan(pattern, regex=False):
+    """Árbol de trigramas que toda coincidencia exige; None si no acota nada.
+
+    Nodos: frozenset de trigramas (todos obligatorios), ("and", [...]) y
+    ("or", [...]). Para regex se recorre el árbol de sre_parse: las
+    secuencias de literales son obligatorias, las alternativas se unen y
+    las repeticiones opcionales o las clases cortan la secuencia.
+    """
+    if not regex:
+        return _literal_node(pattern)
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error:
+        return None
+    return _sequence_plan(parsed)
+
+
+def _literal_node(text):
+    grams = set()
+    for word in _WORD_RE.findall(text.encode("utf-8").lower()):
+        grams.update(_grams_of_word(word))
+    return frozenset(grams) or None
+
+
+def _sequence_plan(items):
+    nodes = []
+    run = []
+
+    def flush():
+        if run:
+            node = _literal_node("".join(run))
+            if node is not None:
+                nodes.append(node)
+            run.clear()
+
+    def visit(items):
+        for op, value in items:
+            if op is sre_parse.LITERAL:
+                run.append(chr(value))
+            elif op is sre_parse.SUBPATTERN:
+                visit(value[-1])  # El índice no distingue mayúsculas: los flags no importan
+            elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and value[0] >= 1:
+                flush()
+                node = _sequence_plan(value[2])
+                if node is not None:
+                    nodes.append(node)
+            elif op is sre_parse.BRANCH:
+                flush()
+                branches = [_sequence_plan(branch) for branch in value[1]]
+                if all(branch is not None for branch in branches):
+                    nodes.append(("or", branches))
+            elif op is sre_parse.AT:
+                continue  # Anclas (^, $, \b) no consumen texto
+            else:
+                flush()
+
+    visit(items)
+    flush()
+    if not nodes:
+        return None
+    return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+
+# ── Índice ──────────────────────────────────────────────────────────────
+
+class TrigramIndex:
+    """Índice persistente de trigramas -> archivos para acotar búsquedas de contenido.
+
+    Los postings viven en segmentos de SEGMENT_FILES archivos, cada lista
+    codificada como diferencias entre ids en el array más pequeño que las
+    admite. Los archivos que cambian se marcan pendientes (siguen siendo
+    candidatos) y se reindexan con `refresh` en un segmento de cola; su id
+    anterior queda muerto hasta que `save` compacta. Hilos: consultas y
+    eventos toman `_lock`; la lectura de archivos ocurre fuera de él.
+    """
+
+    def __init__(self, root_path, ignore=None):
+        self.root_path = root_path
+        self.ignore = ignore
+        self._prefix = root_path.rstrip(os.sep) + os.sep
+        self._paths = []              # id -> ruta relativa (None si ya no es válido)
+        self._sizes = array.array("q")
+        self._mtimes = array.array("d")
+        self._fids = {}               # ruta relativa -> id válido
+        self._dead = 0
+        self._segments = []           # [{trigrama: postings codificados}]
+        self._tail = {}               # trigrama -> [id] indexados desde el último segmento
+        self._tail_files = 0
+        self._pending = set()         # Rutas relativas por (re)indexar
+        self._in_flight = set()       # Pendientes que `refresh` está leyendo ahora
+        self._needs_sync = False      # Hubo cambios de carpetas: falta comparar con el ProjectIndex
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self.version = 0
+        self.saved_version = -1
+
+    def __len__(self):
+        return len(self._fids)
+
+    # ── Construcción ────────────────────────────────────────────────────
+
+    @classmethod
+    def from_project_index(cls, project_index, ignore=None):
+        """Indexa todos los archivos de texto del ProjectIndex (tandas en el pool si hay núcleos)"""
+        index = cls(project_index.root_path, ignore)
+        relpaths = list(index._wanted_files(project_index))
+        index._add_segments(relpaths)
+        index.version += 1
+        return index
+
+    def _wanted_files(self, project_index):
+        """(ruta relativa, tamaño, mtime) de los archivos que se indexan"""
+        for entry in project_index.iter_files():
+            rel = self._relative(entry.path)
+            if rel is not None and self._wanted(entry.path):
+                yield rel, entry.size, entry.mtime
+
+    def _wanted(self, path):
+        if classify_by_name(path) is False:
+            return False
+        return self.ignore is None or not self.ignore.is_ignored(path, is_dir=False)
+
+    def _relative(self, path):
+        return path[len(self._prefix):] if path.startswith(self._prefix) else None
+
+    def _add_segments(self, relpaths):
+        rels = [rel for rel, _size, _mtime in relpaths]
+        first = len(self._paths)
+        tasks = [(self.root_path, rels[i:i + SEGMENT_FILES], first + i)
+                 for i in range(0, len(rels), SEGMENT_FILES)]
+        if len(tasks) > 1 and SEARCH_WORKERS > 1:
+            results = get_search_pool().map(index_files, *zip(*tasks))
+        else:
+            results = (index_files(*task) for task in tasks)
+        for (_root, chunk, _first), (segment, stamps) in zip(tasks, results):
+            for rel, (size, mtime) in zip(chunk, stamps):
+                self._fids[rel] = len(self._paths)
+                self._paths.append(rel)
+                self._sizes.append(size)
+                self._mtimes.append(mtime)
+            if segment:
+                self._segments.append(segment)
+
+    # ── Actualización incremental ───────────────────────────────────────
+
+    def apply_events(self, events):
+        """Marca los cambios del FileSystemWatcher; la lectura queda para `refresh`"""
+        changed = False
+        with self._lock:
+            for event in events:
+                rel = self._relative(event.path)
+                if rel is None:
+                    if event.is_dir and event.path.rstrip(os.sep) == self.root_path.rstrip(os.sep):
+                        self._needs_sync = True  # Eventos perdidos
+                        changed = True
+                    continue
+                if event.is_dir:
+                    if event.kind == "deleted":
+                        inner = rel + os.sep
+                        for sub_rel in [r for r in self._fids if r.startswith(inner)]:
+                            self._kill(sub_rel)
+                        self._pending = {r for r in self._pending if not r.startswith(inner)}
+                        self._in_flight = {r for r in self._in_flight if not r.startswith(inner)}
+                    else:
+                        self._needs_sync = True  # Carpeta nueva o movida: recorrer al sincronizar
+                    changed = True
+                    continue
+                self._kill(rel)
+                self._in_flight.discard(rel)
+                if event.kind == "deleted":
+                    self._pending.discard(rel)
+                elif self._wanted(event.path):
+                    self._pending.add(rel)
+                changed = True
+            if changed:
+                self.version += 1
+        return changed
+
+    def _kill(self, rel):
+        fid = self._fids.pop(rel, None)
+        if fid is not None:
+            self._paths[fid] = None
+            self._dead += 1
+
+    def sync(self, project_index):
+        """Compara con el ProjectIndex: marca pendientes los archivos nuevos o con otro tamaño/mtime"""
+        wanted = {rel: (size, mtime) for rel, size, mtime in self._wanted_files(project_index)}
+        with self._lock:
+            for rel, fid in list(self._fids.items()):
+                stamp = wanted.get(rel)
+                if stamp is None:
+                    self._kill(rel)
+                elif stamp != (self._sizes[fid], self._mtimes[fid]):
+                    self._kill(rel)
+            self._pending.intersection_update(wanted)
+            self._pending.update(rel for rel in wanted if rel not in self._fids)
+            self._needs_sync = False
+            self.version += 1
+
+    @property
+    def pending_count(self):
+        return len(self._pending)
+
+    def refresh(self, project_index=None):
+        """Reindexa los archivos pendientes (llamar desde un hilo de fondo)"""
+        with self._refresh_lock:
+            if self._needs_sync and project_index is not None:
+                self.sync(project_index)
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        return
+                    batch = sorted(self._pending)[:SEGMENT_FILES]
+                    self._pending.difference_update(batch)
+                    self._in_flight = set(batch)
+                read = [(rel, *_read_grams(os.path.join(self.root_path, rel))) for rel in batch]
+                with self._lock:
+                    for rel, stamp, grams in read:
+                        if rel not in self._in_flight or stamp is None:
+                            continue  # Cambió o se borró mientras se leía
+                        fid = len(self._paths)
+                        self._fids[rel] = fid
+                        self._paths.append(rel)
+                        self._sizes.append(stamp[0])
+                        self._mtimes.append(stamp[1])
+                        for gram in grams:
+                            self._tail.setdefault(gram, []).append(fid)
+                        self._tail_files += 1
+                    self._in_flight = set()
+                    if self._tail_files >= SEGMENT_FILES:
+                        self._seal_tail()
+                    self.version += 1
+
+    def _seal_tail(self):
+        if self._tail:
+            self._segments.append({gram: _encode(fids) for gram, fids in self._tail.items()})
+        self._tail = {}
+        self._tail_files = 0
+
+    # ── Consultas ───────────────────────────────────────────────────────
+
+    def candidates(self, pattern, regex=False):
+        """Rutas absolutas que pueden contener coincidencias; None si no se puede acotar.
+
+        Incluye los archivos pendientes de reindexar. Sin trigramas útiles en
+        la consulta (p.ej. "ab" o ".*") o con carpetas sin sincronizar, el
+        llamador debe recorrer todos los archivos.
+        """
+        plan = query_plan(pattern, regex)
+        if plan is None:
+            return None
+        with self._lock:
+            if self._needs_sync:
+                return None
+            fids = self._evaluate(plan)
+            if fids is None:
+                return None
+            paths = self._paths
+            found = [paths[fid] for fid in sorted(fids) if paths[fid] is not None]
+            found.extend(sorted(self._pending | self._in_flight))
+        join = os.path.join
+        return [join(self.root_path, rel) for rel in found]
+
+    def narrow(self, paths, pattern, regex=False):
+        """Filtra `paths` con los candidatos; None si no se puede acotar.
+
+        Solo descarta rutas que el índice sigue: las que no conoce (fuera de
+        la raíz, bajo carpetas ignoradas, sin indexar) se conservan.
+        """
+        found = self.candidates(pattern, regex)
+        if found is None:
+            return None
+        keep = set(found)
+        relative = self._relative
+        with self._lock:
+            tracked = (self._fids, self._pending, self._in_flight)
+            return [path for path in paths
+                    if path in keep or not any(relative(path) in known for known in tracked)]
+
+    def _evaluate(self, node):
+        """Conjunto de ids que cumplen el nodo; None = cualquiera"""
+        if isinstance(node, frozenset):
+            return self._all_of(node)
+        kind, children = node
+        if kind == "or":
+            result = set()
+            for child in children:
+                fids = self._evaluate(child)
+                if fids is None:
+                    return None
+                result |= fids
+            return result
+        result = None
+        for child in children:
+            fids = self._evaluate(child)
+            if fids is not None:
+                result = fids if result is None else result & fids
+                if not result:
+                    break
+        return result
+
+    def _all_of(self, grams):
+        """Intersección de postings, de la lista más corta a la más larga"""
+        def cost(gram):
+            return sum(len(segment.get(gram, b"")) for segment in self._segments) \
+                + 4 * len(self._tail.get(gram, ()))
+
+        result = None
+        for gram in sorted(grams, key=cost):
+            fids = self._postings(gram)
+            result = fids if result is None else result & fids
+            if len(result) <= FEW_CANDIDATES:
+                break
+        return result
+
+    def _postings(self, gram):
+        fids = set()
+        for segment in self._segments:
+            blob = segment.get(gram)
+            if blob is not None:
+                fids.update(_decode(blob))
+        fids.update(self._tail.get(gram, ()))
+        return fids
+
+    # ── Persistencia ────────────────────────────────────────────────────
+
+    def save(self, path=None):
+        """Guarda el índice (compacta si hay muchos ids muertos)"""
+        path = path or default_index_path(self.root_path)
+        with self._lock:
+            if self._dead > COMPACT_RATIO * max(len(self._paths), 1):
+                self._compact()
+            self._seal_tail()
+            data = {
+                "format": FORMAT_VERSION,
+                "byteorder": sys.byteorder,
+                "root": self.root_path,
+                "paths": "\0".join(rel or "" for rel in self._paths),
+                "sizes": self._sizes.tobytes(),
+                "mtimes": self._mtimes.tobytes(),
+                "segments": self._segments,
+                "pending": sorted(self._pending | self._in_flight),
+            }
+            version = self.version
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self.saved_version = version
+            return True
+        except OSError as e:
+            print(f"Error saving trigram index {path}: {e}")
+            return False
+
+    @classmethod
+    def load(cls, root_path, path=None, ignore=None):
+        """Carga el índice guardado de una carpeta; None si no hay o no es válido"""
+        path = path or default_index_path(root_path)
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Error loading trigram index {path}: {e}")
+            return None
+        if not isinstance(data, dict) or data.get("format") != FORMAT_VERSION \
+                or data.get("byteorder") != sys.byteorder \
+                or os.path.normcase(data.get("root", "")) != os.path.normcase(root_path):
+            return None
+
+        index = cls(root_path, ignore)
+        index._paths = [rel or None for rel in data["paths"].split("\0")] if data["paths"] else []
+        index._sizes.frombytes(data["sizes"])
+        index._mtimes.frombytes(data["mtimes"])
+        index._fids = {rel: fid for fid, rel in enumerate(index._paths) if rel is not None}
+        index._dead = len(index._paths) - len(index._fids)
+        index._segments = data["segments"]
+        index._pending = set(data["pending"])
+        index.version += 1
+        index.saved_version = index.version
+        return index
+
+    def _compact(self):
+        """Renumera los ids válidos y reescribe los postings sin los muertos"""
+        remap = array.array("i", [-1]) * len(self._paths)
+        paths = []
+        sizes = array.array("q")
+        mtimes = array.array("d")
+        for fid, rel in enumerate(self._paths):
+            if rel is not None:
+                remap[fid] = len(paths)
+                paths.append(rel)
+                sizes.append(self._sizes[fid])
+                mtimes.append(self._mtimes[fid])
+
+        def rewrite(fids):
+            return [new for new in map(remap.__getitem__, fids) if new >= 0]
+
+        segments = []
+        for segment in self._segments:
+            rewritten = {}
+            for gram, blob in segment.items():
+                fids = rewrite(_decode(blob))
+                if fids:
+                    rewritten[gram] = _encode(fids)
+            if rewritten:
+                segments.append(rewritten)
+        tail = {}
+        for gram, fids in self._tail.items():
+            fids = rewrite(fids)
+            if fids:
+                tail[gram] = fids
+
+        self._paths, self._sizes, self._mtimes = paths, sizes, mtimes
+        self._fids = {rel: fid for fid, rel in enumerate(paths)}
+        self._segments, self._tail = segments, tail
+        self._dead = 0
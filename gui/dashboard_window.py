@@ -7,6 +7,9 @@ import subprocess
 import matplotlib
 from gui.components import CustomToplevel
 from utils.helpers import resource_path
+from core.ignore import get_ignore_engine
+from core.analysis_runner import AnalysisRunner
+from core.clone_detector import find_clones
 matplotlib.use('TkAgg')
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
@@ -149,15 +152,6 @@ class DashboardWindow(CustomToplevel):
         self.apply_theme()
         self.language_manager.subscribe(self.update_ui_language)
 
-    _IGNORED_DIRS = {
-        "node_modules", "venv", ".venv", "env", ".env",
-        "__pycache__", ".git", ".svn", ".hg", "dist", "build",
-    }
-    _IGNORED_EXTS = {
-        ".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz",
-        ".whl", ".egg", ".pyc", ".pyo",
-    }
-
     def _dbg(self, message):
         try:
             print(f"[Dashboard][Top] {message}")
@@ -1205,12 +1199,8 @@ class DashboardWindow(CustomToplevel):
             fp = os.path.normpath(fp)
             if not fp or not os.path.isfile(fp):
                 return False
-            ext = os.path.splitext(fp)[1].lower()
-            if ext in self._IGNORED_EXTS:
-                return False
-            normalized = fp.replace("\\", "/")
-            parts = {p.lower() for p in normalized.split("/") if p}
-            return not any(p in self._IGNORED_DIRS for p in parts)
+            root = self.file_manager.root_path or os.path.dirname(fp)
+            return not get_ignore_engine(root, "selection").is_ignored(fp, is_dir=False)
         except Exception:
             return False
 
@@ -1418,7 +1408,6 @@ class DashboardWindow(CustomToplevel):
 
     def _scan_todos_worker(self):
         import time
-        import ast
         
         try:
             if not self._selected_files:
@@ -1427,42 +1416,36 @@ class DashboardWindow(CustomToplevel):
                 empty_message = "aqui, no hay archivos seleccionados para analizar"
             else:
                 start_time = time.time()
-                total_files = len(self._selected_files)
+                
+                # TODOs y errores de sintaxis se analizan en el pool de procesos;
+                # el progreso llega agrupado (un solo after() por aviso)
+                def on_progress(done, total):
+                    elapsed = time.time() - start_time
+                    pct = int(done / total * 100) if total else 100
+                    rate = done / elapsed if elapsed > 0 else 0
+                    remaining = (total - done) / rate if rate > 0 else 0
+                    status_msg = f"{done}/{total} archivos  a {pct}%  a  {remaining:.1f}s"
+                    self.after(0, lambda: self._set_todos_progress(status_msg, pct))
+                
+                results = AnalysisRunner(
+                    self._selected_files,
+                    on_progress,
+                    tags=self.code_analyzer.todo_scanner.tags,
+                ).run()
                 
                 findings = {}
                 syntax_errors = {}
-                
-                for i, fp in enumerate(self._selected_files):
-                    try:
-                        partial = self.code_analyzer.find_todos_in_files([fp])
-                        if partial:
-                            findings.update(partial)
-                        
-                        # Errores de sintaxis Python
-                        if fp.endswith('.py'):
-                            try:
-                                with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-                                    ast.parse(f.read())
-                            except SyntaxError as e:
-                                if fp not in syntax_errors:
-                                    syntax_errors[fp] = []
-                                syntax_errors[fp].append({
-                                    'line': e.lineno,
-                                    'msg': str(e.msg),
-                                    'text': e.text.strip() if e.text else ''
-                                })
-                    except:
-                        pass
-                    
-                    if i % 5 == 0 or i == total_files - 1:
-                        elapsed = time.time() - start_time
-                        pct = int((i + 1) / total_files * 100) if total_files else 100
-                        rate = (i + 1) / elapsed if elapsed > 0 else 0
-                        remaining = (total_files - i - 1) / rate if rate > 0 else 0
-                        
-                        status_msg = f"{i + 1}/{total_files} archivos  a {pct}%  a  {remaining:.1f}s"
-                        self.after(0, lambda msg=status_msg: self._todos_overlay.set_sub(msg))
-                        self.after(0, lambda p=pct: self._todos_overlay.set_bar(p))
+                for result in results:
+                    if result.todos:
+                        findings[result.path] = [
+                            {'type': kind, 'line': line, 'text': text}
+                            for kind, line, text in result.todos
+                        ]
+                    if result.syntax_errors:
+                        syntax_errors[result.path] = [
+                            {'line': line, 'msg': msg, 'text': text}
+                            for line, msg, text in result.syntax_errors
+                        ]
                 
                 issues = []
                 errors_count = 0
@@ -1494,7 +1477,7 @@ class DashboardWindow(CustomToplevel):
                                 todo_count += 1
                             elif typ == "FIXME":
                                 fixme_count += 1
-                            else:
+                            elif typ == "BUG":
                                 bug_count += 1
                             issues.append({
                                 "kind": typ,
@@ -1517,6 +1500,10 @@ class DashboardWindow(CustomToplevel):
         finally:
             self.after(0, lambda: self._finish_todos(issues, summary, empty_message))
 
+    def _set_todos_progress(self, message, pct):
+        self._todos_overlay.set_sub(message)
+        self._todos_overlay.set_bar(pct)
+
     def _finish_todos(self, issues, summary, empty_message):
         self._hide_overlay(self._todos_overlay, self._todos_results_host)
         self._render_todos_issues(issues, summary, empty_message)
@@ -1662,12 +1649,19 @@ class DashboardWindow(CustomToplevel):
             else:
                 start_time = time.time()
                 total_files = len(code_files)
+                MIN_LINES = 8  # Aumentado para ignorar duplicados triviales
+                # Líneas triviales: cortan cualquier bloque duplicado
+                trivial_patterns = ('import ', 'from ', '{', '}', '(', ')', ';', '//', '#', '/*', '*/', '"""', "'''")
                 
-                file_hashes = {}
+                file_lines = {}
+                sequences = []
+                last_progress = 0.0
                 for i, fp in enumerate(code_files):
-                    if i % 5 == 0 or i == total_files - 1:
+                    now = time.time()
+                    if now - last_progress >= 1 / 15 or i == total_files - 1:
+                        last_progress = now
                         pct = int((i + 1) / total_files * 50)
-                        elapsed = time.time() - start_time
+                        elapsed = now - start_time
                         rate = (i + 1) / elapsed if elapsed > 0 else 0
                         remaining = (total_files - i - 1) / rate if rate > 0 else 0
                         
@@ -1677,43 +1671,57 @@ class DashboardWindow(CustomToplevel):
                             f"{remaining:.1f}s"
                         )
 
-                        self.after(0, lambda msg=status_msg: self._dupes_overlay.set_sub(msg))
-                        self.after(0, lambda p=pct: self._dupes_overlay.set_bar(p))
+                        self.after(0, lambda msg=status_msg, p=pct: (
+                            self._dupes_overlay.set_sub(msg), self._dupes_overlay.set_bar(p)))
                     
                     try:
                         with open(fp, 'r', encoding='utf-8', errors='ignore') as f:
-                            file_hashes[fp] = f.readlines()
+                            lines = f.readlines()
                     except:
-                        pass
+                        continue
+                    file_lines[fp] = lines
+                    stripped = [line.strip() for line in lines]
+                    sequences.append([
+                        None if not line or any(pattern in line for pattern in trivial_patterns) else line
+                        for line in stripped
+                    ])
                 
+                status_msg = f"{self.language_manager.get_text('dash_comparing')} {len(sequences)}  a 50%"
+                self.after(0, lambda msg=status_msg: (
+                    self._dupes_overlay.set_sub(msg), self._dupes_overlay.set_bar(50)))
+                
+                files_list = list(file_lines.keys())
                 duplicates = []
-                files_list = list(file_hashes.keys())
-                total_comparisons = len(files_list) * (len(files_list) - 1) // 2
-                comparisons_done = 0
-                MIN_LINES = 8  # Aumentado para ignorar duplicados triviales
+                clones = find_clones(sequences, MIN_LINES, max_bucket=self.code_analyzer.clone_max_bucket)
+                for (i, j), blocks in sorted(clones.items()):
+                    duplicates.append({
+                        'file1': files_list[i],
+                        'file2': files_list[j],
+                        'blocks': [{
+                            'start1': start1 + 1,
+                            'end1': start1 + count,
+                            'start2': start2 + 1,
+                            'end2': start2 + count,
+                            'lines': count
+                        } for start1, start2, count in blocks]
+                    })
                 
-                for i, file1 in enumerate(files_list):
-                    for file2 in files_list[i+1:]:
-                        comparisons_done += 1
-                        
-                        if comparisons_done % 20 == 0:
-                            pct = 50 + int(comparisons_done / total_comparisons * 50)
-                            elapsed = time.time() - start_time
-                            rate = comparisons_done / elapsed if elapsed > 0 else 0
-                            remaining = (total_comparisons - comparisons_done) / rate if rate > 0 else 0
-                            
-                            status_msg = f"{self.language_manager.get_text('dash_comparing')} {comparisons_done}/{total_comparisons}  a {pct}%  a  {remaining:.1f}s"
-                            self.after(0, lambda msg=status_msg: self._dupes_overlay.set_sub(msg))
-                            self.after(0, lambda p=pct: self._dupes_overlay.set_bar(p))
-                        
-                        blocks = self._find_duplicate_blocks(file_hashes[file1], file_hashes[file2], MIN_LINES)
-                        
-                        if blocks:
-                            duplicates.append({
-                                'file1': file1,
-                                'file2': file2,
-                                'blocks': blocks
-                            })
+                # Archivos copiados y retocados (MinHash/LSH, firmas cacheadas)
+                hashing = self.language_manager.get_text('dash_hashing_files')
+                last_progress = 0.0
+                
+                def on_signatures(done, total):
+                    nonlocal last_progress
+                    now = time.time()
+                    if now - last_progress < 1 / 15 and done < total:
+                        return
+                    last_progress = now
+                    pct = 50 + int(done / total * 50) if total else 100
+                    msg = f"{hashing} {done}/{total} | {pct}%"
+                    self.after(0, lambda msg=msg, p=pct: (
+                        self._dupes_overlay.set_sub(msg), self._dupes_overlay.set_bar(p)))
+                
+                similar = self.code_analyzer.detect_near_duplicates(code_files, on_progress=on_signatures)
                 
                 result = []
                 if not duplicates:
@@ -1722,6 +1730,11 @@ class DashboardWindow(CustomToplevel):
                     result.append(("═" * 80, "header"))
                     result.append((f"🔁 CÓDIGO DUPLICADO ({len(duplicates)} casos)", "duplicate"))
                     result.append(("═" * 80, "header"))
+                    if clones.capped:
+                        result.append((
+                            self.language_manager.get_text('dash_dupes_incomplete').format(count=clones.capped),
+                            "warning"
+                        ))
                     result.append(("", None))
                     
                     for idx, dup in enumerate(duplicates, 1):
@@ -1743,17 +1756,16 @@ class DashboardWindow(CustomToplevel):
                             ))
                             result.append(("", None))
 
-                            with open(dup["file1"], 'r', encoding='utf-8', errors='ignore') as f:
-                                lines = f.readlines()
-                                for line_num in range(
-                                    block['start1'] - 1,
-                                    min(block['end1'], block['start1'] + 6)
-                                ):
-                                    line_content = lines[line_num].rstrip()
-                                    result.append((
-                                        f"    {line_num + 1:4d} │ {line_content}",
-                                        "code"
-                                    ))
+                            lines = file_lines[dup["file1"]]
+                            for line_num in range(
+                                block['start1'] - 1,
+                                min(block['end1'], block['start1'] + 6)
+                            ):
+                                line_content = lines[line_num].rstrip()
+                                result.append((
+                                    f"    {line_num + 1:4d} │ {line_content}",
+                                    "code"
+                                ))
 
                             if block['lines'] > 6:
                                 result.append((
@@ -1765,51 +1777,30 @@ class DashboardWindow(CustomToplevel):
 
                         result.append(("", None))
 
+                if similar:
+                    lang = self.language_manager
+                    result.append(("═" * 80, "header"))
+                    result.append((f"🧬 {lang.get_text('dash_similar_files')} ({len(similar)})", "duplicate"))
+                    result.append(("═" * 80, "header"))
+                    if similar.capped:
+                        result.append((lang.get_text('dash_similar_incomplete').format(count=similar.capped), "warning"))
+                    result.append(("", None))
+                    
+                    for group in similar:
+                        pct = round(group["similarity"] * 100)
+                        result.append((
+                            f"{len(group['files'])} {lang.get_text('dash_similar_group').format(pct=pct)}",
+                            "warning"
+                        ))
+                        for fp in group["files"]:
+                            result.append((f"📄 {self.file_manager.get_relative_path(fp)}", "file"))
+                        result.append(("", None))
                 
         except Exception as e:
             result = [(f"❌ Error: {e}", "error")]
         finally:
             self.after(0, lambda: self._finish_dupes(result))
 
-    def _find_duplicate_blocks(self, lines1, lines2, min_lines=8):
-        blocks = []
-        i = 0
-        
-        # Ignorar laÃƒâ€šÃ‚Â­neas comunes triviales
-        trivial_patterns = ['import ', 'from ', '{', '}', '(', ')', ';', '//', '#', '/*', '*/', '"""', "'''"]
-        
-        while i < len(lines1):
-            j = 0
-            while j < len(lines2):
-                match_len = 0
-                while (i + match_len < len(lines1) and 
-                       j + match_len < len(lines2)):
-                    line1 = lines1[i + match_len].strip()
-                    line2 = lines2[j + match_len].strip()
-                    
-                    # Ignorar laÃƒâ€šÃ‚Â­neas vacaÃƒâ€šÃ‚Â­as y triviales
-                    if (line1 == line2 and line1 != "" and 
-                        not any(pattern in line1 for pattern in trivial_patterns)):
-                        match_len += 1
-                    else:
-                        break
-                
-                if match_len >= min_lines:
-                    blocks.append({
-                        'start1': i + 1,
-                        'end1': i + match_len,
-                        'start2': j + 1,
-                        'end2': j + match_len,
-                        'lines': match_len
-                    })
-                    i += match_len
-                    j += match_len
-                else:
-                    j += 1
-            i += 1
-        
-        return blocks
-
     def _finish_dupes(self, result):
         self._hide_overlay(self._dupes_overlay, self.duplicates_text)
         self._write_colored(self.duplicates_text, result)
@@ -64,6 +64,7 @@ class ExportMenu:
             ("paths_only", "rut.png", lang.get_text("export_paths_only")),
             ("tree_structure", "tree.png", lang.get_text("export_tree_structure")),
             ("for_llm", "LLM.png", lang.get_text("export_for_llm")),
+            ("for_llm_budget", "LLM.png", lang.get_text("export_for_llm_budget")),
             ("save_file", "save.png", lang.get_text("export_save_file")),
         ]
 
@@ -71,7 +72,7 @@ class ExportMenu:
         list_frame.pack(fill="both", expand=True)
 
         for index, option in enumerate(options):
-            if index == 4:
+            if index == 5:
                 tk.Frame(list_frame, bg=t["border"], height=1).pack(fill="x")
             self._create_option_item(list_frame, option, index, t)
 
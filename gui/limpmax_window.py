@@ -9,7 +9,7 @@ from gui.components import CustomToplevel
 from utils.helpers import resource_path
 
 class LimpMaxWindow(CustomToplevel):
-    def __init__(self, parent, theme_manager, language_manager):
+    def __init__(self, parent, theme_manager, language_manager, file_manager=None):
         super().__init__(
             parent=parent,
             theme_manager=theme_manager,
@@ -19,6 +19,7 @@ class LimpMaxWindow(CustomToplevel):
             max_size=(1280, 900),
         )
         self.language_manager = language_manager
+        self.file_manager = file_manager
         self.processor = LimpMaxProcessor()
 
         self._running = False
@@ -481,6 +482,9 @@ class LimpMaxWindow(CustomToplevel):
         def _progress(payload):
             self.after(0, lambda p=payload: self._on_progress(p))
 
+        if self.file_manager is not None:
+            self.processor.project_index = self.file_manager.get_index()
+
         def _worker():
             try:
                 summary = self.processor.run(cfg, progress_cb=_progress)
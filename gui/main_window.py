@@ -2,10 +2,18 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 import os
 import sys
+import threading
 from datetime import datetime
 
 from utils import ThemeManager, ConfigManager, FileIconManager, AlertManager, LanguageManager
 from core import FileManager, SelectionManager, CodeAnalyzer, ExportManager, ProjectStats
+from core.project_index import ProjectIndex
+from core.filename_index import FilenameIndex
+from core.trigram_index import TrigramIndex
+from core.content_search import shutdown_search_pool
+from core.fs_watcher import FileSystemWatcher
+from core.metadata_cache import close_metadata_cache, get_metadata_cache
+from core.ignore import IGNORE_FILENAMES, get_ignore_engine, reset_ignore_engines
 from gui.widgets import CustomToolbar, StatusBar, ThemeSelector, LanguageSelector
 from gui.tree_view import TreeView
 from gui.preview_window import PreviewWindow
@@ -44,10 +52,17 @@ class MainWindow:
         self.file_manager = preloaded.get("file_manager") or FileManager()
         self.selection_manager = preloaded.get("selection_manager") or SelectionManager()
         self.code_analyzer = preloaded.get("code_analyzer") or CodeAnalyzer()
+        self.code_analyzer.set_todo_tags(self.config_manager.get("todo_extra_tags", []))
+        self.code_analyzer.set_clone_max_bucket(self.config_manager.get("duplicate_max_bucket", 16))
         self.project_stats = preloaded.get("project_stats") or ProjectStats()
         self.export_manager = preloaded.get("export_manager") or ExportManager(self.file_manager)
         from core.ai_manager import AIManager
         
+        # Vigilante de cambios en disco (reemplaza el timer de stats)
+        self.fs_watcher = None
+        self._index_generation = 0  # Solo se publica lo del recorrido más reciente
+        self._stats_update_pending = False
+        
         # Estado del zoom
         self.zoom_level = 1.0
         self.base_font_size = 9
@@ -79,8 +94,8 @@ class MainWindow:
         if last_folder and os.path.exists(last_folder):
             self.load_folder(last_folder)
         
-        # Timer para actualizar stats
-        self._update_stats_timer()
+        # Stats: se recalculan solo cuando cambia la selección o el disco
+        self.selection_manager.subscribe(self._on_selection_changed)
         self.ai_manager = AIManager(self.config_manager)
         
 
@@ -125,6 +140,8 @@ class MainWindow:
             xscrollcommand=hsb.set
         )
         self.tree.pack(side="left", fill="both", expand=True)
+        # El contador de archivos visibles cambia al expandir/refrescar carpetas
+        self.tree.bind("<<TreeRowsChanged>>", lambda e: self._on_selection_changed())
         
         vsb.config(command=self.tree.yview)
         hsb.config(command=self.tree.xview)
@@ -632,9 +649,17 @@ class MainWindow:
         self.status_bar.set_message(f"{lang.get_text('status_loading')} {folder_path}...")
         self.root.update()
         
+        # Guardar los cambios de los índices de la carpeta anterior
+        self._save_filename_index()
+        self._save_trigram_index()
+        
         # Cargar en tree
         self.tree.load_directory(folder_path)
         
+        # Índice compartido del proyecto (un único recorrido, en segundo plano)
+        self._build_project_index(folder_path)
+        self._start_fs_watcher(folder_path)
+        
         # Guardar en config
         self.config_manager.set("last_folder", folder_path)
         self.config_manager.add_recent_folder(folder_path)
@@ -649,6 +674,202 @@ class MainWindow:
         # Actualizar stats
         self._update_stats()
     
+    def _build_project_index(self, folder_path, reuse=True):
+        """Construye el ProjectIndex en segundo plano y lo comparte con los managers
+
+        Cada llamada inicia una generación nueva: un recorrido anterior que
+        termine después no publica nada. Con `reuse` (refresco normal, mismas
+        reglas de ignorados) los índices de nombres y de trigramas ya cargados
+        se actualizan con sync en lugar de reconstruirse. Mientras tanto la
+        selección sigue usando el índice anterior de la misma carpeta.
+        """
+        previous_index = self.selection_manager.index
+        if previous_index is not None and previous_index.root_path != folder_path:
+            self.selection_manager.set_index(None)
+            previous_index = None
+        self._index_generation += 1
+        generation = self._index_generation
+        
+        def current():
+            return self._index_generation == generation
+        
+        # Las carpetas ignoradas (node_modules, target, .gitignore...) no se recorren
+        ignore = get_ignore_engine(folder_path)
+        should_descend = ignore.should_descend
+        previous_names = self.file_manager.filename_index if reuse else None
+        if previous_names is not None and previous_names.root_path != folder_path:
+            previous_names = None
+        previous_trigrams = self.file_manager.trigram_index if reuse else None
+        if previous_trigrams is not None and previous_trigrams.root_path != folder_path:
+            previous_trigrams = None
+        
+        def worker():
+            # El índice de nombres guardado sirve al buscador mientras se recorre el disco
+            if previous_names is None:
+                saved = FilenameIndex.load(folder_path, ignore=ignore)
+                if saved is not None:
+                    self.root.after(0, lambda: self._on_filename_index_loaded(saved, generation))
+            try:
+                index = ProjectIndex(folder_path, should_descend=should_descend)
+            except Exception as e:
+                print(f"Error building project index: {e}")
+                return
+            if not current():
+                return
+            # Rutas que cambiaron: la selección solo recalcula sus totales
+            changes = (previous_index, *index.diff(previous_index)) if previous_index is not None else None
+            try:
+                if previous_names is not None:
+                    names = previous_names
+                    names.sync(index)
+                else:
+                    names = FilenameIndex.from_project_index(index, ignore=ignore)
+                if names.version != names.saved_version:
+                    names.save()
+            except Exception as e:
+                print(f"Error building filename index: {e}")
+                names = None
+            self.root.after(0, lambda: self._on_project_index_ready(index, names, generation, changes))
+            
+            # Trigramas del contenido: el guardado solo relee lo que cambió
+            if not current():
+                return
+            try:
+                trigrams = previous_trigrams or TrigramIndex.load(folder_path, ignore=ignore)
+                if trigrams is None:
+                    trigrams = TrigramIndex.from_project_index(index, ignore=ignore)
+                else:
+                    trigrams.sync(index)
+                    trigrams.refresh()
+                if current() and trigrams.version != trigrams.saved_version:
+                    trigrams.save()
+            except Exception as e:
+                print(f"Error building trigram index: {e}")
+                return
+            self.root.after(0, lambda: self._on_trigram_index_ready(trigrams, generation))
+        
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def _on_project_index_ready(self, index, names=None, generation=None, changes=None):
+        """Publica el índice si sigue abierta la misma carpeta y no hay un recorrido más nuevo"""
+        if self.file_manager.root_path != index.root_path:
+            return
+        if generation is not None and generation != self._index_generation:
+            return
+        self.file_manager.set_index(index)
+        self.selection_manager.set_index(index, changes)
+        if names is not None:
+            self.file_manager.set_filename_index(names)
+        print(f"✓ Índice del proyecto: {len(index):,} entradas en {index.build_time:.2f}s")
+        if changes is None or changes[2]:
+            self._update_stats()
+    
+    def _on_filename_index_loaded(self, names, generation=None):
+        """Publica el índice de nombres guardado si aún no hay uno recién construido"""
+        if generation is not None and generation != self._index_generation:
+            return
+        if self.file_manager.filename_index is None:
+            self.file_manager.set_filename_index(names)
+    
+    def _save_filename_index(self):
+        names = self.file_manager.filename_index
+        if names is not None and names.version != names.saved_version:
+            names.save()
+    
+    def _on_trigram_index_ready(self, trigrams, generation=None):
+        """Publica el índice de trigramas si sigue abierta la misma carpeta y generación"""
+        if self.file_manager.root_path != trigrams.root_path:
+            return
+        if generation is not None and generation != self._index_generation:
+            return
+        self.file_manager.set_trigram_index(trigrams)
+        print(f"✓ Índice de trigramas: {len(trigrams):,} archivos")
+    
+    def _save_trigram_index(self):
+        trigrams = self.file_manager.trigram_index
+        if trigrams is not None and trigrams.version != trigrams.saved_version:
+            trigrams.save()
+    
+    def _start_fs_watcher(self, folder_path):
+        """Vigila la carpeta abierta (inotify o sondeo de carpetas como respaldo)"""
+        self._stop_fs_watcher()
+        watcher = FileSystemWatcher(
+            folder_path,
+            lambda events: self.root.after(0, lambda: self._on_fs_events(events)),
+            should_watch_dir=get_ignore_engine(folder_path).should_descend,
+        )
+        try:
+            watcher.start()
+        except Exception as e:
+            print(f"Error starting file watcher: {e}")
+            return
+        self.fs_watcher = watcher
+    
+    def _stop_fs_watcher(self):
+        if self.fs_watcher is not None:
+            self.fs_watcher.stop()
+            self.fs_watcher = None
+    
+    def _on_fs_events(self, events):
+        """Aplica cambios del disco y refresca solo si afectan a la selección"""
+        watcher = self.fs_watcher
+        if watcher is None or watcher.root_path != self.file_manager.root_path:
+            return
+        
+        if any(os.path.basename(event.path) in IGNORE_FILENAMES for event in events):
+            # Cambiaron las reglas: recompilar y reindexar en segundo plano
+            reset_ignore_engines(watcher.root_path)
+            self._build_project_index(watcher.root_path, reuse=False)
+            self._start_fs_watcher(watcher.root_path)
+        else:
+            index = self.file_manager.get_index()
+            changed = index.apply_events(events) if index is not None else []
+            if changed is None:
+                # El vigilante perdió eventos: recorrido completo en segundo
+                # plano; nombres y trigramas se sincronizan con el resultado
+                self._build_project_index(watcher.root_path)
+            else:
+                # Solo se recalculan los totales de las carpetas afectadas
+                self.selection_manager.invalidate_paths(changed)
+                names = self.file_manager.filename_index
+                if names is not None:
+                    names.apply_events(events)
+                trigrams = self.file_manager.trigram_index
+                if trigrams is not None and trigrams.apply_events(events):
+                    # Releer los archivos cambiados fuera del hilo de Tk
+                    threading.Thread(target=trigrams.refresh, args=(index,), daemon=True).start()
+        
+        cache = get_metadata_cache()
+        affected = False
+        for event in events:
+            if event.kind == "deleted" and not event.is_dir:
+                cache.invalidate(event.path)
+            if event.is_dir and event.path == watcher.root_path:
+                affected = True  # Eventos perdidos: recalcular todo
+            elif self.selection_manager.is_selected(event.path) or \
+                    self.selection_manager.is_selected(os.path.dirname(event.path)):
+                affected = True
+        
+        if affected:
+            self._refresh_selection_views()
+    
+    def _on_selection_changed(self):
+        """Agrupa cambios de selección seguidos en una sola actualización"""
+        if self._stats_update_pending:
+            return
+        self._stats_update_pending = True
+        self.root.after_idle(self._flush_selection_changes)
+    
+    def _flush_selection_changes(self):
+        self._stats_update_pending = False
+        self._update_stats()
+    
+    def _refresh_selection_views(self):
+        """Actualiza barra de estado, preview y dashboard tras cambios en disco"""
+        self._update_stats()
+        if hasattr(self, 'dashboard_window') and self.dashboard_window and self.dashboard_window.winfo_exists():
+            self.dashboard_window.update_dashboard(self.selection_manager.get_selected_files())
+    
     def _refresh_tree(self):
         """Refresca el árbol manteniendo selecciones"""
         lang = self.language_manager
@@ -658,6 +879,7 @@ class MainWindow:
         
         self.status_bar.set_message(lang.get_text('status_refreshing'))
         self.tree.refresh_tree()
+        self._build_project_index(self.file_manager.root_path)
         self.status_bar.set_message(lang.get_text('status_refreshed'), 2000)
         self._update_stats()
     
@@ -669,7 +891,8 @@ class MainWindow:
     def _update_preview(self):
         """Actualiza la ventana de preview"""
         selected = self.selection_manager.get_selected_files()
-        self.preview_window.update_preview(selected)
+        _files, total_size, _lines = self.selection_manager.get_selected_totals()
+        self.preview_window.update_preview(selected, total_size)
     
     def _open_search(self):
         lang = self.language_manager
@@ -813,6 +1036,7 @@ class MainWindow:
             "paths_only": self._export_paths_only,
             "tree_structure": self._export_tree_structure,
             "for_llm": self._export_for_llm,
+            "for_llm_budget": self._export_for_llm_budget,
             "save_file": self._export_to_file,
         }
         callback = actions.get(action)
@@ -859,6 +1083,16 @@ class MainWindow:
             3000
         )
     
+    def _export_for_llm_budget(self, files):
+        """Exporta para LLM sin pasar del límite de tokens del AIManager"""
+        self.export_manager.export_for_llm_budget(files, self.ai_manager.MAX_TOTAL_TOKENS)
+        pack = self.export_manager.last_pack
+        self.status_bar.set_message(
+            f"{self.language_manager.get_text('status_copied')} "
+            f"(~{pack.used_tokens:,} / {pack.budget:,} tokens)",
+            3000
+        )
+    
     def _export_to_file(self, files):
         """Exporta a archivo"""
         lang = self.language_manager
@@ -872,6 +1106,7 @@ class MainWindow:
             filetypes=[
                 ("Markdown", "*.md"),
                 ("Text", "*.txt"),
+                ("Markdown (gzip)", "*.md.gz"),
                 ("All Files", "*.*")
             ]
         )
@@ -972,7 +1207,8 @@ class MainWindow:
         self.limpmax_window = LimpMaxWindow(
             self.root,
             self.theme_manager,
-            self.language_manager
+            self.language_manager,
+            file_manager=self.file_manager
         )
     
     def _open_theme_selector(self):
@@ -1060,29 +1296,15 @@ class MainWindow:
         if not self.file_manager.root_path:
             return
         
-        # Obtener todos los archivos visibles en el árbol
-        all_files = self.tree.get_all_file_paths()
+        # Contadores mantenidos de forma incremental (árbol y selección)
+        selected_files, selected_size, selected_lines = self.selection_manager.get_selected_totals()
         
-        # Archivos seleccionados
-        selected_files = self.selection_manager.get_selected_files()
-        
-        # Calcular stats de seleccionados
-        if selected_files:
-            stats = self.project_stats.calculate_stats(selected_files)
-            
-            self.status_bar.update_all({
-                'total_files': len(all_files),
-                'selected_files': len(selected_files),
-                'total_lines': stats['total_lines'],
-                'size_formatted': format_file_size(stats['total_size'])
-            })
-        else:
-            self.status_bar.update_all({
-                'total_files': len(all_files),
-                'selected_files': 0,
-                'total_lines': 0,
-                'size_formatted': '0 B'
-            })
+        self.status_bar.update_all({
+            'total_files': self.tree.visible_file_count,
+            'selected_files': selected_files,
+            'total_lines': selected_lines,
+            'size_formatted': format_file_size(selected_size)
+        })
         
         # *** CAMBIAR ESTA LÍNEA ***
         # Antes era:
@@ -1092,15 +1314,6 @@ class MainWindow:
         if hasattr(self, 'preview_window') and self.preview_window and self.preview_window.winfo_exists() and self.preview_window.winfo_viewable():
             self._update_preview()
     
-    def _update_stats_timer(self):
-        """Timer para actualizar stats periódicamente"""
-        # *** AGREGAR VERIFICACIÓN ***
-        if hasattr(self, 'file_manager') and self.file_manager:
-            self._update_stats()
-        
-        # Programar siguiente actualización
-        self.root.after(2000, self._update_stats_timer)
-    
     def _show_shortcuts(self):
         """Abre ventana de atajos de teclado."""
         if hasattr(self, '_shortcuts_window') and self._shortcuts_window \
@@ -1155,5 +1368,12 @@ class MainWindow:
         geometry = self.root.geometry()
         self.config_manager.set("window_geometry", geometry)
         
+        self._stop_fs_watcher()
+        self._save_filename_index()
+        self._save_trigram_index()
+        shutdown_search_pool()
+        close_metadata_cache()
+        self.selection_manager.unsubscribe(self._on_selection_changed)
+        
         # Cerrar
         self.root.destroy()
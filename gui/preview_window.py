@@ -5,6 +5,9 @@ from collections import deque
 from gui.components import CustomToplevel
 from utils.helpers import resource_path
 
+# Alto fijo de cada fila (nombre + carpeta): permite calcular qué filas se ven
+ROW_HEIGHT = 44
+
 
 class PreviewWindow(CustomToplevel):  # Ã¢â€ Â HEREDAR DE CustomToplevel
     """Ventana flotante para previsualizar archivos seleccionados Ã¢â‚¬â€ UI profesional"""
@@ -24,6 +27,7 @@ class PreviewWindow(CustomToplevel):  # Ã¢â€ Â HEREDAR DE CustomTopleve
         self.language_manager = language_manager
         self._selected_files  = []
         self._icons           = {}
+        self._rows            = []  # Filas reutilizables (solo las visibles)
 
         self.protocol("WM_DELETE_WINDOW", self.hide)
         
@@ -211,27 +215,18 @@ class PreviewWindow(CustomToplevel):  # Ã¢â€ Â HEREDAR DE CustomTopleve
             self._content,
             bd=0,
             highlightthickness=0,
-            yscrollcommand=self._sb_y.set,
+            yscrollcommand=self._on_yview_changed,
         )
         self._canvas.pack(side="left", fill="both", expand=True)
         self._sb_y.config(command=self._canvas.yview)
 
-        self._list_frame = tk.Frame(self._canvas, bd=0)
-        self._canvas_window = self._canvas.create_window(
-            (0, 0), window=self._list_frame, anchor="nw"
-        )
-
-        self._list_frame.bind("<Configure>", self._on_frame_configure)
-        self._canvas.bind("<Configure>",     self._on_canvas_configure)
+        self._canvas.bind("<Configure>", self._on_canvas_configure)
 
-        # Scroll con rueda Ã¢â‚¬â€ bind en canvas y list_frame
-        # NO usamos bind_all porque crashea cuando la ventana estÃƒÂ¡ oculta
+        # Scroll con rueda (cada fila también lo propaga al canvas)
+        # NO usamos bind_all porque crashea cuando la ventana está oculta
         self._canvas.bind("<MouseWheel>",      self._on_mousewheel)
         self._canvas.bind("<Button-4>",        self._on_mousewheel_linux)
         self._canvas.bind("<Button-5>",        self._on_mousewheel_linux)
-        self._list_frame.bind("<MouseWheel>",  self._on_mousewheel)
-        self._list_frame.bind("<Button-4>",    self._on_mousewheel_linux)
-        self._list_frame.bind("<Button-5>",    self._on_mousewheel_linux)
 
         # Ã¢â€â‚¬Ã¢â€â‚¬ Estado vacÃƒÂ­o Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
         self._empty_frame     = tk.Frame(self._canvas)
@@ -298,11 +293,19 @@ class PreviewWindow(CustomToplevel):  # Ã¢â€ Â HEREDAR DE CustomTopleve
     # SCROLL
     # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
 
-    def _on_frame_configure(self, event):
-        self._canvas.configure(scrollregion=self._canvas.bbox("all"))
-
     def _on_canvas_configure(self, event):
-        self._canvas.itemconfig(self._canvas_window, width=event.width)
+        for row in self._rows:
+            self._canvas.itemconfigure(row["window"], width=event.width)
+        self._layout_rows()
+
+    def _on_yview_changed(self, first, last):
+        """El canvas cambió de vista (rueda, scrollbar o tamaño)"""
+        self._sb_y.set(first, last)
+        self._layout_rows()
+
+    def _update_scrollregion(self):
+        height = len(self._selected_files) * ROW_HEIGHT + 6 if self._selected_files else 0
+        self._canvas.configure(scrollregion=(0, 0, 0, height))
 
     def _on_mousewheel(self, event):
         """Windows / macOS."""
@@ -396,7 +399,6 @@ class PreviewWindow(CustomToplevel):  # Ã¢â€ Â HEREDAR DE CustomTopleve
 
         self._content.configure(bg=tree_bg)
         self._canvas.configure(bg=tree_bg)
-        self._list_frame.configure(bg=tree_bg)
 
         self._empty_frame.configure(bg=tree_bg)
         self._empty_label.configure(bg=tree_bg, fg=muted)
@@ -446,120 +448,139 @@ class PreviewWindow(CustomToplevel):  # Ã¢â€ Â HEREDAR DE CustomTopleve
     # RENDERIZADO DE FILAS
     # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
 
-    def _render_rows(self):
-        for w in self._list_frame.winfo_children():
-            w.destroy()
+    def _create_row(self):
+        """Crea una fila reutilizable; sus datos se asignan en _bind_row"""
+        frame    = tk.Frame(self._canvas, cursor="hand2", height=ROW_HEIGHT)
+        frame.pack_propagate(False)
+        lbl_ico  = tk.Label(frame, bd=0, highlightthickness=0)
+        lbl_ico.pack(side="left", padx=(10, 4))
+        text_col = tk.Frame(frame)
+        text_col.pack(side="left", fill="x", expand=True)
+        lbl_name = tk.Label(text_col, font=("Segoe UI", 9, "bold"), anchor="w")
+        lbl_name.pack(fill="x", padx=(0, 8))
+        lbl_path = tk.Label(text_col, font=("Segoe UI", 8), anchor="w")
+        lbl_path.pack(fill="x", padx=(0, 8))
+        sep      = tk.Frame(frame, height=1)
+        sep.place(relx=0, rely=1.0, relwidth=1.0, anchor="sw")
+
+        row = {
+            "frame": frame, "ico": lbl_ico, "text": text_col,
+            "name": lbl_name, "path": lbl_path, "sep": sep,
+            "index": None, "bg": None, "hover_bg": None,
+        }
+        row["window"] = self._canvas.create_window(
+            (0, 0), window=frame, anchor="nw",
+            width=self._canvas.winfo_width(), height=ROW_HEIGHT,
+        )
+
+        widgets = (frame, text_col, lbl_name, lbl_path, lbl_ico)
+
+        def on_enter(e):
+            for w in widgets:
+                w.configure(bg=row["hover_bg"])
 
+        def on_leave(e):
+            for w in widgets:
+                w.configure(bg=row["bg"])
+
+        for w in widgets:
+            w.bind("<Enter>", on_enter)
+            w.bind("<Leave>", on_leave)
+            # Propagar scroll desde cada widget hijo al canvas
+            w.bind("<MouseWheel>", self._on_mousewheel)
+            w.bind("<Button-4>",   self._on_mousewheel_linux)
+            w.bind("<Button-5>",   self._on_mousewheel_linux)
+
+        self._rows.append(row)
+        return row
+
+    def _layout_rows(self, force=False):
+        """Muestra solo las filas dentro del viewport, reutilizando los widgets"""
+        count = len(self._selected_files)
+        view_h = max(self._canvas.winfo_height(), ROW_HEIGHT)
+        first = max(0, int(self._canvas.canvasy(0)) // ROW_HEIGHT)
+        visible = min(view_h // ROW_HEIGHT + 2, max(0, count - first))
+
+        while len(self._rows) < visible:
+            self._create_row()
+
+        for k, row in enumerate(self._rows):
+            index = first + k
+            if k >= visible:
+                if row["index"] is not None:
+                    self._canvas.itemconfigure(row["window"], state="hidden")
+                    row["index"] = None
+                continue
+            if force or row["index"] != index:
+                self._bind_row(row, index)
+                self._canvas.coords(row["window"], 0, index * ROW_HEIGHT)
+                self._canvas.itemconfigure(row["window"], state="normal")
+
+    def _bind_row(self, row, index):
+        """Asigna a una fila del pool el archivo `index` y sus colores"""
         t        = self.theme_manager.get_theme()
         tree_bg  = t["tree_bg"]
-        tree_fg  = t["tree_fg"]
         sec_bg   = t["secondary_bg"]
-        border   = t["border"]
-        sel_bg   = t["tree_selected_bg"]
-        # Ruta: mezcla fg con accent Ã¢â€ â€™ legible y con color del tema
+        # Ruta: mezcla fg con accent para que sea legible y con color del tema
         path_fg  = self._mix(t["fg"], t["accent"], 0.4)
 
-        ico_file   = self._icon("file")
-        ico_folder = self._icon("folder")
-
-        for i, filepath in enumerate(self._selected_files):
-            is_dir   = os.path.isdir(filepath)
-            row_bg   = tree_bg if i % 2 == 0 else self._mix(tree_bg, sec_bg, 0.5)
-            rel_path = self.file_manager.get_relative_path(filepath)
-            name     = os.path.basename(filepath)
-            parent   = os.path.dirname(rel_path)
-
-            row = tk.Frame(self._list_frame, bg=row_bg, cursor="hand2")
-            row.pack(fill="x")
-
-            ico = ico_folder if is_dir else ico_file
-            if ico:
-                lbl_ico = tk.Label(row, image=ico, bg=row_bg, bd=0, highlightthickness=0)
-                lbl_ico.image = ico
-                lbl_ico.pack(side="left", padx=(10, 4), pady=6)
-
-            text_col = tk.Frame(row, bg=row_bg)
-            text_col.pack(side="left", fill="x", expand=True, pady=5)
-
-            lbl_name = tk.Label(
-                text_col,
-                text=name,
-                font=("Segoe UI", 9, "bold"),
-                bg=row_bg, fg=tree_fg, anchor="w",
-            )
-            lbl_name.pack(fill="x", padx=(0, 8))
-
-            lbl_path = None
-            if parent:
-                lbl_path = tk.Label(
-                    text_col,
-                    text=parent,
-                    font=("Segoe UI", 8),
-                    bg=row_bg,
-                    fg=path_fg,   # Ã¢â€ Â legible, mezcla fg+accent
-                    anchor="w",
-                )
-                lbl_path.pack(fill="x", padx=(0, 8))
-
-            sep = tk.Frame(self._list_frame, height=1, bg=border)
-            sep.pack(fill="x")
-
-            hover_bg = self._mix(row_bg, sel_bg, 0.3)
-            all_w = [w for w in [row, text_col, lbl_name, lbl_path,
-                                  lbl_ico if ico else None] if w is not None]
-
-            def _make_hover(widgets, bg_n, bg_h):
-                def on_enter(e):
-                    for w in widgets:
-                        try: w.configure(bg=bg_h)
-                        except Exception: pass
-                def on_leave(e):
-                    for w in widgets:
-                        try: w.configure(bg=bg_n)
-                        except Exception: pass
-                return on_enter, on_leave
-
-            on_e, on_l = _make_hover(all_w, row_bg, hover_bg)
-            for w in all_w:
-                w.bind("<Enter>", on_e)
-                w.bind("<Leave>", on_l)
-                # Propagar scroll desde cada widget hijo al canvas
-                w.bind("<MouseWheel>", self._on_mousewheel)
-                w.bind("<Button-4>",   self._on_mousewheel_linux)
-                w.bind("<Button-5>",   self._on_mousewheel_linux)
-
-        pad = tk.Frame(self._list_frame, height=6, bg=tree_bg)
-        pad.pack(fill="x")
+        filepath = self._selected_files[index]
+        rel_path = self.file_manager.get_relative_path(filepath)
+        row_bg   = tree_bg if index % 2 == 0 else self._mix(tree_bg, sec_bg, 0.5)
+
+        row["index"]    = index
+        row["bg"]       = row_bg
+        row["hover_bg"] = self._mix(row_bg, t["tree_selected_bg"], 0.3)
+
+        ico = self._icon("file")
+        row["ico"].configure(image=ico or "", bg=row_bg)
+        row["ico"].image = ico
+        for w in (row["frame"], row["text"]):
+            w.configure(bg=row_bg)
+        row["name"].configure(text=os.path.basename(filepath), bg=row_bg, fg=t["tree_fg"])
+        row["path"].configure(text=os.path.dirname(rel_path), bg=row_bg, fg=path_fg)
+        row["sep"].configure(bg=t["border"])
 
     def _recolor_rows(self):
         if self._selected_files:
-            self._render_rows()
+            self._layout_rows(force=True)
 
     # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
     # LÃƒâ€œGICA PÃƒÅ¡BLICA
     # Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬Ã¢â€â‚¬
 
-    def update_preview(self, selected_files):
+    def update_preview(self, selected_files, total_size=None):
+        """Muestra los archivos seleccionados.
+
+        `total_size` (bytes) suele venir de los totales de la selección; si no
+        se pasa, se suma desde el índice del proyecto, sin tocar el disco.
+        """
         self._selected_files = sorted(selected_files) if selected_files else []
         count = len(self._selected_files)
         self._badge_label.configure(text=str(count))
+        self._update_scrollregion()
 
         if not self._selected_files:
             self._show_empty_state(True)
             self._size_label.configure(text="")
             self._root_label.configure(text="")
+            self._layout_rows()
             return
 
         self._show_empty_state(False)
         if self.file_manager.root_path:
             self._root_label.configure(text=self.file_manager.root_path)
 
-        total_bytes = sum(
-            os.path.getsize(fp) for fp in self._selected_files
-            if os.path.isfile(fp)
-        )
-        self._size_label.configure(text=self._fmt_size(total_bytes))
-        self._render_rows()
+        if total_size is None:
+            total_size = 0
+            index = self.file_manager.get_index()
+            if index is not None:
+                for fp in self._selected_files:
+                    entry = index.get(fp)
+                    if entry is not None and not entry.is_dir:
+                        total_size += entry.size
+        self._size_label.configure(text=self._fmt_size(total_size))
+        self._layout_rows(force=True)
 
     def _show_empty_state(self, show: bool):
         if show:
@@ -598,8 +619,8 @@ class PreviewWindow(CustomToplevel):  # Ã¢â€ Â HEREDAR DE CustomTopleve
         self._badge_label.configure(text="0")
         self._size_label.configure(text="")
         self._root_label.configure(text="")
-        for w in self._list_frame.winfo_children():
-            w.destroy()
+        self._update_scrollregion()
+        self._layout_rows()
         self._empty_label.configure(text=lang.get_text("msg_no_selection"))
         self._show_empty_state(True)
 
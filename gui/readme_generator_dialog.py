@@ -8,6 +8,7 @@ import markdown2
 import tkinterweb
 from gui.components import CustomToplevel
 from utils.helpers import resource_path
+from core.ignore import get_ignore_engine
 # Silenciar errores de tkinterweb
 import io
 import contextlib
@@ -1065,21 +1066,13 @@ class ReadmeGeneratorDialog(CustomToplevel):
         if depth >= max_depth:
             return
         
-        # Directorios a ignorar
-        ignored_dirs = {
-            'node_modules', 'venv', '.venv', 'env', '.env',
-            '__pycache__', '.git', '.svn',
-            'dist', 'build', 'target', 'bin', 'obj',
-            '.idea', '.vscode', 'coverage',
-            'site-packages', 'Lib', 'Scripts'
-        }
+        ignore = get_ignore_engine(self.file_manager.root_path or path, "readme")
         
         try:
-            items = sorted(os.listdir(path))
+            listing = self._list_dir(path)
             # Filtrar items ignorados
-            items = [item for item in items 
-                    if not item.startswith('.') 
-                    and item not in ignored_dirs]
+            items = [item for item in sorted(listing)
+                    if not ignore.is_ignored(os.path.join(path, item), listing[item])]
             
             # Contar archivos en subdirectorios
             if self.collapse_large_dirs.get():
@@ -1088,11 +1081,11 @@ class ReadmeGeneratorDialog(CustomToplevel):
                 
                 for item in items:
                     fullpath = os.path.join(path, item)
-                    if os.path.isdir(fullpath):
+                    if listing[item]:
                         try:
-                            subfiles = [f for f in os.listdir(fullpath) 
-                                    if not f.startswith('.') 
-                                    and f not in ignored_dirs]
+                            sublisting = self._list_dir(fullpath)
+                            subfiles = [f for f in sublisting
+                                    if not ignore.is_ignored(os.path.join(fullpath, f), sublisting[f])]
                             if len(subfiles) > threshold:
                                 # Marcar para colapsar
                                 processed_items.append((item, len(subfiles), True))
@@ -1116,45 +1109,34 @@ class ReadmeGeneratorDialog(CustomToplevel):
                 else:
                     lines.append(f"{prefix}{connector}{item}")
                     
-                    if os.path.isdir(fullpath) and not collapse:
+                    if listing[item] and not collapse:
                         extension = "    " if is_last else "│   "
                         self._build_tree(fullpath, prefix + extension, lines, depth + 1, max_depth)
         except PermissionError:
             pass
     
+    def _list_dir(self, path):
+        """Nombre -> es_carpeta, desde el índice del proyecto o el disco"""
+        index = self.file_manager.get_index(path)
+        if index is not None:
+            return {e.name: e.is_dir for e in index.list_children(path)}
+        return {
+            name: os.path.isdir(os.path.join(path, name))
+            for name in os.listdir(path)
+        }
+    
     def _get_project_stats(self):
         """Obtiene estadÃ­sticas"""
         all_files = []
+        root_path = self.file_manager.root_path
+        ignore = get_ignore_engine(root_path, "readme")
         
-        # Directorios a ignorar
-        ignored_dirs = {
-            'node_modules', 'venv', '.venv', 'env', '.env',
-            '__pycache__', '.git', '.svn', '.hg',
-            'dist', 'build', '.next', '.nuxt',
-            'target', 'bin', 'obj',
-            '.idea', '.vscode', '.vs',
-            'coverage', '.pytest_cache', '.mypy_cache',
-            'site-packages', 'Lib', 'lib', 'Scripts',
-            '.egg-info', 'eggs'
-        }
-        
-        for root, dirs, files in os.walk(self.file_manager.root_path):
-            # Filtrar directorios ignorados
-            dirs[:] = [d for d in dirs if d not in ignored_dirs and not d.startswith('.')]
-            
-            # Ignorar si estamos dentro de un directorio ignorado
-            path_parts = os.path.normpath(root).split(os.sep)
-            if any(part in ignored_dirs or part.startswith('.') for part in path_parts):
-                continue
-            
+        # El motor poda las carpetas ignoradas y filtra ocultos/compilados
+        for root, dirs, files in ignore.walk(self.file_manager.walk(root_path)):
             for file in files:
-                # Ignorar archivos temporales y compilados
-                if file.startswith('.') or file.endswith(('.pyc', '.pyo', '.so', '.dll', '.exe', '.o', '.a')):
-                    continue
-                
                 all_files.append(os.path.join(root, file))
         
-        stats = self.project_stats.calculate_stats(all_files)
+        stats = self.project_stats.calculate_stats(all_files, index=self.file_manager.get_index())
         
         output = []
         output.append(f"- **{self.language_manager.get_text('readme_stats_total_files')}**: {stats['total_files']}")
@@ -1,9 +1,19 @@
+import re
 import sys
+import threading
 import tkinter as tk
 from tkinter import ttk
 import os
 from gui.components import CustomToplevel
 from utils.helpers import resource_path
+from core.file_search import FilenameSearch, iter_entries, make_name_matcher
+from core.content_search import ContentQuery, ContentSearch
+from core.ignore import get_ignore_engine
+
+SEARCH_DEBOUNCE_MS = 150  # Pausa al escribir antes de relanzar la búsqueda
+FUZZY_DEBOUNCE_MS  = 30   # El buscador difuso solo ordena el índice en memoria
+FUZZY_LIMIT        = 200  # Resultados mostrados en modo difuso
+CONTENT_DEBOUNCE_MS = 300  # La búsqueda de contenido lee archivos: esperar más
 
 class SearchDialog(tk.Toplevel):
     """Diálogo de búsqueda avanzada de archivos — UI profesional con soporte de temas"""
@@ -27,8 +37,16 @@ class SearchDialog(tk.Toplevel):
         self.theme_manager    = theme_manager
         self.language_manager = language_manager
         self.results          = []
+        self._result_dirs     = set()
+        self._content_matches = 0
         self._icon_cache      = {}
 
+        # Búsqueda en segundo plano (una sola activa; el token descarta lotes viejos)
+        self._search          = None
+        self._search_token    = 0
+        self._debounce_id     = None
+        self._last_query      = ""
+
         # Variables para drag & drop de ventana
         self._drag_start_x = 0
         self._drag_start_y = 0
@@ -89,6 +107,13 @@ class SearchDialog(tk.Toplevel):
                 self._checkbuttons[0].configure(text=lang.get_text("search_case_sensitive"))
                 self._checkbuttons[1].configure(text=lang.get_text("search_extension_only"))
                 self._checkbuttons[2].configure(text=lang.get_text("search_include_dirs"))
+            if hasattr(self, '_checkbuttons') and len(self._checkbuttons) >= 4:
+                self._checkbuttons[3].configure(text=lang.get_text("search_fuzzy"))
+            if hasattr(self, '_checkbuttons') and len(self._checkbuttons) >= 8:
+                self._checkbuttons[4].configure(text=lang.get_text("search_content"))
+                self._checkbuttons[5].configure(text=lang.get_text("search_regex"))
+                self._checkbuttons[6].configure(text=lang.get_text("search_whole_word"))
+                self._checkbuttons[7].configure(text=lang.get_text("search_in_selection"))
             
             # Labels de resultados
             self._results_label.configure(text=lang.get_text("search_results"))
@@ -106,6 +131,8 @@ class SearchDialog(tk.Toplevel):
     # Actualizar _on_destroy para desuscribir idioma también:
     def _on_destroy(self, event):
         if event.widget is self:
+            self._cancel_pending_search()
+            self._cancel_search()
             self.theme_manager.unsubscribe(self.apply_theme)
             self.language_manager.unsubscribe(self._on_language_change)
             
@@ -298,12 +325,14 @@ class SearchDialog(tk.Toplevel):
         self.case_sensitive_var   = tk.BooleanVar(value=False)
         self.match_extension_var  = tk.BooleanVar(value=False)
         self.search_dirs_var      = tk.BooleanVar(value=False)
+        self.fuzzy_var            = tk.BooleanVar(value=False)
 
         opts = [
             (lang.get_text("search_case_sensitive"),  self.case_sensitive_var),
             (lang.get_text("search_extension_only"),  self.match_extension_var),
             (lang.get_text("search_include_dirs") if hasattr(lang, "get_text") else "Incluir carpetas",
              self.search_dirs_var),
+            (lang.get_text("search_fuzzy"),           self.fuzzy_var),
         ]
 
         self._checkbuttons = []
@@ -321,6 +350,35 @@ class SearchDialog(tk.Toplevel):
             cb.pack(side="left", padx=(0, 18))
             self._checkbuttons.append(cb)
 
+        # ── Opciones de contenido (grep) ─────────────────────────────────
+        content_outer = tk.Frame(body)
+        content_outer.pack(fill="x", pady=(0, 12))
+
+        self.content_var          = tk.BooleanVar(value=False)
+        self.regex_var            = tk.BooleanVar(value=False)
+        self.whole_word_var       = tk.BooleanVar(value=False)
+        self.selection_only_var   = tk.BooleanVar(value=False)
+
+        content_opts = [
+            (lang.get_text("search_content"),         self.content_var),
+            (lang.get_text("search_regex"),           self.regex_var),
+            (lang.get_text("search_whole_word"),      self.whole_word_var),
+            (lang.get_text("search_in_selection"),    self.selection_only_var),
+        ]
+        for text, var in content_opts:
+            cb = tk.Checkbutton(
+                content_outer,
+                text=text,
+                variable=var,
+                font=("Segoe UI", 9),
+                bd=0,
+                highlightthickness=0,
+                cursor="hand2",
+                command=self._on_option_change,
+            )
+            cb.pack(side="left", padx=(0, 18))
+            self._checkbuttons.append(cb)
+
         # ── Separador ────────────────────────────────────────────────────
         self._sep_mid = tk.Frame(body, height=1)
         self._sep_mid.pack(fill="x", pady=(0, 10))
@@ -712,70 +770,257 @@ class SearchDialog(tk.Toplevel):
     # ─────────────────────────────────────────────────────────────────────
 
     def _on_key_release(self, e):
-        """Oculta el estado vacío mientras el usuario escribe."""
-        if self.search_entry.get().strip():
+        """Oculta el estado vacío y relanza la búsqueda al dejar de escribir."""
+        query = self.search_entry.get().strip()
+        if query:
             self._empty_frame.place_forget()
         else:
             self._empty_frame.place(relx=0.5, rely=0.5, anchor="center")
+        if query == self._last_query:
+            return  # Teclas que no cambian el texto (flechas, Enter...)
+        self._cancel_pending_search()
+        if query:
+            if self.content_var.get():
+                delay = CONTENT_DEBOUNCE_MS
+            elif self.fuzzy_var.get():
+                delay = FUZZY_DEBOUNCE_MS
+            else:
+                delay = SEARCH_DEBOUNCE_MS
+            self._debounce_id = self.after(delay, self._perform_search)
+        else:
+            self._cancel_search()
+            self._last_query = ""
+            self.results_listbox.delete(0, tk.END)
+            self.results = []
+            self._result_dirs = set()
+            self._count_label.configure(text="")
+            self.select_all_btn.config(state="disabled")
 
     def _on_option_change(self):
         """Re-lanza búsqueda si hay texto."""
-        if self.search_entry.get().strip() and self.results:
+        if self.search_entry.get().strip() and self._last_query:
             self._perform_search()
 
+    def _cancel_pending_search(self):
+        if self._debounce_id is not None:
+            try:
+                self.after_cancel(self._debounce_id)
+            except Exception:
+                pass
+            self._debounce_id = None
+
+    def _cancel_search(self):
+        """Detiene la búsqueda en curso; sus lotes pendientes se descartan."""
+        self._search_token += 1
+        if self._search is not None:
+            self._search.cancel()
+            self._search = None
+
     def _perform_search(self):
-        lang = self.language_manager
+        self._debounce_id = None
         query = self.search_entry.get().strip()
         if not query:
             return
 
-        if not self.file_manager.root_path:
+        root = self.file_manager.root_path
+        if not root:
+            return
+
+        self._cancel_pending_search()
+        self._cancel_search()
+        self._last_query = query
+
+        if self.content_var.get():
+            self._perform_content_search(root, query)
+            return
+
+        names = self.file_manager.filename_index
+        if self.fuzzy_var.get() and names is not None:
+            self._perform_fuzzy_search(query, names)
             return
 
         self._clear_results(keep_query=True)
         self._empty_frame.place_forget()
 
-        case_sensitive  = self.case_sensitive_var.get()
-        match_extension = self.match_extension_var.get()
-        include_dirs    = self.search_dirs_var.get()
-
-        search_query = query if case_sensitive else query.lower()
+        matcher = make_name_matcher(
+            query,
+            case_sensitive=self.case_sensitive_var.get(),
+            match_extension=self.match_extension_var.get(),
+        )
+        token = self._search_token
+
+        def on_batch(batch):
+            self.after(0, lambda: self._add_results(token, batch))
+
+        def on_done(total, cancelled):
+            if not cancelled:
+                self.after(0, lambda: self._finish_search(token, total))
+
+        self._search = FilenameSearch(
+            root,
+            matcher,
+            on_batch,
+            on_done,
+            include_dirs=self.search_dirs_var.get(),
+            index=self.file_manager.get_index(root),
+            ignore=get_ignore_engine(root, "selection"),
+        ).start()
+
+    def _perform_content_search(self, root, query):
+        """Busca `query` dentro de los archivos (selección o proyecto) y transmite las líneas."""
+        self._clear_results(keep_query=True)
+        self._empty_frame.place_forget()
 
-        self.results = []
-        self._search_in_directory(
-            self.file_manager.root_path,
-            search_query,
-            case_sensitive,
-            match_extension,
-            include_dirs,
+        content_query = ContentQuery(
+            query,
+            regex=self.regex_var.get(),
+            case_sensitive=self.case_sensitive_var.get(),
+            whole_word=self.whole_word_var.get(),
+            context=1,
         )
+        try:
+            content_query.compile()
+        except re.error as e:
+            self._count_label.configure(text=f"— {self.language_manager.get_text('search_invalid_regex')}: {e}")
+            return
 
-        t = self.theme_manager.get_theme()
+        index = self.file_manager.get_index(root)
+        # El índice de trigramas descarta de antemano los archivos que no pueden coincidir
+        trigrams = self.file_manager.trigram_index
+        if self.selection_only_var.get():
+            files = self.tree_view.selection_manager.get_selected_files()
+            # Solo se descartan archivos que el índice conoce: la selección
+            # puede incluir carpetas ignoradas (node_modules...) que no indexa
+            narrowed = trigrams.narrow(files, query, content_query.regex) if trigrams is not None else None
+            if narrowed is not None:
+                files = narrowed
+        else:
+            candidates = trigrams.candidates(query, content_query.regex) if trigrams is not None else None
+            if candidates is not None:
+                files = candidates
+            else:
+                files = (
+                    path for path, _name, is_dir
+                    in iter_entries(root, index, get_ignore_engine(root, "selection"))
+                    if not is_dir
+                )
+
+        def size_of(path):
+            entry = index.get(path) if index is not None else None
+            return entry.size if entry is not None else 0
+
+        token = self._search_token
+
+        def on_batch(batch):
+            self.after(0, lambda: self._add_content_results(token, batch))
+
+        def on_done(total, cancelled):
+            if not cancelled:
+                self.after(0, lambda: self._finish_search(token, total))
 
-        if self.results:
-            for filepath in self.results:
-                relpath = self.file_manager.get_relative_path(filepath)
-                # Prefijo visual por tipo
-                prefix = "  " if os.path.isdir(filepath) else "  "
-                self.results_listbox.insert(tk.END, f"{prefix}{relpath}")
+        self._search = ContentSearch(files, content_query, on_batch, on_done, size_of=size_of).start()
 
-            # Colorear pares/impares
-            for i in range(len(self.results)):
-                row_bg = t["tree_bg"] if i % 2 == 0 else self._mix_colors(t["tree_bg"], t["secondary_bg"])
-                self.results_listbox.itemconfigure(i, background=row_bg, foreground=t["tree_fg"])
+    def _perform_fuzzy_search(self, query, names):
+        """Ordena el índice de nombres en un hilo; la lista se reemplaza al terminar."""
+        token = self._search_token
 
-            count = len(self.results)
+        def worker():
+            try:
+                ranked, total = names.search(query, FUZZY_LIMIT)
+            except Exception as e:
+                print(f"Error in fuzzy search: {e}")
+                ranked, total = [], 0
+            self.after(0, lambda: self._show_ranked(token, ranked, total))
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _show_ranked(self, token, ranked, total):
+        if token != self._search_token or not self.winfo_exists():
+            return
+        self._clear_results(keep_query=True)
+        self._empty_frame.place_forget()
+        if ranked:
+            self._add_results(token, [(path, False) for _score, path, _pos in ranked])
+        self._finish_search(token, total)
+
+    def _add_results(self, token, batch):
+        """Agrega un lote de coincidencias (solo si pertenece a la búsqueda actual)."""
+        if token != self._search_token or not self.winfo_exists():
+            return
+        t = self.theme_manager.get_theme()
+        even_bg = t["tree_bg"]
+        odd_bg = self._mix_colors(t["tree_bg"], t["secondary_bg"])
+        fg = t["tree_fg"]
+
+        start = len(self.results)
+        rows = []
+        for filepath, is_dir in batch:
+            self.results.append(filepath)
+            if is_dir:
+                self._result_dirs.add(filepath)
+            rows.append(f"  {self.file_manager.get_relative_path(filepath)}")
+        self.results_listbox.insert(tk.END, *rows)
+
+        # Colorear pares/impares (solo las filas nuevas)
+        for i in range(start, len(self.results)):
+            self.results_listbox.itemconfigure(i, background=even_bg if i % 2 == 0 else odd_bg, foreground=fg)
+
+        count = len(self.results)
+        self._count_label.configure(
+            text=f"— {count} resultado{'s' if count != 1 else ''} encontrado{'s' if count != 1 else ''}…"
+        )
+        self.select_all_btn.config(state="normal")
+
+    def _add_content_results(self, token, batch):
+        """Agrega coincidencias de contenido: "ruta:línea: texto" con su contexto atenuado."""
+        if token != self._search_token or not self.winfo_exists():
+            return
+        t = self.theme_manager.get_theme()
+        fg = t["tree_fg"]
+        dim = self._mix_colors(t["tree_fg"], t["tree_bg"])
+
+        start = len(self.results)
+        rows = []
+        colors = []
+        for match in batch:
+            rel = self.file_manager.get_relative_path(match.path)
+            for line, text in match.before:
+                rows.append(f"  {rel}-{line}- {text}")
+                colors.append(dim)
+            rows.append(f"  {rel}:{match.line}: {match.text}")
+            colors.append(fg)
+            for line, text in match.after:
+                rows.append(f"  {rel}-{line}- {text}")
+                colors.append(dim)
+            # Una entrada por fila para que doble clic y selección sigan alineados
+            self.results.extend([match.path] * (len(match.before) + 1 + len(match.after)))
+        self.results_listbox.insert(tk.END, *rows)
+        for offset, color in enumerate(colors):
+            self.results_listbox.itemconfigure(start + offset, foreground=color)
+
+        self._content_matches += len(batch)
+        count = self._content_matches
+        self._count_label.configure(
+            text=f"— {count} coincidencia{'s' if count != 1 else ''}…"
+        )
+        self.select_all_btn.config(state="normal")
+
+    def _finish_search(self, token, total):
+        if token != self._search_token or not self.winfo_exists():
+            return
+        self._search = None
+        if total:
             self._count_label.configure(
-                text=f"— {count} resultado{'s' if count != 1 else ''} encontrado{'s' if count != 1 else ''}"
+                text=f"— {total} resultado{'s' if total != 1 else ''} encontrado{'s' if total != 1 else ''}"
             )
-            self.select_all_btn.config(state="normal")
-        else:
-            ico_i = self._icon("info")
-            self._empty_label.configure(text=lang.get_text("search_no_results"))
-            self._empty_frame.configure(bg=t["tree_bg"])
-            self._empty_label.configure(bg=t["tree_bg"], fg=t.get("fg", "#cccccc"))
-            self._empty_frame.place(relx=0.5, rely=0.5, anchor="center")
-            self._count_label.configure(text="— 0 resultados")
+            return
+        lang = self.language_manager
+        t = self.theme_manager.get_theme()
+        self._empty_label.configure(text=lang.get_text("search_no_results"))
+        self._empty_frame.configure(bg=t["tree_bg"])
+        self._empty_label.configure(bg=t["tree_bg"], fg=t.get("fg", "#cccccc"))
+        self._empty_frame.place(relx=0.5, rely=0.5, anchor="center")
+        self._count_label.configure(text="— 0 resultados")
 
     def _mix_colors(self, c1, c2):
         """Mezcla dos colores hex al 50%."""
@@ -789,34 +1034,6 @@ class SearchDialog(tk.Toplevel):
         except Exception:
             return c1
 
-    def _search_in_directory(self, dirpath, query, case_sensitive, match_extension, include_dirs):
-        """Búsqueda recursiva."""
-        try:
-            for item in os.listdir(dirpath):
-                fullpath = os.path.join(dirpath, item)
-                filename = item if case_sensitive else item.lower()
-
-                if match_extension:
-                    ext = os.path.splitext(item)[1]
-                    if not case_sensitive:
-                        ext = ext.lower()
-                    match = query in ext
-                else:
-                    match = query in filename
-
-                if match:
-                    if os.path.isfile(fullpath):
-                        self.results.append(fullpath)
-                    elif os.path.isdir(fullpath) and include_dirs:
-                        self.results.append(fullpath)
-
-                if os.path.isdir(fullpath):
-                    self._search_in_directory(
-                        fullpath, query, case_sensitive, match_extension, include_dirs
-                    )
-        except PermissionError:
-            pass
-
     # ─────────────────────────────────────────────────────────────────────
     # ACCIONES
     # ─────────────────────────────────────────────────────────────────────
@@ -846,8 +1063,9 @@ class SearchDialog(tk.Toplevel):
         """Marca todos los resultados en el tree view."""
         lang = self.language_manager
 
-        for filepath in self.results:
-            if os.path.isfile(filepath):
+        # En modo contenido un archivo ocupa varias filas
+        for filepath in dict.fromkeys(self.results):
+            if filepath not in self._result_dirs:
                 self.tree_view.selection_manager.select_item(filepath)
 
         self.tree_view.refresh_tree()
@@ -867,11 +1085,16 @@ class SearchDialog(tk.Toplevel):
         """Limpia los resultados."""
         self.results_listbox.delete(0, tk.END)
         self.results = []
+        self._result_dirs = set()
+        self._content_matches = 0
         self._count_label.configure(text="")
         self._selection_label.configure(text="")
         self.select_all_btn.config(state="disabled")
 
         if not keep_query:
+            self._cancel_pending_search()
+            self._cancel_search()
+            self._last_query = ""
             self.search_entry.delete(0, tk.END)
             t = self.theme_manager.get_theme()
             lang = self.language_manager  # ✅ Agregar esta línea
@@ -1,16 +1,19 @@
 import os
+import threading
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 
+from core.ignore import IgnoreEngine, PROFILES, get_ignore_engine
+from core.selection_manager import PARTIAL
+
+# Entradas por página al expandir una carpeta; el resto queda tras "mostrar más"
+DIR_PAGE_SIZE = 1000
+# Nodos insertados por vuelta del bucle de eventos
+INSERT_BATCH_SIZE = 150
+
 class TreeView(ttk.Treeview):
     """TreeView mejorado con iconos y selección inteligente"""
-
-    IGNORED_DIRS = {
-        "node_modules", "venv", ".venv", "env", ".env",
-        "__pycache__", ".git", ".svn", ".hg", "dist", "build",
-    }
-    IGNORED_ARCHIVE_EXTS = {".zip", ".rar", ".7z", ".tar", ".gz", ".bz2", ".xz"}
     
     def __init__(self, parent, file_manager, selection_manager, icon_manager, alert_manager, theme_manager, language_manager, **kwargs):
         super().__init__(parent, **kwargs)
@@ -22,6 +25,18 @@ class TreeView(ttk.Treeview):
         self.theme_manager = theme_manager
         self.language_manager = language_manager
         
+        # Imágenes checkbox+icono compartidas: (seleccionado, icono base) -> PhotoImage
+        self._combined_icons = {}
+        # Cargas de carpetas en curso (nodo -> token) y nodos "mostrar más" (nodo -> (items, inicio))
+        self._pending_loads = {}
+        self._more_nodes = {}
+        # Carpetas cuyo contenido real ya se pidió (aunque resultaran vacías)
+        self._loaded_nodes = set()
+        # Ruta absoluta -> id de nodo de las filas insertadas
+        self._path_nodes = {}
+        # Filas de archivo insertadas (se mantiene al insertar/borrar filas)
+        self.visible_file_count = 0
+        
         # Configuración
         self.configure(columns=("abspath",), show="tree")
         self.column("#0", width=500)
@@ -30,6 +45,8 @@ class TreeView(ttk.Treeview):
         self.tag_configure("selected", background="#2ecc71", foreground="#ffffff")
         self.tag_configure("folder", font=("Helvetica", 10, "bold"))
         self.tag_configure("file", font=("Helvetica", 10))
+        self.tag_configure("partial", font=("Helvetica", 10, "bold italic"))
+        self.tag_configure("more", font=("Helvetica", 10, "italic"), foreground="#3498db")
         
         # Bindings
         self.bind("<<TreeviewOpen>>", self._on_open)
@@ -37,6 +54,7 @@ class TreeView(ttk.Treeview):
         self.bind("<KeyPress-e>", self._toggle_selection_key)
         self.bind("<KeyPress-E>", self._toggle_selection_key)
         self.bind("<space>", self._toggle_selection_key)
+        self.bind("<Return>", self._on_double_click)
         self.bind("<Double-Button-1>", self._on_double_click)
         
         # Menú contextual
@@ -72,11 +90,20 @@ class TreeView(ttk.Treeview):
     def load_directory(self, path):
         """Carga un directorio en el árbol"""
         self.delete(*self.get_children())
+        # Sin nodos que las usen, las imágenes combinadas se pueden liberar
+        self._combined_icons.clear()
+        # Las cargas en segundo plano de la raíz anterior se descartan
+        self._pending_loads.clear()
+        self._more_nodes.clear()
+        self._loaded_nodes.clear()
+        self._path_nodes.clear()
+        self.visible_file_count = 0
         self.file_manager.set_root(path)
         self._insert_node("", path, path)
     
-    def _insert_node(self, parent, text, abspath):
-        is_dir = os.path.isdir(abspath)
+    def _insert_node(self, parent, text, abspath, is_dir=None, index="end"):
+        if is_dir is None:
+            is_dir = os.path.isdir(abspath)
         basename = os.path.basename(abspath) or abspath
 
         # Icono base (carpeta o archivo)
@@ -85,22 +112,18 @@ class TreeView(ttk.Treeview):
         else:
             base_icon = self.icon_manager.get_file_icon(basename, size=(18, 18))
 
-        # Checkbox PNG
+        # Checkbox + icono (imagen compartida)
         is_selected = self.selection_manager.is_selected(abspath)
-        if is_selected:
-            checkbox_icon = self.icon_manager.load_icon('checkbox-checked.png', size=(16, 16))
-        else:
-            checkbox_icon = self.icon_manager.load_icon('checkbox-unchecked.png', size=(16, 16))
-
-        # 🔥 Combinar imágenes
-        combined_icon = self._combine_icons(checkbox_icon, base_icon)
+        combined_icon = self._get_node_icon(is_selected, base_icon)
 
         tags = ["folder" if is_dir else "file"]
         if is_selected:
             tags.append("selected")
+        if is_dir and self.selection_manager.get_check_state(abspath) == PARTIAL:
+            tags.append("partial")
 
         node = self.insert(
-            parent, "end",
+            parent, index,
             text=basename,   # ❌ SIN emojis
             image=combined_icon,
             open=False,
@@ -108,24 +131,36 @@ class TreeView(ttk.Treeview):
             tags=tuple(tags)
         )
 
-        # Guardar referencia
-        if not hasattr(self, '_node_images'):
-            self._node_images = {}
-        self._node_images[node] = combined_icon
-
         if is_dir:
             self.insert(node, "end", text="", values=("__dummy__",))
+        else:
+            self.visible_file_count += 1
 
+        self._path_nodes[abspath] = node
         return node
+
+    def _get_node_icon(self, is_selected, base_icon):
+        """Checkbox + icono combinados, uno por (estado, icono base).
+
+        Los iconos base vienen de la caché del FileIconManager (nombre y tamaño),
+        así que su nombre Tk identifica el par y todos los nodos iguales
+        comparten la misma PhotoImage.
+        """
+        key = (is_selected, str(base_icon))
+        combined_icon = self._combined_icons.get(key)
+        if combined_icon is None:
+            checkbox_name = 'checkbox-checked.png' if is_selected else 'checkbox-unchecked.png'
+            checkbox_icon = self.icon_manager.load_icon(checkbox_name, size=(16, 16))
+            combined_icon = self._combine_icons(checkbox_icon, base_icon)
+            self._combined_icons[key] = combined_icon
+        return combined_icon
+
     def _combine_icons(self, checkbox_icon, base_icon):
         """Combina checkbox + icono base en una sola imagen"""
         from PIL import Image, ImageTk
 
-        img1 = checkbox_icon._PhotoImage__photo.zoom(1)
-        img2 = base_icon._PhotoImage__photo.zoom(1)
-
-        width = img1.width() + img2.width()
-        height = max(img1.height(), img2.height())
+        width = checkbox_icon.width() + base_icon.width()
+        height = max(checkbox_icon.height(), base_icon.height())
 
         combined = Image.new("RGBA", (width, height))
 
@@ -133,7 +168,7 @@ class TreeView(ttk.Treeview):
         base_pil = ImageTk.getimage(base_icon)
 
         combined.paste(checkbox_pil, (0, 0), checkbox_pil)
-        combined.paste(base_pil, (img1.width(), 0), base_pil)
+        combined.paste(base_pil, (checkbox_icon.width(), 0), base_pil)
 
         return ImageTk.PhotoImage(combined)
 
@@ -143,7 +178,10 @@ class TreeView(ttk.Treeview):
         node = self.focus()
         if not node:
             return
-        
+        self._open_node(node)
+
+    def _open_node(self, node):
+        """Carga (si hace falta) el contenido de una carpeta y marca su icono como abierto"""
         values = self.item(node, "values")
         if not values:
             return
@@ -152,9 +190,10 @@ class TreeView(ttk.Treeview):
         if not os.path.isdir(abspath):
             return
         
-        # Verificar si ya está cargado
+        # Verificar si ya está cargado (o cargándose)
         children = self.get_children(node)
-        if len(children) == 1 and self.item(children[0], "values") == ("__dummy__",):
+        if node not in self._pending_loads and len(children) == 1 \
+                and self.item(children[0], "values") == ("__dummy__",):
             # Eliminar dummy y cargar contenido real
             self.delete(children[0])
             self._load_directory_contents(node, abspath)
@@ -180,13 +219,67 @@ class TreeView(ttk.Treeview):
         self._update_folder_icon(node, abspath, False)
 
     def _load_directory_contents(self, parent_node, dirpath):
-        """Carga el contenido de un directorio"""
-        try:
+        """Lista la carpeta en un hilo y la inserta por lotes con after()"""
+        token = object()
+        self._pending_loads[parent_node] = token
+        self._loaded_nodes.add(parent_node)
+        loading_node = self.insert(
+            parent_node, "end",
+            text=f"{self.language_manager.get_text('status_loading')}…",
+            values=("__dummy__",)
+        )
+        
+        def worker():
             items = self.file_manager.list_directory(dirpath)
-            for item in items:
-                self._insert_node(parent_node, item['name'], item['path'])
+            try:
+                self.after(0, lambda: self._on_directory_listed(parent_node, token, loading_node, items))
+            except RuntimeError:
+                pass  # La ventana ya se cerró
+        
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _on_directory_listed(self, parent_node, token, loading_node, items):
+        if self._pending_loads.get(parent_node) is not token or not self.exists(parent_node):
+            return  # El árbol se recargó mientras se listaba
+        self.delete(loading_node)
+        stop = min(DIR_PAGE_SIZE, len(items))
+        self._insert_batch(parent_node, token, items, 0, stop)
+
+    def _insert_batch(self, parent_node, token, items, start, stop):
+        """Inserta un lote de la página [start, stop) y programa el siguiente"""
+        if self._pending_loads.get(parent_node) is not token or not self.exists(parent_node):
+            return
+        end = min(start + INSERT_BATCH_SIZE, stop)
+        try:
+            for item in items[start:end]:
+                self._insert_node(parent_node, item['name'], item['path'], item['is_dir'])
         except Exception as e:
-            print(f"Error loading directory {dirpath}: {e}")
+            print(f"Error loading directory contents: {e}")
+        
+        if end < stop:
+            # after(1) en vez de after(0) deja que Tk redibuje entre lotes
+            self.after(1, lambda: self._insert_batch(parent_node, token, items, end, stop))
+            return
+        
+        del self._pending_loads[parent_node]
+        self.event_generate("<<TreeRowsChanged>>")
+        if stop < len(items):
+            more_node = self.insert(
+                parent_node, "end",
+                text=self.language_manager.get_text('tree_show_more').format(count=len(items) - stop),
+                values=("__dummy__",),
+                tags=("more",)
+            )
+            self._more_nodes[more_node] = (items, stop)
+
+    def _load_more(self, more_node):
+        """Reemplaza el nodo "mostrar más" por la siguiente página"""
+        items, start = self._more_nodes.pop(more_node)
+        parent_node = self.parent(more_node)
+        self.delete(more_node)
+        token = object()
+        self._pending_loads[parent_node] = token
+        self._insert_batch(parent_node, token, items, start, min(start + DIR_PAGE_SIZE, len(items)))
 
     def _update_folder_icon(self, node, path, is_open):
         basename = os.path.basename(path)
@@ -198,30 +291,18 @@ class TreeView(ttk.Treeview):
             basename, is_open, size=(18, 18)
         )
 
-        # Checkbox PNG
-        if is_selected:
-            checkbox_icon = self.icon_manager.load_icon(
-                'checkbox-checked.png', size=(16, 16)
-            )
-        else:
-            checkbox_icon = self.icon_manager.load_icon(
-                'checkbox-unchecked.png', size=(16, 16)
-            )
-
-        # Combinar imágenes
-        combined_icon = self._combine_icons(checkbox_icon, base_icon)
+        # Checkbox + icono (imagen compartida)
+        combined_icon = self._get_node_icon(is_selected, base_icon)
 
         tags = ["folder"]
         if is_selected:
             tags.append("selected")
+        if self.selection_manager.get_check_state(path) == PARTIAL:
+            tags.append("partial")
 
         # 🔥 SIN EMOJIS
         self.item(node, text=basename, image=combined_icon, tags=tuple(tags))
 
-        if not hasattr(self, '_node_images'):
-            self._node_images = {}
-        self._node_images[node] = combined_icon
-
         print(f"Icono actualizado: {basename} ({'abierto' if is_open else 'cerrado'})")
 
     
@@ -231,6 +312,10 @@ class TreeView(ttk.Treeview):
         if not node:
             return
         
+        if node in self._more_nodes:
+            self._load_more(node)
+            return
+        
         values = self.item(node, "values")
         if not values or values[0] == "__dummy__":
             return
@@ -254,18 +339,18 @@ class TreeView(ttk.Treeview):
         new_state = not current_state
         
         if new_state:
-            self.selection_manager.select_item(abspath)
             if is_dir:
                 # Seleccionar recursivamente, alertando también por subcarpetas sensibles.
                 self._select_folder_with_warnings(abspath)
+            else:
+                self.selection_manager.select_item(abspath)
         else:
+            # En carpetas deselecciona también todo el contenido
             self.selection_manager.deselect_item(abspath)
-            if is_dir:
-                # Deseleccionar todo el contenido
-                self.selection_manager.deselect_all_in_folder(abspath)
         
         # Actualizar visualización
         self._update_node_display(node, abspath, new_state)
+        self._refresh_ancestors(node)
         
         # Si es carpeta, actualizar hijos si están cargados
         if is_dir:
@@ -274,49 +359,33 @@ class TreeView(ttk.Treeview):
         return new_state
 
     def _select_folder_with_warnings(self, folder_path):
-        """Selecciona carpeta recursivamente, pidiendo confirmación en subcarpetas sensibles."""
+        """Selecciona carpeta recursivamente, pidiendo confirmación en subcarpetas sensibles.
+
+        Solo se recorren carpetas: la selección queda como un marcador de subárbol
+        con un filtro (ignorados + subcarpetas rechazadas) que se aplica al expandirla.
+        """
         if not os.path.isdir(folder_path):
             return
 
         warned_decisions = {}
         root_norm = os.path.normcase(os.path.normpath(folder_path))
         skipped_dirs = set()
-        skipped_files = set()
+        declined = set()
+        ignore = get_ignore_engine(self.file_manager.root_path or folder_path, "selection")
+        if ignore.is_ignored(folder_path, is_dir=True):
+            # El usuario marcó a propósito una carpeta ignorada: se evalúa desde ella
+            ignore = IgnoreEngine(folder_path, **PROFILES["selection"])
 
         try:
-            for current_root, dirs, files in os.walk(folder_path):
-                current_norm = os.path.normcase(os.path.normpath(current_root))
-                current_name = os.path.basename(current_root).lower()
-
-                # Nunca incluir automáticamente carpetas pesadas/sistema cuando se marca carpeta padre.
-                if current_norm != root_norm and current_name in self.IGNORED_DIRS:
-                    skipped_dirs.add(current_name)
-                    dirs[:] = []
-                    continue
-
-                # Si el root actual es sensible (y no es la carpeta raíz que el usuario seleccionó),
-                # pedir confirmación; si cancela, podar subárbol completo.
-                if current_norm != root_norm and self.icon_manager.is_warning_folder(current_name):
-                    if current_name in warned_decisions:
-                        allow_current = warned_decisions[current_name]
-                    elif self.alert_manager.should_warn(current_name):
-                        allow_current = self.alert_manager.show_warning(current_name)
-                        warned_decisions[current_name] = allow_current
-                    else:
-                        allow_current = True
-                        warned_decisions[current_name] = True
-
-                    if not allow_current:
-                        dirs[:] = []
-                        continue
-
-                self.selection_manager.select_item(current_root)
-
+            # El índice del proyecto evita volver a recorrer el disco
+            for current_root, dirs, _files in self.file_manager.walk(folder_path):
                 # Decidir por adelantado qué subdirectorios se recorren.
                 pruned_dirs = []
                 for d in dirs:
                     folder_name = d.lower()
-                    if folder_name in self.IGNORED_DIRS:
+                    subdir = os.path.join(current_root, d)
+                    # Nunca incluir automáticamente carpetas pesadas/sistema cuando se marca carpeta padre.
+                    if ignore.is_ignored(subdir, is_dir=True):
                         skipped_dirs.add(folder_name)
                         continue
                     if self.icon_manager.is_warning_folder(folder_name):
@@ -330,25 +399,39 @@ class TreeView(ttk.Treeview):
                             warned_decisions[folder_name] = True
 
                         if not allow_subdir:
+                            declined.add(os.path.normcase(os.path.normpath(subdir)))
                             continue
 
                     pruned_dirs.append(d)
 
                 dirs[:] = pruned_dirs
 
-                for file_name in files:
-                    ext = os.path.splitext(file_name)[1].lower()
-                    if ext in self.IGNORED_ARCHIVE_EXTS:
-                        skipped_files.add(ext)
-                        continue
-                    self.selection_manager.select_item(os.path.join(current_root, file_name))
+            skipped_files = {}  # extensión (o nombre) -> archivos que descartó el filtro
+
+            def exclude(path, is_dir):
+                if is_dir and os.path.normcase(os.path.normpath(path)) in declined:
+                    return True
+                if os.path.normcase(os.path.normpath(path)) == root_norm or \
+                        not ignore.is_ignored(path, is_dir=is_dir):
+                    return False
+                if not is_dir:
+                    name = os.path.basename(path)
+                    kind = os.path.splitext(name)[1].lower() or name
+                    skipped_files[kind] = skipped_files.get(kind, 0) + 1
+                return True
+
+            self.selection_manager.select_all_in_folder(folder_path, exclude=exclude)
+            # Los totales aplican el filtro una vez (quedan cacheados para la barra
+            # de estado) y así se sabe qué archivos descartó
+            self.selection_manager.get_selected_totals(folder_path)
 
             if skipped_dirs or skipped_files:
                 parts = []
                 if skipped_dirs:
                     parts.append("Carpetas omitidas: " + ", ".join(sorted(skipped_dirs)))
                 if skipped_files:
-                    parts.append("Archivos omitidos: " + ", ".join(sorted(skipped_files)))
+                    parts.append(f"Archivos omitidos ({sum(skipped_files.values())}): "
+                                 + ", ".join(sorted(skipped_files)))
                 messagebox.showwarning(
                     "Selección filtrada",
                     "Se omitieron elementos recomendados para no analizar:\n\n" + "\n".join(parts)
@@ -367,24 +450,17 @@ class TreeView(ttk.Treeview):
         else:
             base_icon = self.icon_manager.get_file_icon(basename, size=(18, 18))
 
-        # Checkbox icon
-        if is_selected:
-            checkbox_icon = self.icon_manager.load_icon('checkbox-checked.png', size=(16, 16))
-        else:
-            checkbox_icon = self.icon_manager.load_icon('checkbox-unchecked.png', size=(16, 16))
-
-        combined_icon = self._combine_icons(checkbox_icon, base_icon)
+        # Checkbox + icono (imagen compartida)
+        combined_icon = self._get_node_icon(is_selected, base_icon)
 
         tags = ["folder" if is_dir else "file"]
         if is_selected:
             tags.append("selected")
+        if is_dir and self.selection_manager.get_check_state(abspath) == PARTIAL:
+            tags.append("partial")
 
         self.item(node, text=basename, image=combined_icon, tags=tuple(tags))
 
-        if not hasattr(self, '_node_images'):
-            self._node_images = {}
-        self._node_images[node] = combined_icon
-
     
     def _update_children_display(self, parent_node, is_selected):
         """Actualiza la visualización de todos los hijos recursivamente"""
@@ -399,6 +475,15 @@ class TreeView(ttk.Treeview):
                 if os.path.isdir(child_path):
                     self._update_children_display(child, is_selected)
 
+    def _refresh_ancestors(self, node):
+        """Actualiza el estado (marcado/parcial) de las carpetas que contienen al nodo"""
+        parent = self.parent(node)
+        while parent:
+            values = self.item(parent, "values")
+            if values and values[0] != "__dummy__":
+                self._update_node_display(parent, values[0], self.selection_manager.is_selected(values[0]))
+            parent = self.parent(parent)
+
     def _refresh_loaded_subtree(self, parent_node):
         """Sincroniza visual de nodos cargados según estado real de selección."""
         children = self.get_children(parent_node)
@@ -412,42 +497,123 @@ class TreeView(ttk.Treeview):
                     self._refresh_loaded_subtree(child)
     
     def refresh_tree(self):
-        """Refresca el árbol manteniendo selecciones"""
-        # Guardar estado de expansión y selecciones
-        expanded_nodes = self._get_expanded_nodes()
-        
-        # Recargar desde la raíz
-        if self.file_manager.root_path:
-            self.load_directory(self.file_manager.root_path)
-            
-            # Restaurar expansión
-            self._restore_expanded_nodes(expanded_nodes)
-    
-    def _get_expanded_nodes(self, node=""):
-        """Obtiene lista de nodos expandidos"""
-        expanded = []
-        children = self.get_children(node)
-        
-        for child in children:
-            if self.item(child, "open"):
-                values = self.item(child, "values")
-                if values and values[0] != "__dummy__":
-                    expanded.append(values[0])
-                    expanded.extend(self._get_expanded_nodes(child))
-        
-        return expanded
-    
-    def _restore_expanded_nodes(self, expanded_paths, node=""):
-        """Restaura los nodos que estaban expandidos"""
-        children = self.get_children(node)
+        """Refresca el árbol manteniendo selecciones, expansión y scroll.
+
+        Vuelve a listar (en un hilo) solo las carpetas ya cargadas y aplica las
+        diferencias: inserta las filas nuevas, borra las que ya no existen y
+        actualiza el checkbox de las que cambiaron de estado.
+        """
+        root_path = self.file_manager.root_path
+        if not root_path:
+            return
+        root_node = self._path_nodes.get(root_path)
+        if root_node is None or not self.exists(root_node):
+            self.load_directory(root_path)
+            return
         
-        for child in children:
+        # Carpetas con contenido cargado, de arriba abajo
+        loaded = [
+            (path, node) for path, node in self._path_nodes.items()
+            if self._is_loaded(node)
+        ]
+        loaded.sort(key=lambda pair: pair[0].count(os.sep))
+        self._update_row(root_node, root_path)
+        token = object()
+        self._refresh_token = token
+        
+        def worker():
+            listings = [
+                (path, node, self.file_manager.list_directory(path, use_index=False))
+                for path, node in loaded
+            ]
+            try:
+                self.after(0, lambda: self._apply_refresh(token, listings))
+            except RuntimeError:
+                pass  # La ventana ya se cerró
+        
+        threading.Thread(target=worker, daemon=True).start()
+
+    def _is_loaded(self, node):
+        """Indica si una carpeta ya tiene sus hijos reales insertados (o está vacía)"""
+        if not self.exists(node) or node in self._pending_loads:
+            return False
+        return node in self._loaded_nodes
+
+    def _apply_refresh(self, token, listings):
+        if getattr(self, "_refresh_token", None) is not token:
+            return  # Hubo otra recarga mientras se listaba
+        for dirpath, node, items in listings:
+            if self._path_nodes.get(dirpath) == node and self._is_loaded(node):
+                self._reconcile_children(node, items)
+        self.event_generate("<<TreeRowsChanged>>")
+
+    def _reconcile_children(self, parent_node, items):
+        """Ajusta los hijos cargados de una carpeta a su listado actual"""
+        existing = {}
+        more_node = None
+        for child in self.get_children(parent_node):
+            if child in self._more_nodes:
+                more_node = child
+                continue
             values = self.item(child, "values")
-            if values and values[0] in expanded_paths:
-                self.item(child, open=True)
-                # Trigger carga si no está cargado
-                self._on_open(None)
-                self._restore_expanded_nodes(expanded_paths, child)
+            if values and values[0] != "__dummy__":
+                existing[values[0]] = child
+        
+        # Se mantienen al menos las filas que ya estaban visibles
+        limit = max(DIR_PAGE_SIZE, len(existing))
+        wanted = items[:limit]
+        wanted_paths = {item['path'] for item in wanted}
+        
+        for path, child in existing.items():
+            if path not in wanted_paths:
+                self._delete_node(child)
+        
+        for position, item in enumerate(wanted):
+            child = existing.get(item['path'])
+            if child is not None and ("folder" in self.item(child, "tags")) != item['is_dir']:
+                # Cambió de archivo a carpeta (o al revés): se vuelve a crear
+                self._delete_node(child)
+                child = None
+            if child is None:
+                self._insert_node(parent_node, item['name'], item['path'], item['is_dir'], index=position)
+            else:
+                self._update_row(child, item['path'])
+        
+        # Página restante tras "mostrar más"
+        if more_node is not None:
+            self._delete_node(more_node)
+        if len(items) > limit:
+            more_node = self.insert(
+                parent_node, "end",
+                text=self.language_manager.get_text('tree_show_more').format(count=len(items) - limit),
+                values=("__dummy__",),
+                tags=("more",)
+            )
+            self._more_nodes[more_node] = (items, limit)
+
+    def _update_row(self, node, path):
+        """Actualiza el checkbox de una fila solo si cambió su estado"""
+        is_selected = self.selection_manager.is_selected(path)
+        tags = self.item(node, "tags")
+        partial = "folder" in tags and self.selection_manager.get_check_state(path) == PARTIAL
+        if is_selected != ("selected" in tags) or partial != ("partial" in tags):
+            self._update_node_display(node, path, is_selected)
+
+    def _delete_node(self, node):
+        """Borra una fila y olvida sus descendientes cargados"""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            self._more_nodes.pop(current, None)
+            self._pending_loads.pop(current, None)
+            self._loaded_nodes.discard(current)
+            values = self.item(current, "values")
+            if values and self._path_nodes.get(values[0]) == current:
+                del self._path_nodes[values[0]]
+                if "file" in self.item(current, "tags"):
+                    self.visible_file_count -= 1
+            stack.extend(self.get_children(current))
+        self.delete(node)
     
     def _on_double_click(self, event):
         """Maneja doble click"""
@@ -455,6 +621,10 @@ class TreeView(ttk.Treeview):
         if not node:
             return
         
+        if node in self._more_nodes:
+            self._load_more(node)
+            return
+        
         values = self.item(node, "values")
         if not values or values[0] == "__dummy__":
             return
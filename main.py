@@ -2,14 +2,26 @@
 """
 Code Tools ++
 Explorador de archivos profesional con analisis de codigo
+
+    python main.py                     # Interfaz gráfica
+    python main.py --headless stats .  # CLI sin Tk (igual que python -m core)
 """
 
-from gui import MainWindow
-from core.startup_preloader import run_app_with_preload
+import multiprocessing
+import sys
 
 
 def main():
     """Funcion principal"""
+    # El pool de procesos de la búsqueda de contenido relanza el ejecutable
+    # congelado (PyInstaller en Windows): no debe volver a abrir la interfaz
+    multiprocessing.freeze_support()
+    if len(sys.argv) > 1 and sys.argv[1] == "--headless":
+        from core.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[2:]))
+
+    from gui import MainWindow
+    from core.startup_preloader import run_app_with_preload
     run_app_with_preload(MainWindow)
 
 
@@ -1,8 +1,17 @@
 # Utils package
 from .config_manager import ConfigManager
 from .theme_manager import ThemeManager
-from .file_icons import FileIconManager
-from .alerts import AlertManager
 from .language_manager import LanguageManager
 
-__all__ = ['ConfigManager', 'ThemeManager', 'FileIconManager', 'AlertManager', 'LanguageManager']
\ No newline at end of file
+__all__ = ['ConfigManager', 'ThemeManager', 'FileIconManager', 'AlertManager', 'LanguageManager']
+
+
+def __getattr__(name):
+    # Los que dependen de tkinter/PIL se importan al usarlos (modo sin interfaz)
+    if name == 'FileIconManager':
+        from .file_icons import FileIconManager
+        return FileIconManager
+    if name == 'AlertManager':
+        from .alerts import AlertManager
+        return AlertManager
+    raise AttributeError(f"module 'utils' has no attribute {name!r}")
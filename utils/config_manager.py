@@ -29,7 +29,9 @@ class ConfigManager:
             "auto_expand_depth": 1,
             "preview_window_visible": True,
             "recent_folders": [],
-            "animated_toolbar_background": True
+            "animated_toolbar_background": True,
+            "todo_extra_tags": [],  # Etiquetas extra del escáner de TODOs (p.ej. "HACK", "XXX")
+            "duplicate_max_bucket": 16  # Duplicados: apariciones por bloque antes de comparar solo vecinas (0 = exacto)
         }
     
     def save(self):
@@ -29,23 +29,14 @@ def format_file_size(size_bytes):
     return f"{size_bytes:.2f} PB"
 
 def count_lines_in_file(filepath):
-    """Cuenta líneas en un archivo"""
-    try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            return sum(1 for _ in f)
-    except:
-        return 0
+    """Cuenta líneas en un archivo (conteo de bytes, sin decodificar)"""
+    from utils.line_counter import count_lines
+    return count_lines(filepath)
 
 def is_text_file(filepath):
-    """Verifica si un archivo es de texto"""
-    text_extensions = {
-        '.txt', '.py', '.js', '.jsx', '.ts', '.tsx', '.java', '.cpp', '.c', '.cs',
-        '.go', '.rs', '.php', '.rb', '.swift', '.kt', '.html', '.htm', '.css',
-        '.scss', '.sass', '.less', '.json', '.xml', '.yaml', '.yml', '.toml',
-        '.ini', '.csv', '.md', '.sh', '.bat', '.sql', '.r', '.m', '.h'
-    }
-    ext = os.path.splitext(filepath)[1].lower()
-    return ext in text_extensions
+    """Verifica si un archivo es de texto (extensión o contenido, veredicto cacheado)"""
+    from core.file_classifier import is_text_file as classify_cached
+    return classify_cached(filepath)
 
 def get_file_extension(filepath):
     """Obtiene la extensión de un archivo"""
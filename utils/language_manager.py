@@ -39,6 +39,11 @@ class LanguageManager:
                 'dash_open_with': 'Abrir con...',
                 'dash_searching_duplicates': 'Buscando código duplicado...',
                 'dash_comparing': 'Comparando',
+                'dash_dupes_incomplete': '⚠ {count} bloques muy repetidos solo se compararon con sus vecinos: puede haber más pares duplicados',
+                'dash_similar_files': 'ARCHIVOS SIMILARES',
+                'dash_similar_group': 'archivos, hasta {pct}% de similitud',
+                'dash_similar_incomplete': '⚠ {count} grupos de firmas muy grandes solo se compararon con sus vecinas: puede haber más archivos similares',
+                'dash_hashing_files': 'Calculando firmas',
                 'dash_no_data': 'No hay datos para mostrar',
                 'dash_select_finding': 'Selecciona un hallazgo para abrir su archivo',
                 'dash_col_type': 'Tipo',
@@ -145,6 +150,7 @@ class LanguageManager:
                 'export_paths_only': 'Copiar solo rutas',
                 'export_tree_structure': 'Copiar estructura árbol',
                 'export_for_llm': 'Copiar para LLM',
+                'export_for_llm_budget': 'Copiar para LLM (límite de tokens)',
                 'export_save_file': 'Guardar en archivo...',
                 
                 # Búsqueda
@@ -157,6 +163,12 @@ class LanguageManager:
                 'search_no_results': 'No se encontraron resultados',
                 'search_select_all': 'Marcar todos',
                 'search_include_dirs': 'Incluir directorios',
+                'search_fuzzy': 'Búsqueda difusa',
+                'search_content': 'Buscar en contenido',
+                'search_regex': 'Regex',
+                'search_whole_word': 'Palabra completa',
+                'search_in_selection': 'Solo selección',
+                'search_invalid_regex': 'Patrón no válido',
                 'search_clear': 'Limpiar',
                 'search_close': 'Cerrar',
                 'search_placeholder': 'Escribe para buscar archivos...',
@@ -239,6 +251,7 @@ class LanguageManager:
                 'context_mark': 'Marcar/Desmarcar',
                 'context_copy_path': 'Copiar ruta',
                 'context_open_location': 'Abrir ubicación',
+                'tree_show_more': 'Mostrar {count} más…',
                 
                 # Carpetas recientes
                 'tooltip_recent': 'Carpetas recientes',
@@ -446,6 +459,11 @@ class LanguageManager:
                 'dash_open_with': 'Open with...',
                 'dash_searching_duplicates': 'Searching duplicate code...',
                 'dash_comparing': 'Comparing',
+                'dash_dupes_incomplete': '⚠ {count} very common blocks were only compared with their neighbours: more duplicate pairs may exist',
+                'dash_similar_files': 'SIMILAR FILES',
+                'dash_similar_group': 'files, up to {pct}% similar',
+                'dash_similar_incomplete': '⚠ {count} large signature buckets were only compared with their neighbours: more similar files may exist',
+                'dash_hashing_files': 'Computing signatures',
                 'dash_no_data': 'No data to display',
                 'dash_select_finding': 'Select a finding to open its file',
                 'dash_col_type': 'Type',
@@ -552,6 +570,7 @@ class LanguageManager:
                 'export_paths_only': 'Copy paths only',
                 'export_tree_structure': 'Copy tree structure',
                 'export_for_llm': 'Copy for LLM',
+                'export_for_llm_budget': 'Copy for LLM (token budget)',
                 'export_save_file': 'Save to file...',
                 
                 # Search
@@ -564,6 +583,12 @@ class LanguageManager:
                 'search_no_results': 'No results found',
                 'search_select_all': 'Select all',
                 'search_include_dirs': 'Include directories',
+                'search_fuzzy': 'Fuzzy search',
+                'search_content': 'Search in contents',
+                'search_regex': 'Regex',
+                'search_whole_word': 'Whole word',
+                'search_in_selection': 'Selection only',
+                'search_invalid_regex': 'Invalid pattern',
                 'search_clear': 'Clear',
                 'search_close': 'Close',
                 'search_placeholder': 'Type to search files...',
@@ -646,6 +671,7 @@ class LanguageManager:
                 'context_mark': 'Mark/Unmark',
                 'context_copy_path': 'Copy path',
                 'context_open_location': 'Open location',
+                'tree_show_more': 'Show {count} more…',
                 
                 # Recent Folders
                 'tooltip_recent': 'Recent folders',
@@ -853,6 +879,11 @@ class LanguageManager:
                 'dash_open_with': '打开方式...',
                 'dash_searching_duplicates': '正在查找重复代码...',
                 'dash_comparing': '正在比较',
+                'dash_dupes_incomplete': '⚠ {count} 个高度重复的代码块仅与相邻出现比较：可能还有更多重复对',
+                'dash_similar_files': '相似文件',
+                'dash_similar_group': '个文件，相似度最高 {pct}%',
+                'dash_similar_incomplete': '⚠ {count} 个过大的签名桶仅与相邻签名比较：可能还有更多相似文件',
+                'dash_hashing_files': '正在计算签名',
                 'dash_no_data': '暂无可显示的数据',
                 'dash_select_finding': '选择一条结果以打开对应文件',
                 'dash_col_type': '类型',
@@ -959,6 +990,7 @@ class LanguageManager:
                 'export_paths_only': '仅复制路径',
                 'export_tree_structure': '复制树结构',
                 'export_for_llm': '为 LLM 复制',
+                'export_for_llm_budget': '为 LLM 复制（令牌预算）',
                 'export_save_file': '保存到文件...',
                 
                 # Search
@@ -971,6 +1003,12 @@ class LanguageManager:
                 'search_no_results': '未找到结果',
                 'search_select_all': '全选',
                 'search_include_dirs': '包含目录',
+                'search_fuzzy': '模糊搜索',
+                'search_content': '搜索文件内容',
+                'search_regex': '正则表达式',
+                'search_whole_word': '全字匹配',
+                'search_in_selection': '仅限所选',
+                'search_invalid_regex': '无效的模式',
                 'search_clear': '清除',
                 'search_close': '关闭',
                 'search_placeholder': '输入以搜索文件...',
@@ -1053,6 +1091,7 @@ class LanguageManager:
                 'context_mark': '标记/取消标记',
                 'context_copy_path': '复制路径',
                 'context_open_location': '打开位置',
+                'tree_show_more': '显示另外 {count} 项…',
                 
                 # Recent Folders
                 'tooltip_recent': '最近的文件夹',
@@ -1260,6 +1299,11 @@ class LanguageManager:
                 'dash_open_with': 'Открыть в...',
                 'dash_searching_duplicates': 'Поиск дублированного кода...',
                 'dash_comparing': 'Сравнение',
+                'dash_dupes_incomplete': '⚠ {count} часто повторяющихся блоков сравнивались только с соседними: дублирующихся пар может быть больше',
+                'dash_similar_files': 'ПОХОЖИЕ ФАЙЛЫ',
+                'dash_similar_group': 'файлов, сходство до {pct}%',
+                'dash_similar_incomplete': '⚠ {count} крупных групп сигнатур сравнивались только с соседними: похожих файлов может быть больше',
+                'dash_hashing_files': 'Вычисление сигнатур',
                 'dash_no_data': 'Нет данных для отображения',
                 'dash_select_finding': 'Выберите находку, чтобы открыть файл',
                 'dash_col_type': 'Тип',
@@ -1366,6 +1410,7 @@ class LanguageManager:
                 'export_paths_only': 'Копировать только пути',
                 'export_tree_structure': 'Копировать структуру дерева',
                 'export_for_llm': 'Копировать для LLM',
+                'export_for_llm_budget': 'Копировать для LLM (лимит токенов)',
                 'export_save_file': 'Сохранить в файл...',
                 
                 # Поиск
@@ -1378,6 +1423,12 @@ class LanguageManager:
                 'search_no_results': 'Результатов не найдено',
                 'search_select_all': 'Выбрать все',
                 'search_include_dirs': 'Включить папки',
+                'search_fuzzy': 'Нечёткий поиск',
+                'search_content': 'Искать в содержимом',
+                'search_regex': 'Регулярное выражение',
+                'search_whole_word': 'Слово целиком',
+                'search_in_selection': 'Только выбранное',
+                'search_invalid_regex': 'Недопустимый шаблон',
                 'search_clear': 'Очистить',
                 'search_close': 'Закрыть',
                 'search_placeholder': 'Введите для поиска файлов...',
@@ -1460,6 +1511,7 @@ class LanguageManager:
                 'context_mark': 'Отметить/снять',
                 'context_copy_path': 'Копировать путь',
                 'context_open_location': 'Открыть расположение',
+                'tree_show_more': 'Показать ещё {count}…',
                 
                 # Недавние папки
                 'tooltip_recent': 'Недавние папки',
@@ -0,0 +1,66 @@
+import hashlib
+import mmap
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+READ_CHUNK = 1024 * 1024
+MMAP_THRESHOLD = 32 * 1024 * 1024
+BATCH_WORKERS = 8
+
+
+def _finish(newlines, last_byte):
+    # Igual que iterar en modo texto: la última línea sin salto también cuenta
+    return newlines + (1 if last_byte not in (None, 10) else 0)
+
+
+def scan_file(filepath, with_hash=False):
+    """Cuenta líneas (bytes b'\\n') y opcionalmente calcula el hash en una sola lectura.
+
+    Retorna (líneas, hash_hex o None). No decodifica el contenido: los
+    archivos pequeños se leen en bloques sobre un buffer reutilizable y los
+    grandes se recorren con mmap.
+    """
+    digest = hashlib.blake2b(digest_size=16) if with_hash else None
+    newlines = 0
+    last_byte = None
+    with open(filepath, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for start in range(0, len(mm), READ_CHUNK):
+                    block = mm[start:start + READ_CHUNK]
+                    newlines += block.count(b"\n")
+                    if digest is not None:
+                        digest.update(block)
+                if len(mm):
+                    last_byte = mm[-1]
+        else:
+            buffer = bytearray(min(READ_CHUNK, max(size, 1)))
+            view = memoryview(buffer)
+            while True:
+                n = f.readinto(buffer)
+                if not n:
+                    break
+                newlines += buffer.count(b"\n", 0, n)
+                if digest is not None:
+                    digest.update(view[:n])
+                last_byte = buffer[n - 1]
+    return _finish(newlines, last_byte), (digest.hexdigest() if digest is not None else None)
+
+
+def count_lines(filepath):
+    """Número de líneas de un archivo (0 si no se puede leer)"""
+    try:
+        return scan_file(filepath)[0]
+    except (OSError, ValueError):
+        return 0
+
+
+def count_lines_many(filepaths, workers=None):
+    """Cuenta líneas de varios archivos en paralelo: ruta -> líneas"""
+    filepaths = list(filepaths)
+    if len(filepaths) < 2:
+        return {fp: count_lines(fp) for fp in filepaths}
+    with ThreadPoolExecutor(max_workers=workers or BATCH_WORKERS) as pool:
+        return dict(zip(filepaths, pool.map(count_lines, filepaths)))